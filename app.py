@@ -3,20 +3,37 @@ LegalRAG - Main Flask Application
 AI-Powered Legal Document Assistant using RAG
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import os
+import json
 import logging
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 from config import Config
 from modules import (
-    DocumentProcessor,
     EmbeddingGenerator,
+    QueryEmbeddingCache,
+    ChunkStore,
     VectorStore,
+    ShardedVectorStore,
     DocumentRetriever,
-    LLMHandler
+    LLMHandler,
+    AnswerCache,
+    IndexFactory,
+    Collection,
+    CollectionManager,
+    ContextPacker,
+    CrossEncoderReranker,
+    IndexManifest,
+    TextChunker,
+    NearDuplicateDetector,
+    DocumentIndexer,
+    JobQueue
 )
 
 # Configure logging
@@ -36,56 +53,296 @@ Config.init_app()
 
 # Global instances (initialized on first use)
 embedding_generator = None
-vector_store = None
-document_retriever = None
+context_packer = None
+reranker = None
 llm_handler = None
+job_queue = None
+init_lock = threading.Lock()
+
+# Set once the process can serve requests without first-request loading
+ready = threading.Event()
+
+NO_ANSWER = 'I could not find any relevant information in the indexed documents to answer your question.'
 
 
 def initialize_models():
     """Initialize all models and components (lazy loading)"""
-    global embedding_generator, vector_store, document_retriever, llm_handler
+    global embedding_generator, context_packer, reranker, llm_handler
     
-    if embedding_generator is None:
-        logger.info("Initializing models...")
-        
-        # Initialize embedding generator
-        embedding_generator = EmbeddingGenerator(Config.EMBEDDING_MODEL)
+    with init_lock:
+        if embedding_generator is None:
+            logger.info("Initializing models...")
+            
+            # Initialize embedding generator
+            embedding_generator = EmbeddingGenerator(
+                Config.EMBEDDING_MODEL,
+                cache=QueryEmbeddingCache(
+                    Config.EMBEDDING_MODEL,
+                    max_entries=Config.QUERY_CACHE_SIZE,
+                    disk_path=Config.QUERY_CACHE_PATH or None
+                ),
+                server_url=Config.EMBEDDING_SERVER_URL
+            )
+            
+            # Context is counted with the LLM's tokenizer, shared by all collections
+            context_packer = ContextPacker.load(Config.CONTEXT_TOKENIZER, max_tokens=Config.CONTEXT_TOKEN_BUDGET)
+            
+            # Optional second retrieval stage, shared by all collections
+            if Config.RERANK:
+                reranker = CrossEncoderReranker(
+                    Config.RERANKER_MODEL,
+                    batch_size=Config.RERANK_BATCH_SIZE,
+                    time_budget=Config.RERANK_TIME_BUDGET_MS / 1000
+                )
+            
+            # Initialize LLM handler with detailed logging
+            if not Config.GROQ_API_KEY:
+                logger.error("=" * 80)
+                logger.error("GROQ_API_KEY NOT FOUND!")
+                logger.error("Please add your Groq API key to the .env file:")
+                logger.error("GROQ_API_KEY=gsk_your_key_here")
+                logger.error("Get a free key at: https://console.groq.com/keys")
+                logger.error("=" * 80)
+            else:
+                try:
+                    logger.info(f"Initializing LLM Handler with key: {Config.GROQ_API_KEY[:10]}...")
+                    llm_handler = LLMHandler(
+                        api_key=Config.GROQ_API_KEY,
+                        model=Config.GROQ_MODEL,
+                        base_url=Config.GROQ_BASE_URL,
+                        max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                        queue_timeout=Config.LLM_QUEUE_TIMEOUT,
+                        timeout=Config.LLM_TIMEOUT
+                    )
+                    logger.info("✓ LLM Handler initialized successfully!")
+                except Exception as e:
+                    logger.error(f"✗ Failed to initialize LLM Handler: {str(e)}")
+                    logger.error("Query features will not work without LLM!")
+            
+            logger.info("Models initialized successfully")
+
+
+def load_collection(name: str, store_path: str, upload_folder: str) -> Collection:
+    """
+    Open a collection's vector store, indexer and retriever
+    
+    Args:
+        name: Collection name
+        store_path: Directory holding the collection's index
+        upload_folder: Directory holding the collection's uploaded files
         
-        # Initialize vector store
+    Returns:
+        Loaded collection
+    """
+    initialize_models()
+    
+    # Built before the store is opened, so a bad setting leaves nothing open
+    chunker = TextChunker(
+        embedding_generator.tokenizer,
+        max_tokens=Config.CHUNK_TOKENS or embedding_generator.max_seq_length,
+        overlap_tokens=Config.CHUNK_OVERLAP_TOKENS
+    )
+    
+    # Repeated chunks are stored once and collapsed in results
+    deduplicator = NearDuplicateDetector(Config.NEAR_DUPLICATE_DISTANCE) if Config.DEDUPLICATE_CHUNKS else None
+    
+    # Initialize vector store, split into shards searched in parallel if configured
+    store_kwargs = dict(
+        index_factory=IndexFactory(
+            index_type=Config.INDEX_TYPE,
+            nlist=Config.IVF_NLIST,
+            pq_m=Config.PQ_M,
+            hnsw_m=Config.HNSW_M,
+            ef_construction=Config.HNSW_EF_CONSTRUCTION
+        ),
+        nprobe=Config.SEARCH_NPROBE,
+        ef_search=Config.HNSW_EF_SEARCH,
+        metric=Config.SIMILARITY_METRIC,
+        compaction_threshold=Config.COMPACTION_THRESHOLD,
+        brute_force_limit=Config.FILTER_BRUTE_FORCE_LIMIT,
+        checkpoint_bytes=Config.CHECKPOINT_LOG_MB * 1024 * 1024,
+        checkpoint_interval=Config.CHECKPOINT_INTERVAL
+    )
+    if Config.VECTOR_STORE_SHARDS > 1:
+        vector_store = ShardedVectorStore(
+            embedding_dimension=embedding_generator.embedding_dimension,
+            store_path=store_path,
+            num_shards=Config.VECTOR_STORE_SHARDS,
+            max_loaded_shards=Config.MAX_LOADED_SHARDS,
+            idle_seconds=Config.SHARD_IDLE_SECONDS,
+            search_workers=Config.SHARD_SEARCH_WORKERS,
+            **store_kwargs
+        )
+    else:
         vector_store = VectorStore(
             embedding_dimension=embedding_generator.embedding_dimension,
-            store_path=Config.VECTOR_STORE_PATH
+            store_path=store_path,
+            **store_kwargs
+        )
+    
+    try:
+        # Initialize indexer with the manifest of indexed files
+        indexer = DocumentIndexer(
+            embedding_generator=embedding_generator,
+            vector_store=vector_store,
+            manifest=IndexManifest(store_path),
+            chunker=chunker,
+            extraction_workers=Config.EXTRACTION_WORKERS,
+            pages_per_task=Config.PDF_PAGES_PER_TASK,
+            embedding_batch_size=Config.EMBEDDING_BATCH_SIZE,
+            queue_size=Config.PIPELINE_QUEUE_SIZE,
+            deduplicator=deduplicator
         )
         
         # Initialize retriever
-        document_retriever = DocumentRetriever(
+        retriever = DocumentRetriever(
             vector_store=vector_store,
             embedding_generator=embedding_generator,
             top_k=Config.TOP_K_DOCUMENTS,
-            threshold=Config.SIMILARITY_THRESHOLD
+            threshold=Config.SIMILARITY_THRESHOLD,
+            mode=Config.RETRIEVAL_MODE,
+            candidates=Config.HYBRID_CANDIDATES,
+            rrf_k=Config.RRF_K,
+            deduplicator=deduplicator,
+            packer=context_packer,
+            reranker=reranker,
+            rerank_candidates=Config.RERANK_CANDIDATES
         )
         
-        # Initialize LLM handler with detailed logging
-        if not Config.GROQ_API_KEY:
-            logger.error("=" * 80)
-            logger.error("GROQ_API_KEY NOT FOUND!")
-            logger.error("Please add your Groq API key to the .env file:")
-            logger.error("GROQ_API_KEY=gsk_your_key_here")
-            logger.error("Get a free key at: https://console.groq.com/keys")
-            logger.error("=" * 80)
-        else:
-            try:
-                logger.info(f"Initializing LLM Handler with key: {Config.GROQ_API_KEY[:10]}...")
-                llm_handler = LLMHandler(
-                    api_key=Config.GROQ_API_KEY,
-                    model=Config.GROQ_MODEL
-                )
-                logger.info("✓ LLM Handler initialized successfully!")
-            except Exception as e:
-                logger.error(f"✗ Failed to initialize LLM Handler: {str(e)}")
-                logger.error("Query features will not work without LLM!")
+        # Answers are cached per collection, since chunk ids and versions are per index
+        answer_cache = None
+        if Config.ANSWER_CACHE_SIZE > 0:
+            answer_cache = AnswerCache(
+                similarity_threshold=Config.ANSWER_CACHE_SIMILARITY,
+                max_entries=Config.ANSWER_CACHE_SIZE
+            )
         
-        logger.info("Models initialized successfully")
+        return Collection(
+            name=name,
+            store_path=store_path,
+            upload_folder=upload_folder,
+            vector_store=vector_store,
+            indexer=indexer,
+            retriever=retriever,
+            answer_cache=answer_cache
+        )
+        
+    except Exception:
+        # The collection is not cached, so nothing else would close the store
+        vector_store.close()
+        raise
+
+
+def warm_up():
+    """
+    Load models and the warm collections and exercise the query path,
+    then mark the process ready
+    
+    Runs at import with EAGER_INIT=true, or in each worker after fork
+    with EAGER_INIT=preload (see gunicorn.conf.py).
+    """
+    try:
+        started = time.time()
+        initialize_models()
+        embedding_generator.warm_up()
+        if reranker is not None:
+            reranker.warm_up()
+        
+        # Open indexes and touch their pages with one search
+        query = embedding_generator.generate_embeddings(['warm-up'], show_progress_bar=False)[0]
+        for name in Config.WARM_COLLECTIONS:
+            with collection_manager.use(name) as collection:
+                collection.vector_store.search(query, k=1)
+        
+        ready.set()
+        logger.info(f"Warm-up finished in {time.time() - started:.2f}s, ready for requests")
+        
+    except Exception as e:
+        logger.error(f"Warm-up failed, not ready: {str(e)}")
+
+
+collection_manager = CollectionManager(
+    root_path=Config.COLLECTIONS_PATH,
+    upload_root=Config.COLLECTION_UPLOAD_FOLDER,
+    loader=load_collection,
+    default_store_path=Config.VECTOR_STORE_PATH,
+    default_upload_folder=Config.UPLOAD_FOLDER,
+    max_loaded=Config.MAX_LOADED_COLLECTIONS,
+    memory_budget=Config.COLLECTION_MEMORY_BUDGET_MB * 1024 * 1024
+)
+
+
+if Config.EAGER_INIT == 'true':
+    warm_up()
+elif Config.EAGER_INIT == 'preload':
+    # Load model weights before the server forks, so workers share them copy-on-write
+    initialize_models()
+else:
+    # Lazy mode: models load on the first request
+    ready.set()
+
+
+def answer_cache_key(collection: Collection, query: str, retrieved_docs: List,
+                     store_version: int) -> Optional[Dict]:
+    """
+    Build the answer cache key for a query and its retrieved documents
+    
+    Args:
+        collection: Collection the documents were retrieved from
+        query: User query
+        retrieved_docs: Retrieved (document, score) tuples
+        store_version: Vector store version the documents were retrieved from
+        
+    Returns:
+        Keyword arguments for AnswerCache.get/put, or None if caching is disabled
+    """
+    if collection.answer_cache is None:
+        return None
+    
+    return {
+        # Served from the query embedding cache after retrieval
+        'query_embedding': embedding_generator.generate_embedding(query),
+        'chunk_ids': [doc['id'] for doc, _ in retrieved_docs],
+        'model': llm_handler.model,
+        'prompt_version': LLMHandler.PROMPT_VERSION,
+        'store_version': store_version
+    }
+
+
+def generate_answer(collection: Collection, query: str, retrieved_docs: List, store_version: int) -> Dict:
+    """
+    Generate an answer from retrieved documents, reusing a cached answer
+    when a similar question retrieved the same chunks
+    
+    Args:
+        collection: Collection the documents were retrieved from
+        query: User query
+        retrieved_docs: Retrieved (document, score) tuples
+        store_version: Vector store version the documents were retrieved from
+        
+    Returns:
+        Answer dictionary from the LLM handler, with the context's token usage
+    """
+    context, sources, usage = collection.retriever.prepare_context(retrieved_docs, query)
+    cache_key = answer_cache_key(collection, query, retrieved_docs, store_version)
+    
+    if cache_key is not None:
+        cached = collection.answer_cache.get(**cache_key)
+        if cached is not None:
+            return {**cached, 'sources': sources, 'context_tokens': usage, 'cached': True}
+    
+    started = time.time()
+    result = llm_handler.generate_answer(query, context, sources)
+    
+    if cache_key is not None and result['success']:
+        collection.answer_cache.put(**cache_key, answer=result, latency=time.time() - started)
+    
+    return {**result, 'context_tokens': usage}
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format a Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 def allowed_file(filename: str) -> bool:
@@ -94,6 +351,62 @@ def allowed_file(filename: str) -> bool:
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
 
+def run_index_job(payload: Dict, report: Callable[[Dict], None]) -> Dict:
+    """
+    Index all uploaded documents (runs on a job worker)
+    
+    Args:
+        payload: Job payload with the upload folder and collection, and
+            optionally the files to index and whether to re-index them
+            when unchanged
+        report: Progress callback
+        
+    Returns:
+        Indexing results
+    """
+    upload_folder = payload['upload_folder']
+    files = payload.get('files') or sorted(f for f in os.listdir(upload_folder) if allowed_file(f))
+    
+    with collection_manager.use(payload.get('collection', CollectionManager.DEFAULT)) as collection:
+        if payload.get('force'):
+            # Forget the recorded hashes so the files are indexed again
+            for f in files:
+                collection.indexer.manifest.remove(f)
+        
+        return collection.indexer.index_files(
+            [os.path.join(upload_folder, f) for f in files],
+            progress_callback=report,
+            prune='files' not in payload
+        )
+
+
+def get_job_queue(start: bool = True) -> JobQueue:
+    """
+    Get the ingestion job queue
+    
+    Args:
+        start: Start the workers (and resume unfinished jobs) if not yet started;
+            False for read-only use such as status polling
+            
+    Returns:
+        Job queue
+    """
+    global job_queue
+    
+    with init_lock:
+        if job_queue is None:
+            job_queue = JobQueue(
+                db_path=Config.JOB_DB_PATH,
+                handler=run_index_job,
+                workers=Config.INDEX_WORKERS
+            )
+    
+    if start:
+        job_queue.start()
+    
+    return job_queue
+
+
 @app.route('/')
 def index():
     """Render main page"""
@@ -102,22 +415,37 @@ def index():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Liveness check: the process is up, whether or not it is ready"""
     return jsonify({
         'status': 'healthy',
-        'models_loaded': embedding_generator is not None
+        'models_loaded': embedding_generator is not None,
+        'ready': ready.is_set()
     })
 
 
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: 503 until models and indexes are loaded and warmed up"""
+    if not ready.is_set():
+        return jsonify({'status': 'starting', 'ready': False}), 503
+    
+    return jsonify({'status': 'ready', 'ready': True})
+
+
 @app.route('/api/upload', methods=['POST'])
-def upload_documents():
+@app.route('/api/collections/<collection_name>/upload', methods=['POST'])
+def upload_documents(collection_name: str = CollectionManager.DEFAULT):
     """
-    Upload and process documents
+    Upload and process documents, creating the collection if needed
     
     Returns:
         JSON response with upload status
     """
     try:
+        error = check_collection(collection_name, must_exist=False)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
         # Check if files were uploaded
         if 'files' not in request.files:
             return jsonify({'error': 'No files provided'}), 400
@@ -129,12 +457,14 @@ def upload_documents():
         
         uploaded_files = []
         processed_count = 0
+        upload_folder = collection_manager.upload_folder(collection_name)
+        os.makedirs(upload_folder, exist_ok=True)
         
         # Process each file
         for file in files:
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                filepath = os.path.join(upload_folder, filename)
                 file.save(filepath)
                 uploaded_files.append(filename)
                 processed_count += 1
@@ -145,7 +475,8 @@ def upload_documents():
         return jsonify({
             'message': f'Successfully uploaded {processed_count} document(s)',
             'files': uploaded_files,
-            'count': processed_count
+            'count': processed_count,
+            'collection': collection_name
         })
         
     except Exception as e:
@@ -154,79 +485,208 @@ def upload_documents():
 
 
 @app.route('/api/index', methods=['POST'])
-def index_documents():
+@app.route('/api/collections/<collection_name>/index', methods=['POST'])
+def index_documents(collection_name: str = CollectionManager.DEFAULT):
     """
-    Index uploaded documents into vector store
+    Queue indexing of uploaded documents into vector store
     
     Returns:
-        JSON response with indexing status
+        JSON response with the queued job id
     """
     try:
-        # Initialize models if needed
-        initialize_models()
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
         
         # Get list of uploaded files
-        upload_folder = app.config['UPLOAD_FOLDER']
-        files = [f for f in os.listdir(upload_folder) if allowed_file(f)]
+        upload_folder = collection_manager.upload_folder(collection_name)
+        files = [f for f in os.listdir(upload_folder) if allowed_file(f)] if os.path.isdir(upload_folder) else []
         
         if not files:
             return jsonify({'error': 'No documents to index'}), 400
         
-        total_chunks = 0
-        indexed_files = []
+        job_id = get_job_queue().submit({'upload_folder': upload_folder, 'collection': collection_name})
         
-        # Process each document
-        for filename in files:
-            filepath = os.path.join(upload_folder, filename)
-            
-            # Extract text
-            documents = DocumentProcessor.process_document(filepath)
+        return jsonify({
+            'message': f'Queued indexing of {len(files)} document(s)',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error queueing indexing job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """
+    Get status of an indexing job
+    
+    Returns:
+        JSON response with job status, per-file progress and result
+    """
+    try:
+        job = get_job_queue(start=False).get(job_id)
+        
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(job)
+        
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def check_collection(collection_name: str, must_exist: bool = True) -> Optional[Tuple[Dict, int]]:
+    """
+    Check a collection name from a request
+    
+    Args:
+        collection_name: Collection name
+        must_exist: Whether the collection must already have an index or uploads
+        
+    Returns:
+        Tuple of (error body, status code), or None if the collection can be used
+    """
+    try:
+        CollectionManager.validate_name(collection_name)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    if must_exist and not collection_manager.exists(collection_name):
+        return {'error': f'Collection {collection_name} not found'}, 404
+    
+    return None
+
+
+def check_query_request(collection: Collection, query: str,
+                        filters: Optional[Dict] = None) -> Optional[Tuple[Dict, int]]:
+    """
+    Check that a query can be answered
+    
+    Args:
+        collection: Collection to query
+        query: User query
+        filters: Optional metadata filters from the request
+        
+    Returns:
+        Tuple of (error body, status code), or None if the query can proceed
+    """
+    if not query:
+        return {'error': 'No query provided'}, 400
+    
+    if filters is not None:
+        try:
+            ChunkStore.validate_filters(filters)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+    
+    # Check if documents are indexed
+    if collection.vector_store.ntotal == 0:
+        return {'error': 'No documents indexed. Please upload and index documents first.'}, 400
+    
+    # Check if LLM is available
+    if llm_handler is None:
+        return {
+            'error': 'LLM not configured. Please set GROQ_API_KEY in .env file',
+            'help': 'Get a free API key at https://console.groq.com'
+        }, 500
+    
+    return None
+
+
+def get_search_params(data: Dict) -> Dict:
+    """Optional per-query ANN tuning and metadata filters from a request body"""
+    params = {
+        name: int(data[name]) for name in ('nprobe', 'ef_search') if data.get(name)
+    }
+    if data.get('filters'):
+        params['filters'] = data['filters']
+    return params
+
+
+@app.route('/api/documents/<filename>', methods=['DELETE'])
+@app.route('/api/collections/<collection_name>/documents/<filename>', methods=['DELETE'])
+def delete_document(filename: str, collection_name: str = CollectionManager.DEFAULT):
+    """
+    Delete a document and its vectors from the index
+    
+    Returns:
+        JSON response with the number of vectors removed
+    """
+    try:
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
+        filename = secure_filename(filename)
+        
+        with collection_manager.use(collection_name) as collection:
+            filepath = os.path.join(collection.upload_folder, filename)
+            uploaded = os.path.isfile(filepath)
             
-            # Chunk documents
-            chunks = []
-            chunk_metadata = []
+            removed = collection.indexer.remove_document(filename)
             
-            for doc in documents:
-                text_chunks = DocumentProcessor.chunk_text(
-                    doc['text'],
-                    chunk_size=Config.CHUNK_SIZE,
-                    chunk_overlap=Config.CHUNK_OVERLAP
-                )
-                
-                for chunk in text_chunks:
-                    chunks.append(chunk)
-                    chunk_metadata.append({
-                        'text': chunk,
-                        'metadata': doc['metadata']
-                    })
+            if not uploaded and not removed:
+                return jsonify({'error': 'Document not found'}), 404
             
-            # Generate embeddings
-            embeddings = embedding_generator.generate_embeddings(chunks)
+            if uploaded:
+                os.remove(filepath)
             
-            # Add to vector store
-            vector_store.add_documents(embeddings, chunk_metadata)
+            return jsonify({
+                'message': f'Deleted {filename}',
+                'removed_vectors': removed,
+                'stats': collection.vector_store.get_stats()
+            })
             
-            total_chunks += len(chunks)
-            indexed_files.append(filename)
+    except Exception as e:
+        logger.error(f"Error deleting document {filename}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/documents/<filename>/reindex', methods=['POST'])
+@app.route('/api/collections/<collection_name>/documents/<filename>/reindex', methods=['POST'])
+def reindex_document(filename: str, collection_name: str = CollectionManager.DEFAULT):
+    """
+    Queue re-indexing of a single uploaded document
+    
+    Returns:
+        JSON response with the queued job id
+    """
+    try:
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
         
-        # Save vector store
-        vector_store.save()
+        filename = secure_filename(filename)
+        upload_folder = collection_manager.upload_folder(collection_name)
         
-        return jsonify({
-            'message': f'Successfully indexed {len(indexed_files)} document(s)',
-            'files': indexed_files,
-            'total_chunks': total_chunks,
-            'stats': vector_store.get_stats()
+        if not os.path.isfile(os.path.join(upload_folder, filename)):
+            return jsonify({'error': 'Document not found'}), 404
+        
+        job_id = get_job_queue().submit({
+            'upload_folder': upload_folder,
+            'collection': collection_name,
+            'files': [filename],
+            'force': True
         })
         
+        return jsonify({
+            'message': f'Queued re-indexing of {filename}',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+        
     except Exception as e:
-        logger.error(f"Error indexing documents: {str(e)}")
+        logger.error(f"Error queueing re-index of {filename}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/query', methods=['POST'])
-@app.route('/api/query', methods=['POST'])
-def query_documents():
+@app.route('/api/collections/<collection_name>/query', methods=['POST'])
+def query_documents(collection_name: str = CollectionManager.DEFAULT):
     """
     Query indexed documents
     
@@ -237,72 +697,257 @@ def query_documents():
         # Initialize models if needed
         initialize_models()
         
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
+        with collection_manager.use(collection_name) as collection:
+            # Get query from request
+            data = request.get_json()
+            query = data.get('query', '').strip()
+            
+            error = check_query_request(collection, query, data.get('filters'))
+            if error is not None:
+                return jsonify(error[0]), error[1]
+            
+            search_params = get_search_params(data)
+            
+            # Retrieve relevant documents
+            store_version = collection.vector_store.version
+            retrieved_docs = collection.retriever.retrieve(query, search_params=search_params)
+            
+            if not retrieved_docs:
+                return jsonify({
+                    'answer': NO_ANSWER,
+                    'sources': [],
+                    'query': query
+                })
+            
+            # Generate answer
+            result = generate_answer(collection, query, retrieved_docs, store_version)
+            
+            return jsonify({
+                'answer': result['answer'],
+                'sources': result['sources'],
+                'query': query,
+                'model': result['model'],
+                'cached': result.get('cached', False),
+                'context_tokens': result['context_tokens']
+            })
+            
+    except Exception as e:
+        logger.error(f"Error querying documents: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/query/stream', methods=['POST'])
+@app.route('/api/collections/<collection_name>/query/stream', methods=['POST'])
+def query_documents_stream(collection_name: str = CollectionManager.DEFAULT):
+    """
+    Query indexed documents, streaming the answer as Server-Sent Events
+    
+    Emits a 'sources' event as soon as retrieval finishes, 'token' events
+    as the LLM generates the answer, then 'done' (or 'error').
+    
+    Returns:
+        text/event-stream response
+    """
+    try:
+        # Initialize models if needed
+        initialize_models()
+        
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
+        # Held until the response is closed, so the collection is not closed mid-stream
+        collection = collection_manager.acquire(collection_name)
+        
+    except Exception as e:
+        logger.error(f"Error querying documents: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    try:
         # Get query from request
         data = request.get_json()
         query = data.get('query', '').strip()
         
-        if not query:
-            return jsonify({'error': 'No query provided'}), 400
-        
-        # Check if documents are indexed
-        if vector_store is None or vector_store.index.ntotal == 0:
-            return jsonify({'error': 'No documents indexed. Please upload and index documents first.'}), 400
+        error = check_query_request(collection, query, data.get('filters'))
+        if error is not None:
+            collection_manager.release(collection_name)
+            return jsonify(error[0]), error[1]
         
-        # Check if LLM is available
-        if llm_handler is None:
-            return jsonify({
-                'error': 'LLM not configured. Please set GROQ_API_KEY in .env file',
-                'help': 'Get a free API key at https://console.groq.com'
-            }), 500
+        # Retrieve before streaming so failures are reported as plain JSON
+        store_version = collection.vector_store.version
+        retrieved_docs = collection.retriever.retrieve(query, search_params=get_search_params(data))
         
-        # Retrieve relevant documents
-        retrieved_docs = document_retriever.retrieve(query)
+    except Exception as e:
+        collection_manager.release(collection_name)
+        logger.error(f"Error querying documents: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    answer_cache = collection.answer_cache
+    
+    def events():
+        context, sources, usage = collection.retriever.prepare_context(retrieved_docs, query)
+        yield sse_event('sources', {'sources': sources, 'query': query, 'context_tokens': usage})
         
         if not retrieved_docs:
-            return jsonify({
-                'answer': 'I could not find any relevant information in the indexed documents to answer your question.',
-                'sources': [],
-                'query': query
-            })
+            yield sse_event('token', {'text': NO_ANSWER})
+            yield sse_event('done', {'model': llm_handler.model, 'cached': False})
+            return
         
-        # Prepare context
-        context, sources = document_retriever.prepare_context(retrieved_docs)
+        cache_key = answer_cache_key(collection, query, retrieved_docs, store_version)
         
-        # Generate answer
-        result = llm_handler.generate_answer(query, context, sources)
+        if cache_key is not None:
+            cached = answer_cache.get(**cache_key)
+            if cached is not None:
+                yield sse_event('token', {'text': cached['answer']})
+                yield sse_event('done', {'model': cached['model'], 'cached': True})
+                return
         
-        return jsonify({
-            'answer': result['answer'],
-            'sources': result['sources'],
-            'query': query,
-            'model': result['model']
-        })
+        started = time.time()
+        parts = []
+        
+        try:
+            for text in llm_handler.stream_answer(query, context):
+                parts.append(text)
+                yield sse_event('token', {'text': text})
+                
+        except Exception as e:
+            yield sse_event('error', {'error': f"Error generating answer: {str(e)}"})
+            return
+        
+        if cache_key is not None:
+            answer_cache.put(
+                **cache_key,
+                answer={'answer': ''.join(parts), 'sources': sources, 'model': llm_handler.model, 'success': True},
+                latency=time.time() - started
+            )
         
+        yield sse_event('done', {'model': llm_handler.model, 'cached': False})
+    
+    response = Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(lambda: collection_manager.release(collection_name))
+    return response
+
+
+@app.route('/api/query/batch', methods=['POST'])
+@app.route('/api/collections/<collection_name>/query/batch', methods=['POST'])
+def query_documents_batch(collection_name: str = CollectionManager.DEFAULT):
+    """
+    Answer a list of questions
+    
+    All questions are embedded in one call and searched in one index
+    call. Questions with identical text and context share one LLM call,
+    and LLM calls run in parallel up to BATCH_LLM_WORKERS.
+    
+    Returns:
+        JSON response with one result per question, in request order
+    """
+    try:
+        started = time.time()
+        
+        # Initialize models if needed
+        initialize_models()
+        
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
+        with collection_manager.use(collection_name) as collection:
+            # Get queries from request
+            data = request.get_json()
+            queries = [str(query).strip() for query in data.get('queries', [])]
+            
+            if not queries:
+                return jsonify({'error': 'No queries provided'}), 400
+            
+            if len(queries) > Config.MAX_BATCH_QUERIES:
+                return jsonify({'error': f'At most {Config.MAX_BATCH_QUERIES} queries per batch'}), 400
+            
+            for position, query in enumerate(queries):
+                error = check_query_request(collection, query, data.get('filters'))
+                if error is not None:
+                    return jsonify({**error[0], 'position': position}), error[1]
+            
+            # Retrieve documents for all questions at once
+            store_version = collection.vector_store.version
+            retrieved = collection.retriever.retrieve_batch(queries, search_params=get_search_params(data))
+            
+            # One LLM call per distinct question and context
+            keys = [
+                (QueryEmbeddingCache.normalize(query), tuple(doc['id'] for doc, _ in docs)) if docs else None
+                for query, docs in zip(queries, retrieved)
+            ]
+            
+            with ThreadPoolExecutor(max_workers=Config.BATCH_LLM_WORKERS) as executor:
+                futures = {}
+                for key, query, docs in zip(keys, queries, retrieved):
+                    if key is not None and key not in futures:
+                        futures[key] = executor.submit(generate_answer, collection, query, docs, store_version)
+            
+            results = []
+            for key, query in zip(keys, queries):
+                if key is None:
+                    results.append({'query': query, 'answer': NO_ANSWER, 'sources': []})
+                    continue
+                
+                result = futures[key].result()
+                entry = {
+                    'query': query,
+                    'answer': result['answer'],
+                    'sources': result['sources'],
+                    'model': result['model'],
+                    'cached': result.get('cached', False),
+                    'context_tokens': result['context_tokens']
+                }
+                if not result['success']:
+                    entry['error'] = result['answer']
+                results.append(entry)
+            
+            return jsonify({
+                'results': results,
+                'count': len(results),
+                'llm_calls': sum(1 for future in futures.values() if not future.result().get('cached', False)),
+                'elapsed': round(time.time() - started, 2)
+            })
+            
     except Exception as e:
-        logger.error(f"Error querying documents: {str(e)}")
+        logger.error(f"Error querying documents in batch: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/clear', methods=['POST'])
-def clear_database():
+@app.route('/api/collections/<collection_name>/clear', methods=['POST'])
+def clear_database(collection_name: str = CollectionManager.DEFAULT):
     """
-    Clear vector store and uploaded files
+    Clear a collection's vector store and uploaded files
     
     Returns:
         JSON response with clear status
     """
     try:
-        # Clear vector store
-        if vector_store is not None:
-            vector_store.clear()
-            vector_store.save()
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
+        # Clear vector store and manifest
+        with collection_manager.use(collection_name) as collection:
+            collection.indexer.clear()
         
         # Clear uploaded files
-        upload_folder = app.config['UPLOAD_FOLDER']
-        for filename in os.listdir(upload_folder):
-            filepath = os.path.join(upload_folder, filename)
-            if os.path.isfile(filepath):
-                os.remove(filepath)
+        upload_folder = collection_manager.upload_folder(collection_name)
+        if os.path.isdir(upload_folder):
+            for filename in os.listdir(upload_folder):
+                filepath = os.path.join(upload_folder, filename)
+                if os.path.isfile(filepath):
+                    os.remove(filepath)
         
         return jsonify({
             'message': 'Successfully cleared all data',
@@ -315,7 +960,8 @@ def clear_database():
 
 
 @app.route('/api/stats', methods=['GET'])
-def get_stats():
+@app.route('/api/collections/<collection_name>/stats', methods=['GET'])
+def get_stats(collection_name: str = CollectionManager.DEFAULT):
     """
     Get system statistics
     
@@ -323,26 +969,87 @@ def get_stats():
         JSON response with statistics
     """
     try:
-        if vector_store is None:
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        
+        if embedding_generator is None:
             return jsonify({
                 'indexed': False,
                 'stats': {}
             })
         
-        stats = vector_store.get_stats()
+        with collection_manager.use(collection_name) as collection:
+            stats = collection.vector_store.get_stats()
+            
+            # Get uploaded files count
+            upload_folder = collection.upload_folder
+            uploaded_files = len([f for f in os.listdir(upload_folder) if allowed_file(f)])
+            
+            return jsonify({
+                'indexed': True,
+                'collection': collection_name,
+                'stats': stats,
+                'uploaded_files': uploaded_files,
+                'query_cache': embedding_generator.cache.get_stats() if embedding_generator.cache else None,
+                'answer_cache': collection.answer_cache.get_stats() if collection.answer_cache else None,
+                'llm': llm_handler.get_stats() if llm_handler else None,
+                'reranker': reranker.get_stats() if reranker else None,
+                'collections': collection_manager.get_stats()
+            })
+            
+    except Exception as e:
+        logger.error(f"Error getting stats: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/collections', methods=['GET'])
+def list_collections():
+    """
+    List collections and which of them are loaded
+    
+    Returns:
+        JSON response with collection names and memory statistics
+    """
+    try:
+        return jsonify({
+            **collection_manager.get_stats(),
+            'collections': collection_manager.names()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error listing collections: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/collections/<collection_name>', methods=['DELETE'])
+def delete_collection(collection_name: str):
+    """
+    Delete a collection's index and uploaded files
+    
+    Returns:
+        JSON response with delete status
+    """
+    try:
+        error = check_collection(collection_name)
+        if error is not None:
+            return jsonify(error[0]), error[1]
         
-        # Get uploaded files count
-        upload_folder = app.config['UPLOAD_FOLDER']
-        uploaded_files = len([f for f in os.listdir(upload_folder) if allowed_file(f)])
+        collection_manager.delete(collection_name)
         
         return jsonify({
-            'indexed': True,
-            'stats': stats,
-            'uploaded_files': uploaded_files
+            'message': f'Deleted collection {collection_name}',
+            'status': 'success'
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+        
     except Exception as e:
-        logger.error(f"Error getting stats: {str(e)}")
+        logger.error(f"Error deleting collection {collection_name}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
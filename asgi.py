@@ -0,0 +1,230 @@
+"""
+LegalRAG - ASGI Application
+Serves queries on an asyncio event loop; all other routes go to the Flask app
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import logging
+import time
+from typing import Dict, List
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as legalrag
+from modules import Collection
+
+logger = logging.getLogger(__name__)
+
+
+async def prepare_query(request: Request):
+    """
+    Parse a query request and retrieve its documents off the event loop
+    
+    The returned collection is acquired from the collection manager, and
+    the caller releases it once the response is done.
+    
+    Returns:
+        Tuple of (collection, query, store_version, retrieved_docs), or an error JSONResponse
+    """
+    collection_name = request.path_params.get('collection_name', legalrag.CollectionManager.DEFAULT)
+    error = legalrag.check_collection(collection_name)
+    if error is not None:
+        return JSONResponse(error[0], status_code=error[1])
+    
+    # Model loading, embedding and search are blocking, so they run in the thread pool
+    await run_in_threadpool(legalrag.initialize_models)
+    collection = await run_in_threadpool(legalrag.collection_manager.acquire, collection_name)
+    
+    try:
+        data = await request.json()
+        query = data.get('query', '').strip()
+        
+        error = legalrag.check_query_request(collection, query, data.get('filters'))
+        if error is not None:
+            legalrag.collection_manager.release(collection_name)
+            return JSONResponse(error[0], status_code=error[1])
+        
+        store_version = collection.vector_store.version
+        retrieved_docs = await run_in_threadpool(
+            collection.retriever.retrieve,
+            query,
+            search_params=legalrag.get_search_params(data)
+        )
+        
+    except BaseException:
+        legalrag.collection_manager.release(collection_name)
+        raise
+    
+    return collection, query, store_version, retrieved_docs
+
+
+async def generate_answer(collection: Collection, query: str, retrieved_docs: List, store_version: int) -> Dict:
+    """
+    Generate an answer with the async LLM client, reusing a cached answer
+    when a similar question retrieved the same chunks
+    
+    Args:
+        collection: Collection the documents were retrieved from
+        query: User query
+        retrieved_docs: Retrieved (document, score) tuples
+        store_version: Vector store version the documents were retrieved from
+        
+    Returns:
+        Answer dictionary from the LLM handler, with the context's token usage
+    """
+    context, sources, usage = await run_in_threadpool(collection.retriever.prepare_context, retrieved_docs, query)
+    cache_key = await run_in_threadpool(legalrag.answer_cache_key, collection, query, retrieved_docs, store_version)
+    
+    if cache_key is not None:
+        cached = collection.answer_cache.get(**cache_key)
+        if cached is not None:
+            return {**cached, 'sources': sources, 'context_tokens': usage, 'cached': True}
+    
+    started = time.time()
+    result = await legalrag.llm_handler.agenerate_answer(query, context, sources)
+    
+    if cache_key is not None and result['success']:
+        collection.answer_cache.put(**cache_key, answer=result, latency=time.time() - started)
+    
+    return {**result, 'context_tokens': usage}
+
+
+async def query_documents(request: Request):
+    """
+    Query indexed documents
+    
+    Returns:
+        JSON response with answer and sources
+    """
+    try:
+        prepared = await prepare_query(request)
+        if isinstance(prepared, JSONResponse):
+            return prepared
+        collection, query, store_version, retrieved_docs = prepared
+        
+        try:
+            if not retrieved_docs:
+                return JSONResponse({'answer': legalrag.NO_ANSWER, 'sources': [], 'query': query})
+            
+            result = await generate_answer(collection, query, retrieved_docs, store_version)
+        finally:
+            legalrag.collection_manager.release(collection.name)
+        
+        return JSONResponse({
+            'answer': result['answer'],
+            'sources': result['sources'],
+            'query': query,
+            'model': result['model'],
+            'cached': result.get('cached', False),
+            'context_tokens': result['context_tokens']
+        })
+        
+    except TimeoutError as e:
+        logger.warning(f"Rejected query: {str(e)}")
+        return JSONResponse({'error': str(e)}, status_code=503, headers={'Retry-After': '1'})
+        
+    except Exception as e:
+        logger.error(f"Error querying documents: {str(e)}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def query_documents_stream(request: Request):
+    """
+    Query indexed documents, streaming the answer as Server-Sent Events
+    
+    Returns:
+        text/event-stream response
+    """
+    try:
+        prepared = await prepare_query(request)
+        if isinstance(prepared, JSONResponse):
+            return prepared
+        collection, query, store_version, retrieved_docs = prepared
+        
+    except Exception as e:
+        logger.error(f"Error querying documents: {str(e)}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+    
+    llm_handler = legalrag.llm_handler
+    answer_cache = collection.answer_cache
+    
+    async def events():
+        context, sources, usage = await run_in_threadpool(collection.retriever.prepare_context, retrieved_docs, query)
+        yield legalrag.sse_event('sources', {'sources': sources, 'query': query, 'context_tokens': usage})
+        
+        if not retrieved_docs:
+            yield legalrag.sse_event('token', {'text': legalrag.NO_ANSWER})
+            yield legalrag.sse_event('done', {'model': llm_handler.model, 'cached': False})
+            return
+        
+        cache_key = await run_in_threadpool(legalrag.answer_cache_key, collection, query, retrieved_docs, store_version)
+        
+        if cache_key is not None:
+            cached = answer_cache.get(**cache_key)
+            if cached is not None:
+                yield legalrag.sse_event('token', {'text': cached['answer']})
+                yield legalrag.sse_event('done', {'model': cached['model'], 'cached': True})
+                return
+        
+        started = time.time()
+        parts = []
+        
+        try:
+            async for text in llm_handler.astream_answer(query, context):
+                parts.append(text)
+                yield legalrag.sse_event('token', {'text': text})
+                
+        except Exception as e:
+            yield legalrag.sse_event('error', {'error': f"Error generating answer: {str(e)}"})
+            return
+        
+        if cache_key is not None:
+            answer_cache.put(
+                **cache_key,
+                answer={'answer': ''.join(parts), 'sources': sources, 'model': llm_handler.model, 'success': True},
+                latency=time.time() - started
+            )
+        
+        yield legalrag.sse_event('done', {'model': llm_handler.model, 'cached': False})
+    
+    released = []
+    
+    def release():
+        """Release the collection once, whichever of the stream's end or the response's end comes first"""
+        if not released:
+            released.append(True)
+            legalrag.collection_manager.release(collection.name)
+    
+    async def pinned():
+        # A client disconnect can skip the background task, but closes the stream
+        try:
+            async for event in events():
+                yield event
+        finally:
+            release()
+    
+    return StreamingResponse(
+        pinned(),
+        media_type='text/event-stream',
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        # Also covers a stream that is never started
+        background=BackgroundTask(release)
+    )
+
+
+application = Starlette(routes=[
+    Route('/api/query', query_documents, methods=['POST']),
+    Route('/api/query/stream', query_documents_stream, methods=['POST']),
+    Route('/api/collections/{collection_name}/query', query_documents, methods=['POST']),
+    Route('/api/collections/{collection_name}/query/stream', query_documents_stream, methods=['POST']),
+    Mount('/', app=WSGIMiddleware(legalrag.app))
+])
\ No newline at end of file
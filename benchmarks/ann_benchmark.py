@@ -0,0 +1,120 @@
+"""
+ANN Benchmark
+Reports recall@k and query latency of each index type against the flat index
+
+Usage:
+    python -m benchmarks.ann_benchmark --store data/vector_store
+    python -m benchmarks.ann_benchmark --synthetic 200000 --dim 384
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.index_factory import IndexFactory  # noqa: E402
+
+NPROBE_SWEEP = [1, 4, 8, 16, 32, 64]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256]
+
+
+def load_vectors(args) -> np.ndarray:
+    """Load vectors from a store, or generate clustered synthetic ones"""
+    if args.store:
+        index = faiss.read_index(os.path.join(args.store, 'faiss_index.bin'))
+        return IndexFactory.reconstruct_all(index)[1].astype('float32')
+    
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((max(args.synthetic // 500, 1), args.dim)).astype('float32')
+    labels = rng.integers(0, len(centers), args.synthetic)
+    vectors = centers[labels] + 0.3 * rng.standard_normal((args.synthetic, args.dim)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def measure(index, queries: np.ndarray, ground_truth: np.ndarray, k: int, params=None):
+    """Run queries one at a time, returning recall@k and latency percentiles in ms"""
+    latencies = []
+    hits = 0
+    
+    for query, truth in zip(queries, ground_truth):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k, params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(ids[0]) & set(truth))
+    
+    latencies = np.array(latencies)
+    return hits / (len(queries) * k), latencies.mean(), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', help='Vector store directory to benchmark')
+    parser.add_argument('--synthetic', type=int, default=100000, help='Number of synthetic vectors')
+    parser.add_argument('--dim', type=int, default=384, help='Synthetic vector dimension')
+    parser.add_argument('--queries', type=int, default=500, help='Number of queries')
+    parser.add_argument('-k', type=int, default=4, help='Neighbours per query')
+    parser.add_argument('--nlist', type=int, default=1024, help='IVF partitions')
+    parser.add_argument('--pq-m', type=int, default=48, help='PQ sub-quantizers')
+    parser.add_argument('--hnsw-m', type=int, default=32, help='HNSW graph degree')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    faiss.omp_set_num_threads(1)
+    
+    vectors = load_vectors(args)
+    rng = np.random.default_rng(args.seed)
+    query_ids = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[query_ids] + 0.05 * rng.standard_normal((len(query_ids), vectors.shape[1])).astype('float32')
+    dimension = vectors.shape[1]
+    
+    # Keep IVF trainable on small stores
+    nlist = max(1, min(args.nlist, len(vectors) // IndexFactory.TRAINING_POINTS_PER_CENTROID))
+    
+    print(f"{len(vectors)} vectors, dimension {dimension}, {len(queries)} queries, k={args.k}, nlist={nlist}")
+    
+    flat = faiss.IndexFlatL2(dimension)
+    flat.add(vectors)
+    _, ground_truth = flat.search(queries, args.k)
+    
+    rows = []
+    recall, mean, p50, p99 = measure(flat, queries, ground_truth, args.k)
+    rows.append(('flat', '-', 0.0, recall, mean, p50, p99))
+    
+    for index_type in (IndexFactory.IVF_FLAT, IndexFactory.IVF_PQ, IndexFactory.HNSW):
+        factory = IndexFactory(index_type, nlist=nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m)
+        
+        start = time.perf_counter()
+        index = factory.build(dimension, training_vectors=vectors)
+        factory.configure(index)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+        
+        if IndexFactory.index_type_of(index) != index_type:
+            print(f"Skipping {index_type}: not enough vectors to train")
+            continue
+        
+        if index_type == IndexFactory.HNSW:
+            sweep = [('efSearch', ef, IndexFactory.search_parameters(index, ef_search=ef)) for ef in EF_SEARCH_SWEEP]
+        else:
+            sweep = [('nprobe', n, IndexFactory.search_parameters(index, nprobe=n)) for n in NPROBE_SWEEP if n <= nlist]
+        
+        for name, value, params in sweep:
+            recall, mean, p50, p99 = measure(index, queries, ground_truth, args.k, params)
+            rows.append((index_type, f"{name}={value}", build_seconds, recall, mean, p50, p99))
+    
+    print()
+    print(f"{'index':<10} {'setting':<14} {'build s':>8} {'recall@' + str(args.k):>10} "
+          f"{'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for index_type, setting, build_seconds, recall, mean, p50, p99 in rows:
+        print(f"{index_type:<10} {setting:<14} {build_seconds:>8.1f} {recall:>10.3f} "
+              f"{mean:>8.3f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Embedding Benchmark
+Reports query embeddings/sec with concurrent callers, encoding one query
+per call in-process versus through the micro-batching embedding server
+
+Usage:
+    python -m benchmarks.embedding_benchmark --threads 16
+    python embedding_server.py --socket /tmp/legalrag-embed.sock &
+    python -m benchmarks.embedding_benchmark --threads 16 --server unix:///tmp/legalrag-embed.sock
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from modules.embeddings import EmbeddingGenerator  # noqa: E402
+
+
+def run(encode, queries, threads: int):
+    """Encode queries one per call from several threads, returning (queries/sec, latencies in ms)"""
+    latencies = [[] for _ in range(threads)]
+    
+    def worker(slot: int):
+        for query in queries[slot::threads]:
+            start = time.perf_counter()
+            encode([query])
+            latencies[slot].append((time.perf_counter() - start) * 1000)
+    
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    return len(queries) / elapsed, np.array([ms for slot in latencies for ms in slot])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', help='Embedding server URL (in-process model only if omitted)')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent callers')
+    parser.add_argument('--queries', type=int, default=2000, help='Number of queries')
+    args = parser.parse_args()
+    
+    # Distinct texts of typical question length
+    queries = [f"What are the termination and notice obligations under clause {i} of the agreement?"
+               for i in range(args.queries)]
+    
+    generators = [('in-process', EmbeddingGenerator(args.model))]
+    if args.server:
+        generators.append(('server', EmbeddingGenerator(args.model, server_url=args.server)))
+    
+    print(f"{'mode':<12} {'queries/s':>10} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, generator in generators:
+        encode = lambda texts: generator.generate_embeddings(texts, show_progress_bar=False)
+        encode(queries[:8])
+        
+        qps, latencies = run(encode, queries, args.threads)
+        print(f"{name:<12} {qps:>10.1f} {latencies.mean():>9.2f} "
+              f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Mock LLM Server
+Serves an OpenAI-compatible chat completions endpoint with a fixed latency,
+so the query path can be load tested without calling Groq
+
+Usage:
+    python -m benchmarks.mock_llm_server --port 8001 --latency 1.5
+    GROQ_BASE_URL=http://localhost:8001 GROQ_API_KEY=mock uvicorn asgi:application
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def completion_chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> dict:
+    """Build one streamed chat completion chunk"""
+    return {
+        'id': completion_id,
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+    }
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Answer every chat completion with the same text after a delay"""
+    
+    latency = 1.0
+    tokens = 50
+    
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        model = body.get('model', 'mock')
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = [f"token{i} " for i in range(self.tokens)]
+        
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            
+            # Spread the latency over the tokens, like a model generating them
+            for word in words:
+                time.sleep(self.latency / len(words))
+                chunk = completion_chunk(completion_id, model, {'content': word})
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+            
+            chunk = completion_chunk(completion_id, model, {}, finish_reason='stop')
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+            return
+        
+        time.sleep(self.latency)
+        payload = json.dumps({
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(words).strip()},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(words), 'total_tokens': len(words)}
+        }).encode('utf-8')
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds per completion')
+    parser.add_argument('--tokens', type=int, default=50, help='Tokens per completion')
+    args = parser.parse_args()
+    
+    MockLLMHandler.latency = args.latency
+    MockLLMHandler.tokens = args.tokens
+    
+    server = ThreadingHTTPServer((args.host, args.port), MockLLMHandler)
+    print(f"Mock LLM listening on http://{args.host}:{args.port} ({args.latency}s per completion)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
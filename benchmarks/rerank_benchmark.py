@@ -0,0 +1,199 @@
+"""
+Re-ranking Benchmark
+Compares retrieval quality and latency of the bi-encoder alone with cross-encoder
+re-ranking of its top candidates, over candidate counts and time budgets
+
+Quality is hit@k (a relevant chunk is among the k sent to the LLM) and MRR@10.
+Without --queries, synthetic agreements are generated whose clauses differ only
+in party, period, amount or place. Each question asks about one agreement, so
+the same clause of the other agreements is a hard negative.
+
+Usage:
+    python -m benchmarks.rerank_benchmark --synthetic 100
+    python -m benchmarks.rerank_benchmark --files uploads/*.pdf --queries questions.jsonl
+
+A queries file holds one {"query": ..., "answer": ...} object per line; chunks
+containing the answer text are relevant.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import List, Set, Tuple
+
+import numpy as np
+from sentence_transformers import CrossEncoder, SentenceTransformer
+from transformers import AutoTokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.chunking_benchmark import CLAUSES  # noqa: E402
+from config import Config  # noqa: E402
+from modules.document_processor import DocumentProcessor  # noqa: E402
+from modules.reranker import CrossEncoderReranker  # noqa: E402
+from modules.text_chunker import TextChunker  # noqa: E402
+
+# (clause, question) pairs; each agreement gets every clause with its own values
+FACTS = [
+    ("Either party may terminate the {party} agreement on {days} days' written notice to the other party.",
+     "How much notice is needed to terminate the {party} agreement?"),
+    ("The total liability of each party under the {party} agreement is capped at {amount} per contract year.",
+     "What is the liability cap in the {party} agreement?"),
+    ("Any dispute arising under the {party} agreement shall be finally resolved by arbitration seated in {city}.",
+     "Where are disputes under the {party} agreement arbitrated?"),
+    ("The supplier shall deliver the goods ordered under the {party} agreement within {days} days of each order.",
+     "What is the delivery deadline under the {party} agreement?"),
+    ("The {party} agreement renews automatically for successive terms of {years} years unless either party objects.",
+     "For how long does the {party} agreement renew?"),
+    ("Confidential information received under the {party} agreement must be kept secret for {years} years after it ends.",
+     "How long does confidentiality last under the {party} agreement?"),
+]
+
+NAMES = ['Northwind', 'Contoso', 'Fabrikam', 'Tailspin', 'Litware', 'Adatum', 'Proseware', 'Wingtip',
+         'Woodgrove', 'Alpine', 'Coho', 'Lucerne', 'Margie', 'Trey', 'Southridge', 'Humongous']
+SUFFIXES = ['Holdings', 'Logistics', 'Energy', 'Foods', 'Systems', 'Pharma', 'Shipping', 'Media']
+CITIES = ['London', 'Paris', 'Geneva', 'Singapore', 'New York', 'Stockholm', 'Dubai', 'Hong Kong']
+
+
+def synthetic_corpus(agreements: int, seed: int) -> Tuple[List[str], List[str], List[Set[int]]]:
+    """Clause chunks of synthetic agreements, with one question per fact clause"""
+    rng = random.Random(seed)
+    parties = [f"{name} {suffix}" for suffix in SUFFIXES for name in NAMES]
+    rng.shuffle(parties)
+    
+    chunks, queries, relevant = [], [], []
+    for party in parties[:agreements]:
+        values = {
+            'party': party,
+            'days': rng.choice([7, 10, 14, 30, 45, 60, 90]),
+            'amount': f"EUR {rng.randint(1, 50) * 100000:,}",
+            'city': rng.choice(CITIES),
+            'years': rng.randint(1, 7)
+        }
+        for clause, question in FACTS:
+            sentences = [clause.format(**values)] + rng.sample(CLAUSES, 2)
+            rng.shuffle(sentences)
+            queries.append(question.format(**values))
+            relevant.append({len(chunks)})
+            chunks.append(' '.join(sentences))
+    return chunks, queries, relevant
+
+
+def file_corpus(files: List[str], queries_path: str, model: str,
+                max_tokens: int) -> Tuple[List[str], List[str], List[Set[int]]]:
+    """Chunks of files as the indexer would store them, with questions from a JSONL file"""
+    chunker = TextChunker(AutoTokenizer.from_pretrained(model), max_tokens=max_tokens,
+                          overlap_tokens=Config.CHUNK_OVERLAP_TOKENS)
+    chunks = [chunk['text'] for path in files
+              for chunk in chunker.iter_chunks(DocumentProcessor.process_document(path))]
+    
+    def normalize(text: str) -> str:
+        return re.sub(r'\s+', ' ', text).strip().lower()
+    
+    normalized = [normalize(text) for text in chunks]
+    queries, relevant = [], []
+    with open(queries_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            answer = normalize(entry['answer'])
+            ids = {i for i, text in enumerate(normalized) if answer in text}
+            if not ids:
+                print(f"Skipping question without a chunk containing its answer: {entry['query']}")
+                continue
+            queries.append(entry['query'])
+            relevant.append(ids)
+    return chunks, queries, relevant
+
+
+def quality(rankings: List[List[int]], relevant: List[Set[int]], k: int) -> Tuple[float, float]:
+    """hit@k and MRR@10 of rankings of chunk ids"""
+    hits = sum(bool(set(ranking[:k]) & truth) for ranking, truth in zip(rankings, relevant))
+    reciprocal = sum(
+        next((1.0 / rank for rank, chunk_id in enumerate(ranking[:10], 1) if chunk_id in truth), 0.0)
+        for ranking, truth in zip(rankings, relevant)
+    )
+    return hits / len(rankings), reciprocal / len(rankings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', nargs='*', help='PDF, DOCX or TXT files to chunk (needs --queries)')
+    parser.add_argument('--queries', help='JSONL file of questions and answer text')
+    parser.add_argument('--synthetic', type=int, default=100, help='Synthetic agreements (6 clauses each)')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Bi-encoder of the first stage')
+    parser.add_argument('--reranker', default=Config.RERANKER_MODEL, help='Cross-encoder of the second stage')
+    parser.add_argument('-k', type=int, default=Config.TOP_K_DOCUMENTS, help='Chunks sent to the LLM')
+    parser.add_argument('--candidates', type=int, nargs='+', default=[10, 20, Config.RERANK_CANDIDATES],
+                        help='First-stage candidates re-ranked')
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0, Config.RERANK_TIME_BUDGET_MS, 50],
+                        help='Re-ranking time budgets in ms (0 for no limit)')
+    parser.add_argument('--batch-size', type=int, default=Config.RERANK_BATCH_SIZE)
+    parser.add_argument('--max-queries', type=int, default=300, help='Questions sampled from the set')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    bi_encoder = SentenceTransformer(args.model, device='cpu')
+    cross_encoder = CrossEncoder(args.reranker, device='cpu')
+    
+    if args.files:
+        if not args.queries:
+            parser.error('--files needs --queries')
+        chunks, queries, relevant = file_corpus(
+            args.files, args.queries, args.model, Config.CHUNK_TOKENS or bi_encoder.max_seq_length
+        )
+    else:
+        chunks, queries, relevant = synthetic_corpus(args.synthetic, args.seed)
+    
+    sample = random.Random(args.seed).sample(range(len(queries)), min(args.max_queries, len(queries)))
+    queries = [queries[i] for i in sample]
+    relevant = [relevant[i] for i in sample]
+    
+    embeddings = bi_encoder.encode(chunks, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+    
+    # First stage: exact cosine search, as a flat index would return it
+    widest = max(args.candidates + [args.k, 10])
+    first_stage = []
+    first_ms = []
+    for query in queries:
+        start = time.perf_counter()
+        scores = embeddings @ bi_encoder.encode([query], convert_to_numpy=True, normalize_embeddings=True)[0]
+        top = np.argsort(-scores)[:widest]
+        first_ms.append((time.perf_counter() - start) * 1000)
+        first_stage.append([({'id': int(i), 'text': chunks[i]}, float(scores[i])) for i in top])
+    
+    print(f"{len(chunks)} chunks, {len(queries)} questions, k={args.k}, "
+          f"{args.model} then {args.reranker} on the CPU")
+    print()
+    print(f"{'stage':<14} {'cands':>6} {'budget ms':>10} {'hit@k':>7} {'MRR@10':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'fallbacks':>10}")
+    
+    hit, mrr = quality([[doc['id'] for doc, _ in row] for row in first_stage], relevant, args.k)
+    print(f"{'bi-encoder':<14} {'-':>6} {'-':>10} {hit:>7.3f} {mrr:>7.3f} "
+          f"{np.percentile(first_ms, 50):>8.1f} {np.percentile(first_ms, 95):>8.1f} {'-':>10}")
+    
+    for candidates in args.candidates:
+        for budget in args.budgets:
+            reranker = CrossEncoderReranker(args.reranker, batch_size=args.batch_size,
+                                            time_budget=budget / 1000, model=cross_encoder)
+            rankings = []
+            total_ms = []
+            for query, row, first in zip(queries, first_stage, first_ms):
+                start = time.perf_counter()
+                reranked = reranker.rerank(query, row[:candidates])
+                total_ms.append(first + (time.perf_counter() - start) * 1000)
+                rankings.append([doc['id'] for doc, _ in reranked])
+            
+            hit, mrr = quality(rankings, relevant, args.k)
+            print(f"{'cross-encoder':<14} {candidates:>6} {budget or '-':>10} {hit:>7.3f} {mrr:>7.3f} "
+                  f"{np.percentile(total_ms, 50):>8.1f} {np.percentile(total_ms, 95):>8.1f} "
+                  f"{reranker.fallbacks / len(queries):>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -13,18 +13,75 @@ class Config:
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
     
     # Vector store settings
-    VECTOR_STORE_PATH = 'data/vector_store'
-    CHUNK_SIZE = 1000
-    CHUNK_OVERLAP = 200
+    VECTOR_STORE_PATH = 'data/vector_store'  # Index of the default collection
+    COLLECTIONS_PATH = 'data/collections'  # One index directory per named collection
+    COLLECTION_UPLOAD_FOLDER = 'uploads/collections'  # One upload folder per named collection
+    MAX_LOADED_COLLECTIONS = int(os.getenv('MAX_LOADED_COLLECTIONS', 8))  # Collections kept in memory (0 for all)
+    COLLECTION_MEMORY_BUDGET_MB = int(os.getenv('COLLECTION_MEMORY_BUDGET_MB', 0))  # Index memory of loaded collections (0 for no limit)
+    CHUNK_TOKENS = 0  # Maximum tokens per chunk (0 for the embedding model's maximum sequence length)
+    CHUNK_OVERLAP_TOKENS = 32  # Tokens of whole clauses repeated between neighbouring chunks
+    DEDUPLICATE_CHUNKS = os.getenv('DEDUPLICATE_CHUNKS', 'false').lower() == 'true'  # Store identical chunks once
+    NEAR_DUPLICATE_DISTANCE = 3  # SimHash bits in which search results may differ and still be collapsed into one
+    
+    # FAISS index settings
+    INDEX_TYPE = os.getenv('INDEX_TYPE', 'flat')  # flat, ivf_flat, ivf_pq or hnsw
+    IVF_NLIST = 1024  # IVF partitions (trained once 39 * nlist vectors exist)
+    PQ_M = 48  # PQ sub-quantizers for ivf_pq
+    HNSW_M = 32  # HNSW graph degree
+    HNSW_EF_CONSTRUCTION = 200
+    SEARCH_NPROBE = 16  # IVF partitions visited per query
+    HNSW_EF_SEARCH = 64  # HNSW search depth per query
+    FILTER_BRUTE_FORCE_LIMIT = 1000  # Filtered searches over at most this many chunks are scored exactly
+    COMPACTION_THRESHOLD = 0.2  # Deleted fraction of an HNSW index that triggers a rebuild
+    CHECKPOINT_LOG_MB = 64  # Vector log size at which a save rewrites the index snapshot
+    CHECKPOINT_INTERVAL = int(os.getenv('CHECKPOINT_INTERVAL', 300))  # Seconds between background checkpoints (0 to disable)
+    VECTOR_STORE_SHARDS = int(os.getenv('VECTOR_STORE_SHARDS', 1))  # Shards by source hash (fixed once data is indexed)
+    MAX_LOADED_SHARDS = 0  # Shards kept in memory at once (0 for all)
+    SHARD_IDLE_SECONDS = 0  # Unload shards unused for this long (0 to keep them loaded)
+    SHARD_SEARCH_WORKERS = 4  # Threads searching shards in parallel
     
     # Model settings
     EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'  # Fast & efficient for M1
+    EMBEDDING_SERVER_URL = os.getenv('EMBEDDING_SERVER_URL')  # Shared embedding server (loads the model in-process if unset)
+    EMBEDDING_MAX_BATCH = 64  # Embedding server: texts per micro-batch
+    EMBEDDING_MAX_WAIT_MS = 5  # Embedding server: milliseconds a request waits for its batch to fill
+    EAGER_INIT = os.getenv('EAGER_INIT', 'false').lower()  # false (load on first request), true, or preload (gunicorn)
+    WARM_COLLECTIONS = [name for name in os.getenv('WARM_COLLECTIONS', 'default').split(',') if name]  # Loaded at warm-up
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')  # Latest Groq model
+    GROQ_BASE_URL = os.getenv('GROQ_BASE_URL')  # Proxy or local mock server (defaults to api.groq.com)
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 16))  # Concurrent upstream calls on the async path
+    LLM_QUEUE_TIMEOUT = 10  # Seconds a query waits for a free LLM slot before a 503
+    LLM_TIMEOUT = 60  # Seconds per LLM call
+    MAX_BATCH_QUERIES = 500  # Questions per /api/query/batch request
+    BATCH_LLM_WORKERS = 8  # Parallel LLM calls per batch
+    
+    # Ingestion job settings
+    JOB_DB_PATH = 'data/jobs.db'
+    INDEX_WORKERS = 1
+    EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', os.cpu_count() or 1))  # Processes for text extraction
+    PDF_PAGES_PER_TASK = 25  # Large PDFs are split into page ranges of this size
+    EMBEDDING_BATCH_SIZE = 64  # Chunks embedded and stored per micro-batch
+    PIPELINE_QUEUE_SIZE = 4  # Extracted page ranges buffered ahead of embedding
     
     # Retrieval settings
+    SIMILARITY_METRIC = os.getenv('SIMILARITY_METRIC', 'l2')  # l2 or cosine (migrates an existing l2 store on load)
     TOP_K_DOCUMENTS = 4
-    SIMILARITY_THRESHOLD = 0.5
+    SIMILARITY_THRESHOLD = 0.3 if SIMILARITY_METRIC == 'cosine' else 0.5  # Minimum cosine similarity, or l2 relevance
+    RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'dense')  # dense or hybrid (dense + BM25)
+    HYBRID_CANDIDATES = 20  # Results from each search fused in hybrid mode
+    RRF_K = 60  # Reciprocal rank fusion constant
+    RERANK = os.getenv('RERANK', 'false').lower() == 'true'  # Re-score candidates with a cross-encoder before taking the top k
+    RERANKER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'  # Small cross-encoder, run on the CPU
+    RERANK_CANDIDATES = 50  # First-stage candidates re-scored per query
+    RERANK_BATCH_SIZE = 16  # Pairs per cross-encoder forward pass
+    RERANK_TIME_BUDGET_MS = 400  # Candidates not scored in time keep their first-stage order (0 for no limit)
+    QUERY_CACHE_SIZE = 1024  # Query embeddings kept in memory
+    QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH', 'data/query_cache.db')  # Empty to disable the disk tier
+    CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 2048))  # Tokens of retrieved text per prompt (0 for no limit)
+    CONTEXT_TOKENIZER = os.getenv('CONTEXT_TOKENIZER', '')  # HF hub tokenizer counting GROQ_MODEL tokens, e.g. NousResearch/Meta-Llama-3-8B-Instruct (empty to estimate)
+    ANSWER_CACHE_SIZE = 512  # Cached LLM answers (0 to disable)
+    ANSWER_CACHE_SIMILARITY = 0.95  # Minimum query similarity to reuse an answer for the same chunks
     
     @staticmethod
     def init_app():
@@ -0,0 +1,145 @@
+"""
+LegalRAG - Embedding Server
+Holds one copy of the embedding model per host and serves all app workers,
+coalescing their concurrent requests into micro-batches
+
+Run with:
+    python embedding_server.py --socket /tmp/legalrag-embed.sock
+    EMBEDDING_SERVER_URL=unix:///tmp/legalrag-embed.sock gunicorn app:app -c gunicorn.conf.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+from modules import EmbeddingGenerator, MicroBatcher
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    """Encode texts through the shared micro batcher"""
+    
+    # Keep connections open so workers do not reconnect per query
+    protocol_version = 'HTTP/1.1'
+    
+    model_name = None
+    dimension = None
+    max_seq_length = None
+    batcher = None
+    
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_json(self, status: int, data: dict):
+        self._send(status, json.dumps(data).encode('utf-8'), 'application/json')
+    
+    def do_GET(self):
+        if self.path != '/info':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        
+        self._send_json(200, {
+            'model': self.model_name,
+            'dimension': self.dimension,
+            'max_seq_length': self.max_seq_length,
+            'batching': self.batcher.get_stats()
+        })
+    
+    def do_POST(self):
+        if self.path != '/embed':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            texts = body.get('texts')
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                self._send_json(400, {'error': "'texts' must be a list of strings"})
+                return
+            
+            embeddings = self.batcher.submit(texts).astype('float32')
+            
+            # Raw float32 rows; JSON floats would cost more to encode than the model
+            self._send(200, embeddings.tobytes(), 'application/octet-stream', {
+                'X-Embedding-Shape': f"{len(texts)},{self.dimension}"
+            })
+            
+        except Exception as e:
+            logger.error(f"Error serving embeddings: {str(e)}")
+            self._send_json(500, {'error': str(e)})
+    
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return str(self.client_address or 'unix')
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class EmbeddingHTTPServer(ThreadingHTTPServer):
+    """HTTP server on TCP, one thread per connection"""
+    
+    # Every app worker thread keeps a connection; the default backlog of 5 refuses bursts
+    request_queue_size = 256
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a unix domain socket, one thread per connection"""
+    
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8002)
+    parser.add_argument('--socket', help='Listen on a unix socket instead of TCP')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL)
+    parser.add_argument('--max-batch', type=int, default=Config.EMBEDDING_MAX_BATCH,
+                        help='Texts per batch before encoding without waiting')
+    parser.add_argument('--max-wait-ms', type=float, default=Config.EMBEDDING_MAX_WAIT_MS,
+                        help='Milliseconds a request waits for others to join its batch')
+    args = parser.parse_args()
+    
+    generator = EmbeddingGenerator(args.model)
+    generator.warm_up()
+    
+    EmbeddingHandler.model_name = args.model
+    EmbeddingHandler.dimension = generator.embedding_dimension
+    EmbeddingHandler.max_seq_length = generator.max_seq_length
+    EmbeddingHandler.batcher = MicroBatcher(
+        lambda texts: generator.generate_embeddings(texts, batch_size=args.max_batch, show_progress_bar=False),
+        max_batch_size=args.max_batch,
+        max_wait=args.max_wait_ms / 1000
+    )
+    
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, EmbeddingHandler)
+        logger.info(f"Embedding server listening on unix://{args.socket}")
+    else:
+        server = EmbeddingHTTPServer((args.host, args.port), EmbeddingHandler)
+        logger.info(f"Embedding server listening on http://{args.host}:{args.port}")
+    
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
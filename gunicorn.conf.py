@@ -0,0 +1,38 @@
+"""
+LegalRAG - Gunicorn configuration
+Loads model weights once in the master so forked workers share them copy-on-write
+
+Run with:
+    gunicorn app:app -c gunicorn.conf.py
+"""
+
+import gc
+import os
+
+# Load models at import, but open indexes and warm up in each worker:
+# SQLite connections and thread pools must not cross a fork
+os.environ.setdefault('EAGER_INIT', 'preload')
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# One worker by default: each worker keeps its own in-memory indexes and answer
+# cache, and nothing reloads them when another worker's indexing job writes to
+# disk, so other workers would serve stale results until restarted. Only raise
+# this for read-only serving, restarting workers after each indexing run.
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = 120
+
+# Import the app in the master before forking workers
+preload_app = True
+
+
+def when_ready(server):
+    """Move preloaded objects out of the collector's reach, so GC passes do not copy their pages"""
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Open indexes and run the warm-up encode before the worker accepts requests"""
+    import app
+    app.warm_up()
\ No newline at end of file
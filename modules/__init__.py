@@ -3,15 +3,48 @@ LegalRAG Modules
 """
 
 from .document_processor import DocumentProcessor
+from .query_cache import QueryEmbeddingCache
+from .micro_batcher import MicroBatcher
+from .embedding_client import EmbeddingClient
 from .embeddings import EmbeddingGenerator
+from .chunk_store import ChunkStore
+from .index_factory import IndexFactory
+from .vector_log import VectorLog
 from .vector_store import VectorStore
+from .sharded_store import ShardedVectorStore
+from .context_packer import ContextPacker
+from .reranker import CrossEncoderReranker
 from .retriever import DocumentRetriever
 from .llm_handler import LLMHandler
+from .answer_cache import AnswerCache
+from .collection_manager import Collection, CollectionManager
+from .index_manifest import IndexManifest
+from .near_duplicates import NearDuplicateDetector
+from .text_chunker import TextChunker
+from .indexer import DocumentIndexer
+from .job_queue import JobQueue
 
 __all__ = [
     'DocumentProcessor',
+    'QueryEmbeddingCache',
+    'MicroBatcher',
+    'EmbeddingClient',
     'EmbeddingGenerator',
+    'ChunkStore',
+    'IndexFactory',
+    'VectorLog',
     'VectorStore',
+    'ShardedVectorStore',
+    'ContextPacker',
+    'CrossEncoderReranker',
     'DocumentRetriever',
-    'LLMHandler'
+    'LLMHandler',
+    'AnswerCache',
+    'Collection',
+    'CollectionManager',
+    'IndexManifest',
+    'TextChunker',
+    'NearDuplicateDetector',
+    'DocumentIndexer',
+    'JobQueue'
 ]
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Answer Cache Module
+Reuses generated answers for similar questions over the same context
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """Semantic cache of LLM answers keyed on retrieved context"""
+    
+    def __init__(self, similarity_threshold: float = 0.95, max_entries: int = 512):
+        """
+        Initialize answer cache
+        
+        Args:
+            similarity_threshold: Minimum cosine similarity between query embeddings for a hit
+            max_entries: Cached answers kept before the least recently used are evicted
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        
+        # (chunk ids, model, prompt version) -> list of (unit query embedding, answer, latency)
+        self.entries: OrderedDict = OrderedDict()
+        self.size = 0
+        self.store_version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+    
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        """Normalize an embedding to unit length"""
+        embedding = np.asarray(embedding, dtype='float32').ravel()
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+    
+    def _check_version(self, store_version: int):
+        """Drop all answers when the vector store has changed"""
+        if store_version != self.store_version:
+            if self.size:
+                logger.info(f"Vector store changed, dropping {self.size} cached answers")
+            self.entries.clear()
+            self.size = 0
+            self.store_version = store_version
+    
+    def get(self, query_embedding: np.ndarray, chunk_ids: List[int], model: str,
+            prompt_version: str, store_version: int) -> Optional[Dict]:
+        """
+        Look up an answer
+        
+        Args:
+            query_embedding: Embedding of the question
+            chunk_ids: Ids of the retrieved chunks, in context order
+            model: LLM model name
+            prompt_version: Version of the prompt template
+            store_version: Current vector store version
+            
+        Returns:
+            Cached answer dictionary, or None on a miss
+        """
+        key = (tuple(chunk_ids), model, prompt_version)
+        query = self._unit(query_embedding)
+        
+        with self.lock:
+            self._check_version(store_version)
+            
+            for cached_query, answer, latency in self.entries.get(key, []):
+                if float(np.dot(cached_query, query)) >= self.similarity_threshold:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += latency
+                    return answer
+            
+            self.misses += 1
+            return None
+    
+    def put(self, query_embedding: np.ndarray, chunk_ids: List[int], model: str,
+            prompt_version: str, store_version: int, answer: Dict, latency: float):
+        """
+        Store an answer
+        
+        Args:
+            query_embedding: Embedding of the question
+            chunk_ids: Ids of the retrieved chunks, in context order
+            model: LLM model name
+            prompt_version: Version of the prompt template
+            store_version: Vector store version the context was retrieved from
+            answer: Answer dictionary returned by the LLM handler
+            latency: Seconds the answer took to generate
+        """
+        key = (tuple(chunk_ids), model, prompt_version)
+        
+        with self.lock:
+            self._check_version(store_version)
+            
+            self.entries.setdefault(key, []).append((self._unit(query_embedding), answer, latency))
+            self.entries.move_to_end(key)
+            self.size += 1
+            
+            while self.size > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def clear(self):
+        """Drop all cached answers"""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'saved_seconds': round(self.saved_seconds, 2)
+            }
\ No newline at end of file
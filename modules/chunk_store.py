@@ -0,0 +1,478 @@
+"""
+Chunk Store Module
+Stores chunk text and metadata on disk in SQLite, fetched by id or BM25 text search
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkStore:
+    """Memory-mapped SQLite store for chunk text and metadata"""
+    
+    # Metadata filters: source and type match one value or any of a list,
+    # page_from and page_to select chunks overlapping a page range (inclusive)
+    FILTER_KEYS = ('source', 'type', 'page_from', 'page_to')
+    
+    # Query words that say nothing about which chunks are relevant
+    STOP_WORDS = frozenset({
+        'a', 'about', 'all', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'can', 'could', 'do',
+        'does', 'for', 'from', 'has', 'have', 'how', 'if', 'in', 'is', 'it', 'its', 'may', 'of', 'on',
+        'or', 'should', 'that', 'the', 'their', 'there', 'this', 'to', 'under', 'what', 'when', 'where',
+        'which', 'who', 'why', 'will', 'with', 'would'
+    })
+    
+    def __init__(self, db_path: str, mmap_size: int = 1024 * 1024 * 1024):
+        """
+        Initialize chunk store
+        
+        Args:
+            db_path: Path to SQLite database file
+            mmap_size: Bytes of the database file to memory-map for reads
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                source TEXT,
+                type TEXT,
+                page INTEGER,
+                page_end INTEGER,
+                fingerprint INTEGER,
+                content_hash TEXT,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source, page);
+            CREATE INDEX IF NOT EXISTS idx_chunks_type ON chunks (type, page);
+            CREATE TABLE IF NOT EXISTS chunk_refs (
+                id INTEGER NOT NULL,
+                source TEXT,
+                type TEXT,
+                page INTEGER,
+                page_end INTEGER,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunk_refs_id ON chunk_refs (id);
+            CREATE INDEX IF NOT EXISTS idx_chunk_refs_source ON chunk_refs (source, page);
+            CREATE INDEX IF NOT EXISTS idx_chunk_refs_type ON chunk_refs (type, page);
+            CREATE TRIGGER IF NOT EXISTS chunks_refs_delete AFTER DELETE ON chunks BEGIN
+                DELETE FROM chunk_refs WHERE id = old.id;
+            END;
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            );
+        """)
+        self._add_columns()
+        self._create_text_index()
+        self.conn.commit()
+        
+        # Ids are never reused, since deleted ids may still be in the vector index
+        row = self.conn.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(id) + 1 FROM chunks), 0), "
+            "COALESCE((SELECT value FROM store_meta WHERE key = 'next_id'), 0))"
+        ).fetchone()
+        self.next_id = row[0]
+    
+    def _add_columns(self):
+        """Add columns missing from stores created by earlier versions"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        for column, column_type in (('page_end', 'INTEGER'), ('fingerprint', 'INTEGER'), ('content_hash', 'TEXT')):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} {column_type}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_content_hash ON chunks (content_hash)")
+    
+    def _create_text_index(self):
+        """Create the BM25 full-text index, kept in sync with the chunks table by triggers"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ).fetchone()
+        
+        # External content: the index stores postings only, text stays in chunks.
+        # '§' is kept as a token so section references can be matched.
+        self.conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                text,
+                content = 'chunks',
+                content_rowid = 'id',
+                tokenize = "unicode61 remove_diacritics 2 tokenchars '§'"
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """)
+        
+        if not exists and self.conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone():
+            logger.info("Building full-text index for existing chunks")
+            self.conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+    
+    @classmethod
+    def _match_expression(cls, query: str) -> str:
+        """
+        Build an FTS5 query matching every content term of a free-text query
+        
+        Each whitespace-separated term is quoted, so punctuation such as
+        "12(b)" is matched as a phrase instead of parsed as query syntax.
+        Stop words are left out, so they neither match every chunk nor
+        have to appear in one.
+        """
+        terms = [
+            term for term in query.split()
+            if re.search(r'[\w§]', term) and re.sub(r'[^\w§]', '', term.lower()) not in cls.STOP_WORDS
+        ]
+        return ' AND '.join('"' + term.replace('"', '""') + '"' for term in terms)
+    
+    def add(self, documents: List[Dict]) -> List[int]:
+        """
+        Append chunks
+        
+        Args:
+            documents: Dictionaries with text, metadata and optionally a
+                near-duplicate fingerprint and content hash
+                
+        Returns:
+            Ids assigned to the chunks, in order
+        """
+        with self.lock:
+            ids = list(range(self.next_id, self.next_id + len(documents)))
+            rows = []
+            
+            for chunk_id, doc in zip(ids, documents):
+                metadata = doc.get('metadata', {})
+                rows.append((
+                    chunk_id,
+                    metadata.get('source'),
+                    metadata.get('type'),
+                    metadata.get('page'),
+                    metadata.get('page_end'),
+                    doc.get('fingerprint'),
+                    doc.get('content_hash'),
+                    doc.get('text', ''),
+                    json.dumps(metadata)
+                ))
+            
+            self.conn.executemany(
+                "INSERT INTO chunks (id, source, type, page, page_end, fingerprint, content_hash, text, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.next_id += len(documents)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('next_id', ?)",
+                (self.next_id,)
+            )
+            return ids
+    
+    def get(self, ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        Fetch chunks by id
+        
+        Args:
+            ids: Chunk ids
+            
+        Returns:
+            Dictionary of id to {'id', 'text', 'metadata', 'fingerprint', 'content_hash'}, plus
+            'duplicates' (metadata of each further copy) for repeated chunks
+        """
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        
+        placeholders = ', '.join('?' * len(ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, text, metadata, fingerprint, content_hash FROM chunks WHERE id IN ({placeholders})",
+                ids
+            ).fetchall()
+            references = self.conn.execute(
+                f"SELECT id, metadata FROM chunk_refs WHERE id IN ({placeholders}) ORDER BY rowid",
+                ids
+            ).fetchall()
+        
+        documents = {
+            chunk_id: {'id': chunk_id, 'text': text, 'metadata': json.loads(metadata),
+                       'fingerprint': fingerprint, 'content_hash': content_hash}
+            for chunk_id, text, metadata, fingerprint, content_hash in rows
+        }
+        
+        for chunk_id, metadata in references:
+            if chunk_id in documents:
+                documents[chunk_id].setdefault('duplicates', []).append(json.loads(metadata))
+        
+        return documents
+    
+    def find_duplicates(self, content_hashes: List[str]) -> List[Optional[int]]:
+        """
+        Find stored chunks with the same content
+        
+        Args:
+            content_hashes: Content hashes of chunks about to be stored
+            
+        Returns:
+            Id of a stored chunk with the same content hash, or None, per hash
+        """
+        matches = []
+        
+        with self.lock:
+            for content_hash in content_hashes:
+                row = self.conn.execute(
+                    "SELECT id FROM chunks WHERE content_hash = ? ORDER BY id LIMIT 1",
+                    (content_hash,)
+                ).fetchone()
+                matches.append(row[0] if row else None)
+        
+        return matches
+    
+    def add_references(self, ids: List[int], documents: List[Dict]):
+        """
+        Record documents as further copies of stored chunks
+        
+        Args:
+            ids: Stored chunk id per document
+            documents: Dictionaries with metadata of each copy
+        """
+        rows = []
+        for chunk_id, doc in zip(ids, documents):
+            metadata = doc.get('metadata', {})
+            rows.append((
+                int(chunk_id),
+                metadata.get('source'),
+                metadata.get('type'),
+                metadata.get('page'),
+                metadata.get('page_end'),
+                json.dumps(metadata)
+            ))
+        
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO chunk_refs (id, source, type, page, page_end, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+    
+    def release_source(self, source: str) -> List[int]:
+        """
+        Drop a source document's copies of chunks
+        
+        A stored chunk whose source is removed but which other documents also
+        contain is kept, with one of those copies as its source.
+        
+        Args:
+            source: Source file name
+            
+        Returns:
+            Ids of chunks no document contains any more (to delete)
+        """
+        released = []
+        
+        with self.lock:
+            self.conn.execute("DELETE FROM chunk_refs WHERE source = ?", (source,))
+            ids = [row[0] for row in self.conn.execute("SELECT id FROM chunks WHERE source = ?", (source,))]
+            
+            for chunk_id in ids:
+                reference = self.conn.execute(
+                    "SELECT rowid, source, type, page, page_end, metadata FROM chunk_refs "
+                    "WHERE id = ? ORDER BY rowid LIMIT 1",
+                    (chunk_id,)
+                ).fetchone()
+                
+                if reference is None:
+                    released.append(chunk_id)
+                    continue
+                
+                self.conn.execute(
+                    "UPDATE chunks SET source = ?, type = ?, page = ?, page_end = ?, metadata = ? WHERE id = ?",
+                    (*reference[1:], chunk_id)
+                )
+                self.conn.execute("DELETE FROM chunk_refs WHERE rowid = ?", (reference[0],))
+        
+        return released
+    
+    @classmethod
+    def validate_filters(cls, filters: Dict):
+        """
+        Check a metadata filter dictionary
+        
+        Raises:
+            ValueError: If the filters are malformed
+        """
+        if not isinstance(filters, dict):
+            raise ValueError("Filters must be an object")
+        
+        unknown = set(filters) - set(cls.FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))} (use {', '.join(cls.FILTER_KEYS)})")
+        
+        for key in ('source', 'type'):
+            values = filters.get(key)
+            if values is not None and not isinstance(values, (str, list)):
+                raise ValueError(f"Filter '{key}' must be a string or list of strings")
+        
+        for key in ('page_from', 'page_to'):
+            if filters.get(key) is not None and not isinstance(filters[key], int):
+                raise ValueError(f"Filter '{key}' must be an integer")
+    
+    @staticmethod
+    def _conditions(filters: Dict, table: str) -> Tuple[List[str], List]:
+        """Build conditions for metadata filters over the chunks or chunk_refs table"""
+        conditions = []
+        params = []
+        
+        for key in ('source', 'type'):
+            values = filters.get(key)
+            if values is None:
+                continue
+            values = [values] if isinstance(values, str) else list(values)
+            conditions.append(f"{table}.{key} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        
+        # Chunks stored before chunks spanned pages have no page_end
+        if filters.get('page_from') is not None:
+            conditions.append(f"COALESCE({table}.page_end, {table}.page) >= ?")
+            params.append(filters['page_from'])
+        
+        if filters.get('page_to') is not None:
+            conditions.append(f"{table}.page <= ?")
+            params.append(filters['page_to'])
+        
+        return conditions, params
+    
+    @classmethod
+    def _filter_clause(cls, filters: Optional[Dict]) -> Tuple[str, List]:
+        """
+        Build a WHERE clause over the chunks table for metadata filters
+        
+        A chunk matches if it or any of its copies in other documents matches.
+        
+        Returns:
+            Tuple of (SQL condition, parameters)
+        """
+        conditions, params = cls._conditions(filters or {}, 'chunks')
+        if not conditions:
+            return '1', []
+        
+        reference_conditions, reference_params = cls._conditions(filters, 'chunk_refs')
+        clause = (
+            f"(({' AND '.join(conditions)}) OR chunks.id IN "
+            f"(SELECT id FROM chunk_refs WHERE {' AND '.join(reference_conditions)}))"
+        )
+        return clause, params + reference_params
+    
+    def filter_ids(self, filters: Dict) -> List[int]:
+        """
+        Get ids of chunks matching metadata filters
+        
+        Args:
+            filters: Metadata filters (see FILTER_KEYS)
+            
+        Returns:
+            Matching chunk ids
+        """
+        clause, params = self._filter_clause(filters)
+        
+        with self.lock:
+            rows = self.conn.execute(f"SELECT id FROM chunks WHERE {clause}", params).fetchall()
+        return [row[0] for row in rows]
+    
+    def search_text(self, query: str, k: int = 20, filters: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """
+        Rank chunks against a query with BM25
+        
+        Args:
+            query: Free-text query
+            k: Number of results to return
+            filters: Optional metadata filters (see FILTER_KEYS)
+            
+        Returns:
+            List of (id, score) tuples, best first (higher scores are better)
+        """
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+        
+        with self.lock:
+            if filters:
+                clause, params = self._filter_clause(filters)
+                rows = self.conn.execute(
+                    "SELECT chunks_fts.rowid, bm25(chunks_fts) AS rank FROM chunks_fts "
+                    "JOIN chunks ON chunks.id = chunks_fts.rowid "
+                    f"WHERE chunks_fts MATCH ? AND {clause} ORDER BY rank LIMIT ?",
+                    (expression, *params, k)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT rowid, bm25(chunks_fts) AS rank FROM chunks_fts "
+                    "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (expression, k)
+                ).fetchall()
+        
+        # SQLite's bm25() is negative, lower is better
+        return [(chunk_id, -rank) for chunk_id, rank in rows]
+    
+    def existing_ids(self, ids: Iterable[int]) -> Set[int]:
+        """Get the subset of ids that are stored"""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return set()
+        
+        placeholders = ', '.join('?' * len(ids))
+        with self.lock:
+            rows = self.conn.execute(f"SELECT id FROM chunks WHERE id IN ({placeholders})", ids).fetchall()
+        return {row[0] for row in rows}
+    
+    def delete(self, ids: Iterable[int]):
+        """Delete chunks by id"""
+        with self.lock:
+            self.conn.executemany("DELETE FROM chunks WHERE id = ?", ((int(i),) for i in ids))
+    
+    def sources(self) -> Set[str]:
+        """Get names of all source documents, including those whose chunks are all copies"""
+        with self.lock:
+            rows = self.conn.execute("SELECT source FROM chunks UNION SELECT source FROM chunk_refs").fetchall()
+        return {row[0] for row in rows}
+    
+    def count_references(self) -> int:
+        """Get number of stored copies of repeated chunks"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunk_refs").fetchone()[0]
+    
+    def clear(self):
+        """Delete all chunks"""
+        with self.lock:
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.execute("DELETE FROM chunk_refs")
+            self.conn.execute("DELETE FROM store_meta WHERE key = 'next_id'")
+            self.next_id = 0
+    
+    def vacuum(self):
+        """Commit and reclaim space left by deleted chunks"""
+        with self.lock:
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+    
+    def commit(self):
+        """Persist pending changes"""
+        with self.lock:
+            self.conn.commit()
+    
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""
+Collection Manager Module
+Keeps named document collections in isolated indexes, loading them on demand
+"""
+
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Collection:
+    """One collection's index, indexer, retriever and answer cache"""
+    
+    def __init__(self, name: str, store_path: str, upload_folder: str, vector_store,
+                 indexer, retriever, answer_cache=None):
+        """
+        Initialize collection
+        
+        Args:
+            name: Collection name
+            store_path: Directory holding the collection's index
+            upload_folder: Directory holding the collection's uploaded files
+            vector_store: Vector store instance
+            indexer: Document indexer writing to the vector store
+            retriever: Document retriever reading from the vector store
+            answer_cache: Optional answer cache for queries on this collection
+        """
+        self.name = name
+        self.store_path = store_path
+        self.upload_folder = upload_folder
+        self.vector_store = vector_store
+        self.indexer = indexer
+        self.retriever = retriever
+        self.answer_cache = answer_cache
+    
+    def memory_bytes(self) -> int:
+        """Estimated memory held by the collection's index"""
+        return self.vector_store.memory_bytes()
+    
+    def close(self):
+        """Release the index's files, connections and threads"""
+        self.vector_store.close()
+
+
+class CollectionManager:
+    """LRU of loaded collections, bounded by count and estimated memory"""
+    
+    DEFAULT = 'default'
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+    
+    def __init__(self, root_path: str, upload_root: str, loader: Callable[[str, str, str], Collection],
+                 default_store_path: Optional[str] = None, default_upload_folder: Optional[str] = None,
+                 max_loaded: int = 0, memory_budget: int = 0):
+        """
+        Initialize collection manager
+        
+        Args:
+            root_path: Directory holding one index directory per collection
+            upload_root: Directory holding one upload folder per collection
+            loader: Callable taking (name, store_path, upload_folder) and returning a Collection
+            default_store_path: Index directory of the default collection (defaults to root_path/default)
+            default_upload_folder: Upload folder of the default collection (defaults to upload_root/default)
+            max_loaded: Collections kept in memory at once (0 for no limit)
+            memory_budget: Estimated index bytes kept in memory (0 for no limit)
+        """
+        self.root_path = root_path
+        self.upload_root = upload_root
+        self.loader = loader
+        self.default_store_path = default_store_path
+        self.default_upload_folder = default_upload_folder
+        self.max_loaded = max_loaded
+        self.memory_budget = memory_budget
+        
+        # Loaded collections in least recently used order, with use counts
+        self.loaded: OrderedDict = OrderedDict()
+        self.in_use: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self.name_locks: Dict[str, threading.Lock] = {}
+        self.evictions = 0
+    
+    @classmethod
+    def validate_name(cls, name: str):
+        """
+        Check a collection name
+        
+        Raises:
+            ValueError: If the name is not 1-64 letters, digits, '-' or '_'
+        """
+        if not isinstance(name, str) or not cls.NAME_PATTERN.match(name):
+            raise ValueError("Collection names must be 1-64 letters, digits, '-' or '_'")
+    
+    def store_path(self, name: str) -> str:
+        """Index directory of a collection"""
+        if name == self.DEFAULT and self.default_store_path:
+            return self.default_store_path
+        return os.path.join(self.root_path, name)
+    
+    def upload_folder(self, name: str) -> str:
+        """Upload folder of a collection"""
+        if name == self.DEFAULT and self.default_upload_folder:
+            return self.default_upload_folder
+        return os.path.join(self.upload_root, name)
+    
+    def names(self) -> List[str]:
+        """Names of all collections on disk, plus the default collection"""
+        names = {self.DEFAULT}
+        for root in (self.root_path, self.upload_root):
+            if os.path.isdir(root):
+                names.update(
+                    name for name in os.listdir(root)
+                    if self.NAME_PATTERN.match(name) and os.path.isdir(os.path.join(root, name))
+                )
+        return sorted(names)
+    
+    def exists(self, name: str) -> bool:
+        """Whether a collection has an index or upload folder"""
+        return name == self.DEFAULT or name in self.loaded or \
+            os.path.isdir(self.store_path(name)) or os.path.isdir(self.upload_folder(name))
+    
+    def _name_lock(self, name: str) -> threading.Lock:
+        """Lock serializing loading and deleting one collection"""
+        with self.lock:
+            return self.name_locks.setdefault(name, threading.Lock())
+    
+    def acquire(self, name: str) -> Collection:
+        """
+        Load a collection if needed and keep it from being evicted or
+        closed until release() is called
+        
+        Args:
+            name: Collection name
+            
+        Returns:
+            The loaded collection
+        """
+        self.validate_name(name)
+        
+        with self._name_lock(name):
+            # Look up and pin in one step, so an eviction cannot close it in between
+            with self.lock:
+                collection = self.loaded.get(name)
+                if collection is not None:
+                    self.loaded.move_to_end(name)
+                    self.in_use[name] = self.in_use.get(name, 0) + 1
+                    return collection
+            
+            # Load outside the manager lock so other collections stay usable
+            store_path = self.store_path(name)
+            upload_folder = self.upload_folder(name)
+            os.makedirs(upload_folder, exist_ok=True)
+            collection = self.loader(name, store_path, upload_folder)
+            logger.info(f"Loaded collection {name}")
+            
+            with self.lock:
+                self.loaded[name] = collection
+                self.in_use[name] = self.in_use.get(name, 0) + 1
+            return collection
+    
+    def release(self, name: str):
+        """
+        Unpin a collection returned by acquire(), closing it if it is
+        evicted now that nothing uses it
+        
+        Args:
+            name: Collection name
+        """
+        with self.lock:
+            self.in_use[name] -= 1
+        self._evict()
+    
+    @contextmanager
+    def use(self, name: str) -> Iterator[Collection]:
+        """
+        Load a collection if needed and keep it from being evicted while in use
+        
+        Args:
+            name: Collection name
+            
+        Yields:
+            The loaded collection
+        """
+        collection = self.acquire(name)
+        try:
+            yield collection
+        finally:
+            self.release(name)
+    
+    def memory_bytes(self) -> int:
+        """Estimated index memory of all loaded collections"""
+        with self.lock:
+            return sum(collection.memory_bytes() for collection in self.loaded.values())
+    
+    def _evict(self):
+        """Unload and close least recently used collections not in use until within the limits"""
+        evicted = []
+        with self.lock:
+            for name in list(self.loaded):
+                over_count = self.max_loaded and len(self.loaded) > self.max_loaded
+                over_memory = self.memory_budget and self.memory_bytes() > self.memory_budget
+                if not (over_count or over_memory):
+                    break
+                if self.in_use.get(name):
+                    continue
+                
+                # Indexers save before returning, so an idle collection has nothing unsaved
+                evicted.append((name, self.loaded.pop(name)))
+                self.evictions += 1
+        
+        # Nothing holds an evicted collection, so it can be closed outside the lock
+        for name, collection in evicted:
+            collection.close()
+            logger.info(f"Unloaded collection {name}")
+    
+    def delete(self, name: str) -> bool:
+        """
+        Delete a collection's index and uploaded files
+        
+        Args:
+            name: Collection name (the default collection cannot be deleted)
+            
+        Returns:
+            True if the collection existed
+            
+        Raises:
+            ValueError: If the name is invalid or the default collection
+            RuntimeError: If the collection is in use
+        """
+        self.validate_name(name)
+        if name == self.DEFAULT:
+            raise ValueError("The default collection cannot be deleted, clear it instead")
+        
+        # Holding the name lock keeps the collection from being loaded meanwhile
+        with self._name_lock(name):
+            with self.lock:
+                if self.in_use.get(name):
+                    raise RuntimeError(f"Collection {name} is in use")
+                
+                existed = self.exists(name)
+                collection = self.loaded.pop(name, None)
+            
+            # Close the index before removing its files
+            if collection is not None:
+                collection.close()
+            
+            for path in (self.store_path(name), self.upload_folder(name)):
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+        
+        if existed:
+            logger.info(f"Deleted collection {name}")
+        return existed
+    
+    def get_stats(self) -> Dict:
+        """Get loaded collection statistics"""
+        with self.lock:
+            return {
+                'collections': len(self.names()),
+                'loaded': list(self.loaded),
+                'max_loaded': self.max_loaded,
+                'memory_bytes': self.memory_bytes(),
+                'memory_budget': self.memory_budget,
+                'evictions': self.evictions
+            }
\ No newline at end of file
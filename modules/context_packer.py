@@ -0,0 +1,259 @@
+"""
+Context Packer Module
+Fits retrieved chunks into the LLM prompt's token budget
+"""
+
+import math
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+from transformers import AutoTokenizer
+
+from .chunk_store import ChunkStore
+from .text_chunker import TextChunker
+
+logger = logging.getLogger(__name__)
+
+
+class ContextPacker:
+    """Pack retrieved chunks into a token budget, counted with the LLM's tokenizer"""
+    
+    # Characters per token assumed without a tokenizer (few enough to overestimate English text)
+    CHARS_PER_TOKEN = 3.5
+    
+    # Marks sentences left out of a trimmed chunk
+    GAP = ' … '
+    
+    TERM_PATTERN = re.compile(r'[\w§]+')
+    
+    # Terms match on their first letters, so "terminate" matches "termination"
+    STEM_LENGTH = 6
+    
+    # Query words that say nothing about which sentences are relevant
+    STOP_WORDS = ChunkStore.STOP_WORDS
+    
+    def __init__(self, tokenizer=None, max_tokens: int = 0):
+        """
+        Initialize context packer
+        
+        Args:
+            tokenizer: HuggingFace tokenizer of the LLM (None to estimate tokens from characters)
+            max_tokens: Token budget of the context (0 for no limit)
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+    
+    @classmethod
+    def load(cls, tokenizer_name: Optional[str], max_tokens: int = 0) -> 'ContextPacker':
+        """
+        Create a context packer with a tokenizer from the HuggingFace hub
+        
+        Args:
+            tokenizer_name: Tokenizer matching the LLM (None or empty to estimate tokens)
+            max_tokens: Token budget of the context (0 for no limit)
+            
+        Returns:
+            Context packer, estimating tokens if the tokenizer cannot be loaded
+        """
+        tokenizer = None
+        if tokenizer_name:
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+                logger.info(f"Counting context tokens with {tokenizer_name}")
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer {tokenizer_name}, estimating context tokens: {str(e)}")
+        return cls(tokenizer, max_tokens)
+    
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens of several texts in one tokenizer call
+        
+        Args:
+            texts: Texts to count
+            
+        Returns:
+            Token count of each text, without special tokens
+        """
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [math.ceil(len(text) / self.CHARS_PER_TOKEN) for text in texts]
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False, verbose=False)['input_ids']]
+    
+    @staticmethod
+    def _position(metadata: Dict, end: bool = False) -> Optional[Tuple[int, int]]:
+        """(page, offset in the page) where a chunk starts or ends, or None without offsets"""
+        offset = metadata.get('char_end' if end else 'char_start')
+        if offset is None:
+            return None
+        page = metadata.get('page') or 0
+        return ((metadata.get('page_end') or page) if end else page, offset)
+    
+    @classmethod
+    def _unique_span(cls, doc: Dict, kept: List[Dict]) -> Optional[Tuple[int, int]]:
+        """
+        Find the part of a chunk's text that better-ranked chunks do not contain
+        
+        Neighbouring chunks of a document repeat a few clauses, so a chunk
+        whose start or end lies inside a kept chunk of the same source loses
+        that part. Only cuts within the chunk's first or last page can be
+        mapped to its text; chunks indexed without offsets are kept whole.
+        
+        Args:
+            doc: Chunk with text and metadata
+            kept: Chunks already in the context in full
+            
+        Returns:
+            (start, end) offsets into the chunk's text, or None if all of it is repeated
+        """
+        text = doc.get('text', '')
+        metadata = doc.get('metadata', {})
+        start, end = 0, len(text)
+        begin, finish = cls._position(metadata), cls._position(metadata, end=True)
+        if begin is None or finish is None:
+            return start, end
+        
+        for other in kept:
+            other_metadata = other.get('metadata', {})
+            if other_metadata.get('source') != metadata.get('source'):
+                continue
+            other_begin, other_finish = cls._position(other_metadata), cls._position(other_metadata, end=True)
+            if other_begin is None or other_finish is None or other_finish <= begin or other_begin >= finish:
+                continue
+            
+            if other_begin <= begin and other_finish >= finish:
+                return None
+            if other_begin <= begin and other_finish[0] == begin[0]:
+                start = max(start, other_finish[1] - begin[1])
+            elif other_finish >= finish and other_begin[0] == finish[0]:
+                end = min(end, len(text) - (finish[1] - other_begin[1]))
+        
+        start, end = TextChunker.trim(text, start, min(end, len(text)))
+        return (start, end) if start < end else None
+    
+    def _terms(self, text: str) -> Set[str]:
+        """Stemmed content words of a text"""
+        return {
+            term[:self.STEM_LENGTH] for term in self.TERM_PATTERN.findall(text.lower())
+            if term not in self.STOP_WORDS
+        }
+    
+    def pack(self, query: str, documents: List[Dict],
+             label: Callable[[int, Dict], str]) -> Tuple[str, List[int], Dict]:
+        """
+        Pack chunks into the token budget, best-ranked first
+        
+        Parts of a chunk already in the context (the overlap with a
+        neighbouring chunk packed whole, or a packed sentence) are dropped,
+        so text cut from a trimmed chunk is not lost from later ones.
+        Chunks are then added whole while they fit. A chunk that does not
+        fit is trimmed to its sentences sharing the most query terms,
+        weighted by how rare each term is among the retrieved sentences,
+        and kept in reading order with gaps marked. Chunks with nothing
+        left are left out, and smaller chunks further down may still fit.
+        
+        Args:
+            query: User query
+            documents: Retrieved chunks, best first
+            label: Builds the heading of the chunk at a 1-based context position
+            
+        Returns:
+            Tuple of (context string, indices of the packed chunks in context
+            order, token usage with budget, used, original and saved tokens
+            and the numbers of trimmed and dropped chunks)
+        """
+        labels = [label(idx, doc) for idx, doc in enumerate(documents, 1)]
+        texts = [doc.get('text', '') for doc in documents]
+        original = "\n".join(f"{heading}\n{text}\n" for heading, text in zip(labels, texts))
+        
+        # One tokenizer call counts every label and the gap marker
+        label_tokens = self.count_tokens([heading + '\n' for heading in labels] + [self.GAP])
+        gap_tokens = label_tokens.pop()
+        
+        # Rare query terms count for more, so a defined term outweighs a common word
+        query_terms = self._terms(query)
+        frequency = {}
+        total = 0
+        for text in texts:
+            for start, end in TextChunker.sentence_spans(text):
+                total += 1
+                for term in self._terms(text[start:end]) & query_terms:
+                    frequency[term] = frequency.get(term, 0) + 1
+        weights = {term: math.log(1 + total / count) for term, count in frequency.items()}
+        
+        remaining = self.max_tokens or math.inf
+        packed = []
+        complete = []
+        seen = set()
+        trimmed = 0
+        for i, (doc, text) in enumerate(zip(documents, texts)):
+            # Labels and the line break after each chunk count against the budget
+            cost = label_tokens[i] + 1
+            if cost >= remaining:
+                continue
+            
+            span = self._unique_span(doc, complete)
+            if span is None:
+                continue
+            
+            # Sentences outside the repeated parts, as (position in the chunk's sentences, start, end)
+            parts = []
+            keys = []
+            for position, (start, end) in enumerate(TextChunker.sentence_spans(text[span[0]:span[1]])):
+                start, end = span[0] + start, span[0] + end
+                key = ' '.join(self.TERM_PATTERN.findall(text[start:end].lower()))
+                if key and (key in seen or key in keys):
+                    continue
+                parts.append((position, start, end))
+                keys.append(key)
+            if not parts:
+                continue
+            
+            sentence_tokens = self.count_tokens([text[start:end] for _, start, end in parts])
+            gaps = sum(1 for a, b in zip(parts, parts[1:]) if b[0] != a[0] + 1)
+            whole = cost + sum(sentence_tokens) + gaps * gap_tokens
+            if whole <= remaining:
+                chosen = list(range(len(parts)))
+                remaining -= whole
+                complete.append(doc)
+            else:
+                sentence_terms = [self._terms(text[start:end]) & query_terms for _, start, end in parts]
+                ranked = sorted(
+                    range(len(parts)),
+                    key=lambda j: (-sum(weights[term] for term in sentence_terms[j]), j)
+                )
+                chosen = []
+                for j in ranked:
+                    if cost + sentence_tokens[j] + gap_tokens <= remaining:
+                        chosen.append(j)
+                        cost += sentence_tokens[j] + gap_tokens
+                if not chosen:
+                    continue
+                chosen.sort()
+                remaining -= cost
+                trimmed += 1
+            seen.update(keys[j] for j in chosen if keys[j])
+            
+            # Consecutive sentences keep the text between them, skipped ones become a gap
+            body = text[parts[chosen[0]][1]:parts[chosen[0]][2]]
+            for previous, j in zip(chosen, chosen[1:]):
+                if parts[j][0] == parts[previous][0] + 1:
+                    body += text[parts[previous][2]:parts[j][2]]
+                else:
+                    body += self.GAP + text[parts[j][1]:parts[j][2]]
+            packed.append((i, body))
+        
+        context = "\n".join(f"{label(idx, documents[i])}\n{body}\n" for idx, (i, body) in enumerate(packed, 1))
+        used, original_tokens = self.count_tokens([context, original])
+        
+        usage = {
+            'budget': self.max_tokens,
+            'used': used,
+            'original': original_tokens,
+            'saved': max(original_tokens - used, 0),
+            'trimmed': trimmed,
+            'dropped': len(documents) - len(packed),
+            'estimated': self.tokenizer is None
+        }
+        return context, [i for i, _ in packed], usage
\ No newline at end of file
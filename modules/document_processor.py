@@ -4,7 +4,9 @@ Handles PDF, DOCX, and TXT file processing
 """
 
 import os
-from typing import List, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterator, Optional
 from PyPDF2 import PdfReader
 from docx import Document
 import logging
@@ -49,6 +51,36 @@ class DocumentProcessor:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise
     
+    @staticmethod
+    def extract_pdf_page_range(file_path: str, start: int, end: int) -> List[Dict[str, any]]:
+        """
+        Extract text from a range of PDF pages (runs in worker processes)
+        
+        Args:
+            file_path: Path to PDF file
+            start: First page index (0-based, inclusive)
+            end: Last page index (0-based, exclusive)
+            
+        Returns:
+            List of dictionaries containing page text and metadata
+        """
+        reader = PdfReader(file_path)
+        documents = []
+        
+        for page_num in range(start, end):
+            text = reader.pages[page_num].extract_text()
+            if text.strip():
+                documents.append({
+                    'text': text,
+                    'metadata': {
+                        'source': os.path.basename(file_path),
+                        'page': page_num + 1,
+                        'type': 'pdf'
+                    }
+                })
+        
+        return documents
+    
     @staticmethod
     def extract_text_from_docx(file_path: str) -> List[Dict[str, any]]:
         """
@@ -131,38 +163,104 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file format: {ext}")
     
-    @staticmethod
-    def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[str]:
+    @classmethod
+    def _extraction_tasks(cls, file_paths: List[str], pages_per_task: int) -> List[tuple]:
         """
-        Split text into overlapping chunks
+        Split files into extraction tasks, large PDFs by page range
         
         Args:
-            text: Text to chunk
-            chunk_size: Maximum chunk size
-            chunk_overlap: Overlap between chunks
+            file_paths: Paths to document files
+            pages_per_task: Maximum PDF pages per task
             
         Returns:
-            List of text chunks
+            List of (file_index, function, args) tuples in document order
         """
-        chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            # Try to break at sentence boundary
-            if end < text_length:
-                last_period = chunk.rfind('.')
-                last_newline = chunk.rfind('\n')
-                break_point = max(last_period, last_newline)
+        tasks = []
+        
+        for file_index, file_path in enumerate(file_paths):
+            if file_path.lower().endswith('.pdf'):
+                try:
+                    page_count = len(PdfReader(file_path).pages)
+                except Exception:
+                    # Let the extraction task surface the error for this file
+                    page_count = 0
                 
-                if break_point > chunk_size * 0.5:  # At least 50% of chunk size
-                    chunk = chunk[:break_point + 1]
-                    end = start + break_point + 1
+                if page_count > pages_per_task:
+                    for start in range(0, page_count, pages_per_task):
+                        end = min(start + pages_per_task, page_count)
+                        tasks.append((file_index, cls.extract_pdf_page_range, (file_path, start, end)))
+                    continue
+            
+            tasks.append((file_index, cls.process_document, (file_path,)))
+        
+        return tasks
+    
+    @classmethod
+    def iter_extracted(cls, file_paths: List[str], max_workers: Optional[int] = None,
+                       pages_per_task: int = 25) -> Iterator[Dict[str, any]]:
+        """
+        Extract documents across a process pool, yielding results in order
+        
+        Files (and page ranges of large PDFs) are extracted in parallel, but
+        results are yielded in document and page order. At most twice the
+        number of workers tasks are in flight, and large PDFs are always
+        split into page ranges, so memory stays bounded.
+        
+        Args:
+            file_paths: Paths to document files
+            max_workers: Number of worker processes (1 extracts in-process)
+            pages_per_task: Maximum PDF pages per task
             
-            chunks.append(chunk.strip())
-            start = end - chunk_overlap
+        Yields:
+            Dictionaries with file_path, documents and error keys.
+            A file may yield several results, which are consecutive.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        tasks = cls._extraction_tasks(file_paths, pages_per_task)
+        failed = set()
         
-        return [c for c in chunks if c]  # Remove empty chunks
\ No newline at end of file
+        def result(file_index, documents, error=None):
+            return {
+                'file_path': file_paths[file_index],
+                'documents': documents,
+                'error': error
+            }
+        
+        if max_workers <= 1 or len(tasks) <= 1:
+            for file_index, func, args in tasks:
+                try:
+                    yield result(file_index, func(*args))
+                except Exception as e:
+                    yield result(file_index, [], str(e))
+            return
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            task_iter = iter(tasks)
+            
+            def submit_next():
+                for file_index, func, args in task_iter:
+                    if file_index not in failed:
+                        pending.append((file_index, pool.submit(func, *args)))
+                        return
+            
+            for _ in range(max_workers * 2):
+                submit_next()
+            
+            while pending:
+                file_index, future = pending.popleft()
+                submit_next()
+                
+                if file_index in failed:
+                    future.cancel()
+                    continue
+                
+                try:
+                    documents = future.result()
+                except Exception as e:
+                    logger.error(f"Error extracting {file_paths[file_index]}: {str(e)}")
+                    failed.add(file_index)
+                    yield result(file_index, [], str(e))
+                    continue
+                
+                yield result(file_index, documents)
\ No newline at end of file
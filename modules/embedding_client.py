@@ -0,0 +1,99 @@
+"""
+Embedding Client Module
+Requests embeddings from a shared embedding server over HTTP or a unix socket
+"""
+
+import http.client
+import json
+import socket
+import threading
+from typing import Dict, List
+from urllib.parse import urlparse
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a unix domain socket"""
+    
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class EmbeddingClient:
+    """Client for embedding_server.py, keeping one connection per thread"""
+    
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        Initialize embedding client
+        
+        Args:
+            url: Server URL, http://host:port or unix:///path/to/socket
+            timeout: Seconds per request
+        """
+        self.url = url
+        self.timeout = timeout
+        self.local = threading.local()
+        
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'unix'):
+            raise ValueError(f"Unsupported embedding server URL: {url}")
+        self.parsed = parsed
+    
+    def _connection(self) -> http.client.HTTPConnection:
+        """Connection of the current thread, opened on first use"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            if self.parsed.scheme == 'unix':
+                conn = UnixHTTPConnection(self.parsed.path, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(self.parsed.hostname, self.parsed.port or 80, timeout=self.timeout)
+            self.local.conn = conn
+        return conn
+    
+    def _request(self, method: str, path: str, body: bytes = None):
+        """Send a request, reconnecting once if the kept-alive connection was closed"""
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException, OSError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+        
+        if response.status != 200:
+            raise RuntimeError(f"Embedding server error {response.status}: {data.decode('utf-8', 'replace')}")
+        return response, data
+    
+    def info(self) -> Dict:
+        """Get the server's model name, embedding dimension and batching statistics"""
+        _, data = self._request('GET', '/info')
+        return json.loads(data)
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts on the server
+        
+        Args:
+            texts: Texts to encode
+            
+        Returns:
+            Numpy array of embeddings, one row per text
+        """
+        response, data = self._request('POST', '/embed', json.dumps({'texts': list(texts)}).encode('utf-8'))
+        rows, dimension = (int(n) for n in response.getheader('X-Embedding-Shape').split(','))
+        return np.frombuffer(data, dtype='float32').reshape(rows, dimension)
\ No newline at end of file
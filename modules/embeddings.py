@@ -4,24 +4,52 @@ Handles document embeddings using HuggingFace models
 """
 
 from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
 import numpy as np
-from typing import List
+from typing import List, Optional
 import logging
+import time
 import torch
 
+from .embedding_client import EmbeddingClient
+from .query_cache import QueryEmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingGenerator:
     """Generate embeddings using HuggingFace sentence transformers"""
     
-    def __init__(self, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                 cache: Optional[QueryEmbeddingCache] = None, server_url: Optional[str] = None):
         """
         Initialize embedding model
         
         Args:
             model_name: HuggingFace model name
+            cache: Cache for single-text (query) embeddings
+            server_url: Shared embedding server to use instead of loading the model
+                (http://host:port or unix:///path/to/socket). Only the tokenizer
+                is loaded, to count chunk tokens.
         """
+        self.cache = cache
+        self.model = None
+        self.client = None
+        
+        if server_url:
+            self.client = EmbeddingClient(server_url)
+            info = self.client.info()
+            
+            # Cached and indexed embeddings must come from the same model
+            if info['model'] != model_name:
+                raise ValueError(f"Embedding server at {server_url} serves {info['model']}, expected {model_name}")
+            
+            self.embedding_dimension = info['dimension']
+            self.max_seq_length = info['max_seq_length']
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            logger.info(f"Using embedding server at {server_url}. Embedding dimension: {self.embedding_dimension}")
+            return
+        
         logger.info(f"Loading embedding model: {model_name}")
         
         # Optimize for M1 Mac
@@ -30,16 +58,23 @@ class EmbeddingGenerator:
         
         self.model = SentenceTransformer(model_name, device=device)
         self.embedding_dimension = self.model.get_sentence_embedding_dimension()
+        self.max_seq_length = self.model.max_seq_length
+        
+        # Separate from the model's tokenizer, whose truncation settings change on
+        # every encode; a fast tokenizer must not be reconfigured while another thread uses it
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         
         logger.info(f"Model loaded. Embedding dimension: {self.embedding_dimension}")
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    def generate_embeddings(self, texts: List[str], batch_size: int = 32,
+                            show_progress_bar: bool = True) -> np.ndarray:
         """
         Generate embeddings for a list of texts
         
         Args:
             texts: List of text strings
             batch_size: Batch size for processing
+            show_progress_bar: Show a progress bar while encoding
             
         Returns:
             Numpy array of embeddings
@@ -47,12 +82,16 @@ class EmbeddingGenerator:
         try:
             logger.info(f"Generating embeddings for {len(texts)} texts")
             
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            )
+            if self.client is not None:
+                # The server batches on its own
+                embeddings = self.client.encode(texts)
+            else:
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress_bar,
+                    convert_to_numpy=True
+                )
             
             logger.info(f"Generated embeddings with shape: {embeddings.shape}")
             return embeddings
@@ -61,9 +100,25 @@ class EmbeddingGenerator:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
     
+    def warm_up(self) -> float:
+        """
+        Run throwaway encodes so one-time costs (kernel selection, buffer
+        allocation) are paid before the first request
+        
+        Returns:
+            Seconds spent warming up
+        """
+        started = time.time()
+        self.generate_embeddings(['warm-up'], show_progress_bar=False)
+        self.generate_embeddings(['warm-up ' * 200] * 8, batch_size=8, show_progress_bar=False)
+        
+        elapsed = time.time() - started
+        logger.info(f"Embedding model warmed up in {elapsed:.2f}s")
+        return elapsed
+    
     def generate_embedding(self, text: str) -> np.ndarray:
         """
-        Generate embedding for a single text
+        Generate embedding for a single text, using the cache if configured
         
         Args:
             text: Text string
@@ -71,4 +126,40 @@ class EmbeddingGenerator:
         Returns:
             Numpy array embedding
         """
-        return self.model.encode([text], convert_to_numpy=True)[0]
\ No newline at end of file
+        return self.generate_query_embeddings([text])[0]
+    
+    def generate_query_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for queries, encoding cache misses in one batch
+        
+        Args:
+            texts: List of query strings
+            
+        Returns:
+            Numpy array of embeddings, one row per query
+        """
+        if self.cache is None:
+            return self._encode(texts)
+        
+        embeddings = [self.cache.get(text) for text in texts]
+        
+        # Repeated queries in the batch are encoded once
+        normalized = [self.cache.normalize(text) for text in texts]
+        missing = list(dict.fromkeys(norm for norm, embedding in zip(normalized, embeddings) if embedding is None))
+        
+        if missing:
+            encoded = dict(zip(missing, self._encode(missing)))
+            for text, embedding in encoded.items():
+                self.cache.put(text, embedding)
+            embeddings = [
+                encoded[norm] if embedding is None else embedding
+                for norm, embedding in zip(normalized, embeddings)
+            ]
+        
+        return np.vstack(embeddings)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode queries with the local model or the embedding server"""
+        if self.client is not None:
+            return self.client.encode(texts)
+        return self.model.encode(texts, convert_to_numpy=True)
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Index Factory Module
+Builds and inspects FAISS indexes of the supported types
+"""
+
+import faiss
+import numpy as np
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IndexFactory:
+    """Create FAISS indexes (flat, IVF-Flat, IVF-PQ, HNSW) from settings"""
+    
+    FLAT = 'flat'
+    IVF_FLAT = 'ivf_flat'
+    IVF_PQ = 'ivf_pq'
+    HNSW = 'hnsw'
+    INDEX_TYPES = (FLAT, IVF_FLAT, IVF_PQ, HNSW)
+    
+    # FAISS recommends at least 39 training points per centroid
+    TRAINING_POINTS_PER_CENTROID = 39
+    PQ_NBITS = 8
+    
+    def __init__(self, index_type: str = 'flat', nlist: int = 1024, pq_m: int = 48,
+                 hnsw_m: int = 32, ef_construction: int = 200):
+        """
+        Initialize index factory
+        
+        Args:
+            index_type: One of flat, ivf_flat, ivf_pq, hnsw
+            nlist: Number of IVF partitions
+            pq_m: Number of PQ sub-quantizers
+            hnsw_m: HNSW graph degree
+            ef_construction: HNSW build-time search depth
+        """
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+    
+    @property
+    def needs_training(self) -> bool:
+        """Whether the index type must be trained before use"""
+        return self.index_type in (self.IVF_FLAT, self.IVF_PQ)
+    
+    @property
+    def min_training_vectors(self) -> int:
+        """Number of vectors required before the index is trained"""
+        if not self.needs_training:
+            return 0
+        
+        centroids = self.nlist
+        if self.index_type == self.IVF_PQ:
+            centroids = max(centroids, 2 ** self.PQ_NBITS)
+        
+        return centroids * self.TRAINING_POINTS_PER_CENTROID
+    
+    def _pq_subquantizers(self, dimension: int) -> int:
+        """Largest number of sub-quantizers not above pq_m that divides the dimension"""
+        m = min(self.pq_m, dimension)
+        while dimension % m:
+            m -= 1
+        return m
+    
+    def build(self, dimension: int, metric: int = faiss.METRIC_L2,
+              training_vectors: Optional[np.ndarray] = None) -> faiss.Index:
+        """
+        Build an empty index
+        
+        Index types that need training fall back to a flat index until
+        enough training vectors are supplied.
+        
+        Args:
+            dimension: Embedding dimension
+            metric: FAISS metric type
+            training_vectors: Vectors used to train IVF indexes
+            
+        Returns:
+            FAISS index (trained, but without vectors)
+        """
+        if self.index_type == self.HNSW:
+            return faiss.IndexHNSWFlat(dimension, self.hnsw_m, metric)
+        
+        if not self.needs_training or training_vectors is None or \
+                len(training_vectors) < self.min_training_vectors:
+            return faiss.IndexFlat(dimension, metric)
+        
+        quantizer = faiss.IndexFlat(dimension, metric)
+        if self.index_type == self.IVF_FLAT:
+            index = faiss.IndexIVFFlat(quantizer, dimension, self.nlist, metric)
+        else:
+            m = self._pq_subquantizers(dimension)
+            index = faiss.IndexIVFPQ(quantizer, dimension, self.nlist, m, self.PQ_NBITS, metric)
+        
+        logger.info(f"Training {self.index_type} index on {len(training_vectors)} vectors")
+        index.train(np.ascontiguousarray(training_vectors, dtype='float32'))
+        return index
+    
+    def configure(self, index: faiss.Index):
+        """Apply build-time settings that are not persisted by FAISS"""
+        index = IndexFactory.base_index(index)
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efConstruction = self.ef_construction
+    
+    @staticmethod
+    def with_ids(index: faiss.Index) -> faiss.Index:
+        """
+        Make an empty index addressable by chunk id
+        
+        IVF indexes store ids natively and use a hash table to reconstruct
+        vectors by id. Flat and HNSW indexes are wrapped in IndexIDMap2.
+        
+        Args:
+            index: Empty FAISS index
+            
+        Returns:
+            Index supporting add_with_ids and reconstruct by id
+        """
+        if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+            faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+            return index
+        return faiss.IndexIDMap2(index)
+    
+    @staticmethod
+    def is_id_mapped(index: faiss.Index) -> bool:
+        """Whether the index is addressed by chunk id rather than position"""
+        index = faiss.downcast_index(index)
+        return isinstance(index, (faiss.IndexIDMap, faiss.IndexIVF))
+    
+    @staticmethod
+    def base_index(index: faiss.Index) -> faiss.Index:
+        """Unwrap an IndexIDMap to the index it wraps"""
+        index = faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexIDMap):
+            index = faiss.downcast_index(index.index)
+        return index
+    
+    @staticmethod
+    def memory_bytes(index: faiss.Index) -> int:
+        """
+        Estimate the memory held by an index
+        
+        Counts vector codes, ids, IVF centroids and base-layer HNSW links,
+        which dominate for large indexes.
+        """
+        base = IndexFactory.base_index(index)
+        per_vector = 8 if IndexFactory.is_id_mapped(index) else 0
+        
+        if isinstance(base, faiss.IndexHNSW):
+            per_vector += faiss.downcast_index(base.storage).code_size + base.hnsw.nb_neighbors(0) * 4
+            return base.ntotal * per_vector
+        
+        total = base.ntotal * (per_vector + base.code_size)
+        if isinstance(base, faiss.IndexIVF):
+            total += base.quantizer.ntotal * base.d * 4
+        return total
+    
+    @staticmethod
+    def supports_removal(index: faiss.Index) -> bool:
+        """Whether vectors can be removed in place (HNSW graphs cannot)"""
+        return not isinstance(IndexFactory.base_index(index), faiss.IndexHNSW)
+    
+    @staticmethod
+    def index_type_of(index: faiss.Index) -> str:
+        """
+        Get the type name of an index
+        
+        Args:
+            index: FAISS index
+            
+        Returns:
+            One of flat, ivf_flat, ivf_pq, hnsw
+        """
+        index = IndexFactory.base_index(index)
+        
+        if isinstance(index, faiss.IndexHNSW):
+            return IndexFactory.HNSW
+        if isinstance(index, faiss.IndexIVFPQ):
+            return IndexFactory.IVF_PQ
+        if isinstance(index, faiss.IndexIVF):
+            return IndexFactory.IVF_FLAT
+        return IndexFactory.FLAT
+    
+    @staticmethod
+    def search_parameters(index: faiss.Index, nprobe: Optional[int] = None,
+                          ef_search: Optional[int] = None,
+                          selector: Optional[faiss.IDSelector] = None) -> Optional[faiss.SearchParameters]:
+        """
+        Build per-query search parameters for an index
+        
+        Args:
+            index: FAISS index
+            nprobe: IVF partitions to visit
+            ef_search: HNSW search depth
+            selector: Restricts the search to the selected ids
+            
+        Returns:
+            Search parameters, or None when defaults apply
+        """
+        index_type = IndexFactory.index_type_of(index)
+        
+        if index_type == IndexFactory.HNSW and (ef_search or selector):
+            params = faiss.SearchParametersHNSW(efSearch=ef_search) if ef_search else faiss.SearchParametersHNSW()
+        elif index_type in (IndexFactory.IVF_FLAT, IndexFactory.IVF_PQ) and (nprobe or selector):
+            params = faiss.SearchParametersIVF(nprobe=nprobe) if nprobe else faiss.SearchParametersIVF()
+        elif selector is not None:
+            params = faiss.SearchParameters()
+        else:
+            return None
+        
+        if selector is not None:
+            params.sel = selector
+        return params
+    
+    @staticmethod
+    def get_ids(index: faiss.Index) -> np.ndarray:
+        """
+        Get the ids of all vectors in an index
+        
+        Args:
+            index: FAISS index
+            
+        Returns:
+            Array of ids (positions for indexes that are not id-mapped)
+        """
+        index = faiss.downcast_index(index)
+        
+        if isinstance(index, faiss.IndexIDMap):
+            return faiss.vector_to_array(index.id_map).astype('int64')
+        
+        if isinstance(index, faiss.IndexIVF):
+            invlists = index.invlists
+            ids = []
+            for list_no in range(index.nlist):
+                size = invlists.list_size(list_no)
+                if size:
+                    ids.append(faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy())
+            return np.concatenate(ids).astype('int64') if ids else np.zeros(0, dtype='int64')
+        
+        return np.arange(index.ntotal, dtype='int64')
+    
+    @staticmethod
+    def reconstruct_all(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get all vectors stored in an index with their ids
+        
+        IVF-PQ vectors are decoded from their codes, so they are
+        approximations. An index retrained on them quantizes them again,
+        so every rebuild from decoded vectors adds to the error.
+        
+        Args:
+            index: FAISS index
+            
+        Returns:
+            Tuple of (ids, vectors of shape (ntotal, dimension))
+        """
+        ids = IndexFactory.get_ids(index)
+        if index.ntotal == 0:
+            return ids, np.zeros((0, index.d), dtype='float32')
+        
+        index = faiss.downcast_index(index)
+        
+        if isinstance(index, faiss.IndexIDMap):
+            # The wrapped index holds vectors in the same order as id_map
+            return ids, IndexFactory.reconstruct_all(index.index)[1]
+        
+        if isinstance(index, faiss.IndexIVF):
+            if index.direct_map.type == faiss.DirectMap.NoMap:
+                index.make_direct_map()
+            if index.direct_map.type == faiss.DirectMap.Array:
+                return ids, index.reconstruct_n(0, index.ntotal)
+            return ids, index.reconstruct_batch(ids)
+        
+        return ids, index.reconstruct_n(0, index.ntotal)
\ No newline at end of file
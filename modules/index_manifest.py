@@ -0,0 +1,150 @@
+"""
+Index Manifest Module
+Tracks indexed files by content hash for incremental indexing
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IndexManifest:
+    """Persistent record of indexed files keyed by content hash"""
+    
+    STATUS_NEW = 'new'
+    STATUS_CHANGED = 'changed'
+    STATUS_UNCHANGED = 'unchanged'
+    
+    def __init__(self, store_path: str):
+        """
+        Initialize index manifest
+        
+        Args:
+            store_path: Directory holding the manifest file
+        """
+        self.store_path = store_path
+        self.manifest_file = os.path.join(store_path, 'manifest.json')
+        self.entries: Dict[str, Dict] = {}
+        
+        if os.path.exists(self.manifest_file):
+            self.load()
+    
+    @staticmethod
+    def compute_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+        """
+        Compute SHA-256 of file contents
+        
+        Args:
+            file_path: Path to file
+            block_size: Read size in bytes
+            
+        Returns:
+            Hex digest of file contents
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def check(self, file_path: str) -> Tuple[str, Optional[str]]:
+        """
+        Determine whether a file needs indexing
+        
+        Size and mtime are compared first so unchanged files are skipped
+        without reading them. The content hash is only computed when the
+        fast path misses.
+        
+        Args:
+            file_path: Path to file
+            
+        Returns:
+            Tuple of (status, content_hash)
+        """
+        name = os.path.basename(file_path)
+        stat = os.stat(file_path)
+        entry = self.entries.get(name)
+        
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return self.STATUS_UNCHANGED, entry['hash']
+        
+        content_hash = self.compute_hash(file_path)
+        
+        if entry is None:
+            return self.STATUS_NEW, content_hash
+        
+        if entry['hash'] == content_hash:
+            # Touched but identical, refresh the fast path
+            entry['size'] = stat.st_size
+            entry['mtime'] = stat.st_mtime_ns
+            return self.STATUS_UNCHANGED, content_hash
+        
+        return self.STATUS_CHANGED, content_hash
+    
+    def record(self, file_path: str, content_hash: str, chunk_count: int):
+        """
+        Record a file as indexed
+        
+        Args:
+            file_path: Path to file
+            content_hash: Content hash returned by check()
+            chunk_count: Number of chunks stored for the file
+        """
+        stat = os.stat(file_path)
+        self.entries[os.path.basename(file_path)] = {
+            'hash': content_hash,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'chunks': chunk_count
+        }
+    
+    def remove(self, name: str):
+        """Forget an indexed file"""
+        self.entries.pop(name, None)
+    
+    def stale_entries(self, current_files: List[str]) -> List[str]:
+        """
+        Get indexed files that are no longer present
+        
+        Args:
+            current_files: File names currently available for indexing
+            
+        Returns:
+            List of file names to remove from the index
+        """
+        current = set(current_files)
+        return [name for name in self.entries if name not in current]
+    
+    def clear(self):
+        """Forget all indexed files"""
+        self.entries = {}
+    
+    def save(self):
+        """Save manifest to disk"""
+        try:
+            os.makedirs(self.store_path, exist_ok=True)
+            
+            tmp_file = f"{self.manifest_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_file, self.manifest_file)
+            
+        except Exception as e:
+            logger.error(f"Error saving index manifest: {str(e)}")
+            raise
+    
+    def load(self):
+        """Load manifest from disk"""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+            
+            logger.info(f"Index manifest loaded with {len(self.entries)} files")
+            
+        except Exception as e:
+            logger.error(f"Error loading index manifest: {str(e)}")
+            raise
\ No newline at end of file
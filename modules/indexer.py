@@ -0,0 +1,376 @@
+"""
+Indexer Module
+Runs the extraction, chunking and embedding pipeline into the vector store
+"""
+
+import os
+import queue
+import threading
+import time
+from itertools import groupby
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import logging
+
+from .document_processor import DocumentProcessor
+from .index_manifest import IndexManifest
+from .near_duplicates import NearDuplicateDetector
+from .text_chunker import TextChunker
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentIndexer:
+    """Index documents into a vector store, skipping unchanged files"""
+    
+    def __init__(self, embedding_generator, vector_store, manifest: IndexManifest, chunker: TextChunker,
+                 extraction_workers: int = 1, pages_per_task: int = 25,
+                 embedding_batch_size: int = 64, queue_size: int = 4,
+                 deduplicator: Optional[NearDuplicateDetector] = None):
+        """
+        Initialize indexer
+        
+        Args:
+            embedding_generator: Embedding generator instance
+            vector_store: Vector store instance
+            manifest: Manifest of already indexed files
+            chunker: Splits extracted text into chunks that fit the embedding model
+            extraction_workers: Processes used for text extraction
+            pages_per_task: PDF pages per extraction task
+            embedding_batch_size: Chunks embedded and stored per micro-batch
+            queue_size: Extracted page ranges buffered ahead of embedding
+            deduplicator: Detects repeated chunks; identical ones are stored once as
+                copies instead of embedded again (None to store every chunk)
+        """
+        self.embedding_generator = embedding_generator
+        self.vector_store = vector_store
+        self.manifest = manifest
+        self.chunker = chunker
+        self.extraction_workers = extraction_workers
+        self.pages_per_task = pages_per_task
+        self.embedding_batch_size = embedding_batch_size
+        self.queue_size = queue_size
+        self.deduplicator = deduplicator
+        
+        # Serializes writers to the vector store and manifest
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def _prefetch(items: Iterable, maxsize: int) -> Iterator:
+        """
+        Run an iterator in a background thread behind a bounded queue
+        
+        The producer blocks when the queue is full, so a slow consumer
+        applies backpressure instead of letting extracted text pile up.
+        
+        Args:
+            items: Iterable to consume in the background
+            maxsize: Maximum number of buffered items
+            
+        Yields:
+            Items in their original order
+        """
+        buffer = queue.Queue(maxsize=maxsize)
+        stop = threading.Event()
+        
+        def put(entry) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for item in items:
+                    if not put(('item', item)):
+                        return
+                put(('done', None))
+            except Exception as e:
+                put(('error', e))
+            finally:
+                close = getattr(items, 'close', None)
+                if close is not None:
+                    close()
+        
+        producer = threading.Thread(target=produce, name='index-prefetch', daemon=True)
+        producer.start()
+        
+        try:
+            while True:
+                kind, value = buffer.get()
+                if kind == 'done':
+                    return
+                if kind == 'error':
+                    raise value
+                yield value
+        finally:
+            stop.set()
+    
+    def _embed_and_add(self, chunks: List[Dict]) -> List[int]:
+        """Embed chunks and add them to the vector store"""
+        embeddings = self.embedding_generator.generate_embeddings(
+            [chunk['text'] for chunk in chunks],
+            batch_size=self.embedding_batch_size,
+            show_progress_bar=False
+        )
+        return self.vector_store.add_documents(embeddings, chunks)
+    
+    def _store_batch(self, chunks: List[Dict]) -> int:
+        """
+        Store a micro-batch of chunks, embedding only those not already stored
+        
+        Chunks whose text equals a stored chunk, or an earlier chunk of the
+        batch, are recorded as copies of it. Near-identical chunks (such as
+        clauses that differ in an amount or a date) are stored with their own
+        text and only collapsed in search results.
+        
+        Args:
+            chunks: Dictionaries with text and metadata
+            
+        Returns:
+            Number of chunks stored as copies
+        """
+        if self.deduplicator is None:
+            self._embed_and_add(chunks)
+            return 0
+        
+        for chunk in chunks:
+            chunk['fingerprint'] = self.deduplicator.fingerprint(chunk['text'])
+            chunk['content_hash'] = self.deduplicator.content_hash(chunk['text'])
+        
+        matches = self.vector_store.find_duplicates(chunks)
+        
+        unique = []
+        repeated = []
+        batch_hashes = set()
+        for chunk, match in zip(chunks, matches):
+            if match is not None:
+                continue
+            if chunk['content_hash'] in batch_hashes:
+                repeated.append(chunk)
+            else:
+                batch_hashes.add(chunk['content_hash'])
+                unique.append(chunk)
+        
+        if unique:
+            self._embed_and_add(unique)
+        
+        copies = [(match, chunk) for chunk, match in zip(chunks, matches) if match is not None]
+        
+        # Repeats within the batch are matched against the store again, since
+        # a sharded store only matches copies within the shard of their source
+        if repeated:
+            repeated_matches = self.vector_store.find_duplicates(repeated)
+            copies.extend((match, chunk) for chunk, match in zip(repeated, repeated_matches) if match is not None)
+            
+            unmatched = [chunk for chunk, match in zip(repeated, repeated_matches) if match is None]
+            if unmatched:
+                self._embed_and_add(unmatched)
+        
+        if copies:
+            self.vector_store.add_duplicates([match for match, _ in copies], [chunk for _, chunk in copies])
+        return len(copies)
+    
+    @staticmethod
+    def _documents(items: Iterable[Dict]) -> Iterator[Dict]:
+        """Pages of a file's extraction results, raising the first extraction error"""
+        for item in items:
+            if item['error'] is not None:
+                raise RuntimeError(item['error'])
+            yield from item['documents']
+    
+    def index_files(self, file_paths: List[str],
+                    progress_callback: Optional[Callable[[Dict], None]] = None,
+                    prune: bool = True) -> Dict:
+        """
+        Index a set of files, replacing stale and changed ones
+        
+        Pages are chunked as they are extracted and chunks are embedded and
+        added to the vector store in fixed-size micro-batches, so memory is
+        bounded by the batch and queue sizes rather than the largest file.
+        
+        Args:
+            file_paths: Paths of all files that should be in the index
+            progress_callback: Called with a progress dictionary after each file
+            prune: Remove indexed files missing from file_paths
+            
+        Returns:
+            Dictionary with indexing results
+        """
+        with self.lock:
+            started = time.time()
+            names = [os.path.basename(path) for path in file_paths]
+            progress = {
+                'files_total': len(file_paths),
+                'files_done': 0,
+                'files': {name: {'status': 'pending', 'chunks': 0} for name in names},
+                'total_chunks': 0,
+                'duplicate_chunks': 0,
+                'elapsed': 0.0,
+                'chunks_per_sec': 0.0
+            }
+            
+            def report():
+                elapsed = time.time() - started
+                progress['elapsed'] = round(elapsed, 2)
+                progress['chunks_per_sec'] = round(progress['total_chunks'] / elapsed, 2) if elapsed > 0 else 0.0
+                if progress_callback is not None:
+                    progress_callback(progress)
+            
+            indexed_files = []
+            skipped_files = []
+            failed_files = []
+            removed_vectors = 0
+            
+            # Drop vectors of files that were deleted since the last run
+            for stale in self.manifest.stale_entries(names) if prune else []:
+                removed_vectors += self.vector_store.remove_source(stale)
+                self.manifest.remove(stale)
+            
+            # Find new and changed files
+            to_process = []
+            content_hashes = {}
+            
+            for file_path, name in zip(file_paths, names):
+                try:
+                    # Skip files whose content is already indexed
+                    status, content_hash = self.manifest.check(file_path)
+                except Exception as e:
+                    logger.error(f"Error checking {file_path}: {str(e)}")
+                    status, content_hash = None, None
+                    progress['files'][name].update({'status': 'failed', 'error': str(e)})
+                    failed_files.append(name)
+                    progress['files_done'] += 1
+                
+                if status == IndexManifest.STATUS_UNCHANGED:
+                    progress['files'][name]['status'] = 'skipped'
+                    skipped_files.append(name)
+                    progress['files_done'] += 1
+                elif status is not None:
+                    to_process.append(file_path)
+                    content_hashes[file_path] = content_hash
+            
+            report()
+            
+            # Sources with vectors from an earlier version or an interrupted run
+            existing_sources = self.vector_store.get_sources() if to_process else set()
+            
+            # Chunks waiting for the next micro-batch, and files whose last
+            # chunks are in it (recorded in the manifest once it is stored)
+            batch_texts = []
+            batch_metadata = []
+            completed = []
+            
+            def flush():
+                if batch_texts:
+                    progress['duplicate_chunks'] += self._store_batch(list(batch_metadata))
+                    progress['total_chunks'] += len(batch_texts)
+                    batch_texts.clear()
+                    batch_metadata.clear()
+                
+                for file_path, chunk_count in completed:
+                    name = os.path.basename(file_path)
+                    self.manifest.record(file_path, content_hashes[file_path], chunk_count)
+                    progress['files'][name].update({'status': 'indexed', 'chunks': chunk_count})
+                    progress['files_done'] += 1
+                    indexed_files.append(name)
+                
+                if completed:
+                    completed.clear()
+                    report()
+            
+            # Extraction runs ahead in a background thread, bounded by the queue
+            extracted = DocumentProcessor.iter_extracted(
+                to_process,
+                max_workers=self.extraction_workers,
+                pages_per_task=self.pages_per_task
+            )
+            
+            # Results of one file are consecutive; a failed file's remaining results are skipped
+            results = self._prefetch(extracted, self.queue_size)
+            for file_path, items in groupby(results, key=lambda item: item['file_path']):
+                name = os.path.basename(file_path)
+                file_chunks = 0
+                progress['files'][name]['status'] = 'processing'
+                
+                # Replace vectors from a previous version of the file
+                if name in existing_sources:
+                    removed_vectors += self.vector_store.remove_source(name)
+                
+                try:
+                    # Pages of the file are chunked as one text, across page ranges
+                    for chunk in self.chunker.iter_chunks(self._documents(items)):
+                        batch_texts.append(chunk['text'])
+                        batch_metadata.append(chunk)
+                        file_chunks += 1
+                        
+                        if len(batch_texts) >= self.embedding_batch_size:
+                            flush()
+                            
+                except Exception as e:
+                    logger.error(f"Error indexing {file_path}: {str(e)}")
+                    
+                    # Roll back chunks of this file, whether pending or stored
+                    keep = [i for i, m in enumerate(batch_metadata) if m['metadata'].get('source') != name]
+                    batch_texts[:] = [batch_texts[i] for i in keep]
+                    batch_metadata[:] = [batch_metadata[i] for i in keep]
+                    self.vector_store.remove_source(name)
+                    
+                    progress['files'][name].update({'status': 'failed', 'error': str(e)})
+                    failed_files.append(name)
+                    progress['files_done'] += 1
+                    report()
+                    continue
+                
+                completed.append((file_path, file_chunks))
+            
+            flush()
+            
+            # Save vector store before the manifest so a crash re-indexes rather than loses files
+            if indexed_files or removed_vectors:
+                self.vector_store.save()
+            self.manifest.save()
+            
+            return {
+                'files': indexed_files,
+                'skipped_files': skipped_files,
+                'failed_files': failed_files,
+                'removed_vectors': removed_vectors,
+                'total_chunks': progress['total_chunks'],
+                'duplicate_chunks': progress['duplicate_chunks'],
+                'elapsed': progress['elapsed'],
+                'chunks_per_sec': progress['chunks_per_sec'],
+                'stats': self.vector_store.get_stats()
+            }
+    
+    def remove_document(self, name: str) -> int:
+        """
+        Remove a document from the index
+        
+        Args:
+            name: Source file name
+            
+        Returns:
+            Number of vectors removed
+        """
+        with self.lock:
+            removed = self.vector_store.remove_source(name)
+            indexed = name in self.manifest.entries
+            self.manifest.remove(name)
+            
+            if removed or indexed:
+                self.vector_store.save()
+                self.manifest.save()
+            
+            logger.info(f"Removed {name} from the index ({removed} vectors)")
+            return removed
+    
+    def clear(self):
+        """Clear the vector store and manifest"""
+        with self.lock:
+            self.vector_store.clear()
+            self.vector_store.save()
+            self.manifest.clear()
+            self.manifest.save()
\ No newline at end of file
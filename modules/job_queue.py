@@ -0,0 +1,253 @@
+"""
+Job Queue Module
+Runs background jobs from a SQLite-backed queue that survives restarts
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Persistent background job queue with a pool of worker threads
+    
+    Several processes (e.g. server workers) may share the job database. A job
+    runs in the process that claims it, and a running job is only resumed
+    elsewhere once the process that claimed it has exited.
+    """
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    
+    def __init__(self, db_path: str, handler: Callable[[Dict, Callable[[Dict], None]], Dict],
+                 workers: int = 1):
+        """
+        Initialize job queue
+        
+        Args:
+            db_path: Path to the SQLite job database
+            handler: Callable taking (payload, report_progress) and returning a result dict
+            workers: Number of worker threads
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.workers = workers
+        self.pending = queue.Queue()
+        self.threads = []
+        self.start_lock = threading.Lock()
+        
+        # Identifies this process; the boot id tells a dead pid from one reused after a reboot
+        self.owner = f"{self._boot_id()}:{os.getpid()}"
+        
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            if 'owner' not in columns:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+    
+    @staticmethod
+    def _boot_id() -> str:
+        """Id of the current boot of this machine (empty where unavailable)"""
+        try:
+            with open('/proc/sys/kernel/random/boot_id') as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+    
+    def _owner_alive(self, owner: Optional[str]) -> bool:
+        """Check whether the process that claimed a job is still running"""
+        if not owner:
+            return False
+        
+        boot_id, _, pid = owner.rpartition(':')
+        if boot_id != self._boot_id() or not pid.isdigit():
+            return False
+        
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+    
+    def start(self):
+        """Re-queue unfinished jobs and start worker threads"""
+        with self.start_lock:
+            if self.threads:
+                return
+            
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, status, owner FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                    (self.STATUS_QUEUED, self.STATUS_RUNNING)
+                ).fetchall()
+            
+            resumed = 0
+            for row in rows:
+                if row['status'] == self.STATUS_RUNNING:
+                    # Running jobs are only taken over from processes that have exited
+                    if self._owner_alive(row['owner']):
+                        continue
+                    with self.lock, self.conn:
+                        released = self.conn.execute(
+                            "UPDATE jobs SET status = ?, owner = NULL WHERE id = ? AND status = ? AND owner IS ?",
+                            (self.STATUS_QUEUED, row['id'], self.STATUS_RUNNING, row['owner'])
+                        ).rowcount
+                    if not released:
+                        continue
+                
+                # Another process may claim a queued job first; workers skip it then
+                self.pending.put(row['id'])
+                resumed += 1
+            
+            if resumed:
+                logger.info(f"Resuming {resumed} unfinished job(s)")
+            
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            
+            logger.info(f"Job queue started with {self.workers} worker(s)")
+    
+    def submit(self, payload: Dict) -> str:
+        """
+        Enqueue a job
+        
+        Args:
+            payload: JSON-serializable job arguments
+            
+        Returns:
+            Job id
+        """
+        job_id = uuid.uuid4().hex
+        
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, self.STATUS_QUEUED, json.dumps(payload), time.time())
+            )
+        
+        self.pending.put(job_id)
+        logger.info(f"Queued job {job_id}")
+        return job_id
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Get job status
+        
+        Args:
+            job_id: Job id
+            
+        Returns:
+            Job dictionary, or None if unknown
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        
+        if row is None:
+            return None
+        
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'progress': json.loads(row['progress']) if row['progress'] else None,
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+    
+    def _update(self, job_id: str, **fields):
+        """Update job columns"""
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+    
+    def _claim(self, job_id: str) -> Optional[Dict]:
+        """
+        Mark a queued job as running in this process
+        
+        Args:
+            job_id: Job id
+            
+        Returns:
+            Job payload, or None if the job is unknown or another worker claimed it
+        """
+        with self.lock, self.conn:
+            claimed = self.conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ? WHERE id = ? AND status = ?",
+                (self.STATUS_RUNNING, self.owner, time.time(), job_id, self.STATUS_QUEUED)
+            ).rowcount
+            if not claimed:
+                return None
+            row = self.conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        
+        return json.loads(row['payload'])
+    
+    def _worker(self):
+        """Worker loop"""
+        while True:
+            job_id = self.pending.get()
+            
+            try:
+                payload = self._claim(job_id)
+                if payload is None:
+                    continue
+                
+                logger.info(f"Running job {job_id}")
+                
+                def report(progress: Dict, job_id=job_id):
+                    self._update(job_id, progress=json.dumps(progress))
+                
+                result = self.handler(payload, report)
+                
+                self._update(
+                    job_id,
+                    status=self.STATUS_COMPLETED,
+                    result=json.dumps(result),
+                    finished_at=time.time()
+                )
+                logger.info(f"Job {job_id} completed")
+                
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                self._update(job_id, status=self.STATUS_FAILED, error=str(e), finished_at=time.time())
+                
+            finally:
+                self.pending.task_done()
\ No newline at end of file
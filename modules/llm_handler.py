@@ -3,9 +3,11 @@ LLM Handler Module
 Handles Groq API interactions for answer generation
 """
 
-from groq import Groq
+from groq import AsyncGroq, Groq
+import asyncio
 import logging
-from typing import Dict, List
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -13,18 +15,38 @@ logger = logging.getLogger(__name__)
 class LLMHandler:
     """Handle LLM operations using Groq API"""
     
-    def __init__(self, api_key: str, model: str = 'mixtral-8x7b-32768'):
+    # Bump when the system prompt or _build_prompt changes, so cached answers are not reused
+    PROMPT_VERSION = '3'
+    
+    def __init__(self, api_key: str, model: str = 'mixtral-8x7b-32768', client=None,
+                 async_client=None, base_url: Optional[str] = None, max_concurrency: int = 16,
+                 queue_timeout: float = 10.0, timeout: float = 60.0):
         """
         Initialize LLM handler
         
         Args:
             api_key: Groq API key
             model: Model name to use
+            client: Chat completions client to use instead of Groq (e.g. a local stub)
+            async_client: Async chat completions client to use instead of AsyncGroq
+            base_url: Groq API base URL (e.g. a proxy or local mock server)
+            max_concurrency: Maximum concurrent upstream calls on the async path
+            queue_timeout: Seconds an async call waits for a free slot
+            timeout: Seconds per upstream call
         """
         try:
             # Initialize Groq client without proxies parameter
-            self.client = Groq(api_key=api_key)
+            self.client = client or Groq(api_key=api_key, base_url=base_url, timeout=timeout)
+            self.async_client = async_client or AsyncGroq(api_key=api_key, base_url=base_url, timeout=timeout)
             self.model = model
+            self.max_concurrency = max_concurrency
+            self.queue_timeout = queue_timeout
+            
+            # Created on first use so it binds to the serving event loop
+            self._semaphore = None
+            self.in_flight = 0
+            self.waiting = 0
+            self.rejected = 0
             logger.info(f"LLM Handler initialized with model: {model}")
         except Exception as e:
             logger.error(f"Error initializing Groq client: {str(e)}")
@@ -47,26 +69,7 @@ class LLMHandler:
             prompt = self._build_prompt(query, context)
             
             # Call Groq API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a legal AI assistant specializing in analyzing legal documents. 
-                        Provide accurate, well-reasoned answers based on the provided context. 
-                        If the context doesn't contain enough information, clearly state that.
-                        Always maintain a professional tone suitable for legal professionals.
-                        Cite specific documents when making claims."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=1024,
-                top_p=0.9
-            )
+            response = self._create_completion(prompt)
             
             answer = response.choices[0].message.content
             
@@ -88,6 +91,206 @@ class LLMHandler:
                 'success': False
             }
     
+    def stream_answer(self, query: str, context: str) -> Iterator[str]:
+        """
+        Generate answer using RAG, yielding text as the model produces it
+        
+        Args:
+            query: User query
+            context: Retrieved context
+            
+        Yields:
+            Answer text fragments
+        """
+        try:
+            prompt = self._build_prompt(query, context)
+            
+            for chunk in self._create_completion(prompt, stream=True):
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    yield text
+            
+            logger.info("Successfully streamed answer")
+            
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            raise
+    
+    def _abandon(self, acquire: asyncio.Future):
+        """Stop waiting for a slot, releasing it if it was or still gets acquired"""
+        acquire.cancel()
+        acquire.add_done_callback(self._return_permit)
+    
+    def _return_permit(self, acquire: asyncio.Future):
+        """Release the slot of an abandoned acquire if it got one"""
+        if not acquire.cancelled() and acquire.exception() is None:
+            self._semaphore.release()
+    
+    @asynccontextmanager
+    async def _upstream_slot(self):
+        """
+        Hold one of max_concurrency upstream slots
+        
+        Raises:
+            TimeoutError: If no slot frees up within queue_timeout
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # wait_for can lose a permit granted as it times out, so the acquire runs as its own
+        # task, and a permit granted to a caller that timed out or was cancelled is handed back
+        self.waiting += 1
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait({acquire}, timeout=self.queue_timeout)
+        except BaseException:
+            self._abandon(acquire)
+            raise
+        finally:
+            self.waiting -= 1
+        
+        if not acquire.done():
+            self._abandon(acquire)
+            self.rejected += 1
+            raise TimeoutError(f"LLM is busy: no slot free within {self.queue_timeout}s")
+        
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+    
+    async def agenerate_answer(self, query: str, context: str, sources: List[Dict]) -> Dict:
+        """
+        Generate answer using RAG without blocking the event loop
+        
+        Args:
+            query: User query
+            context: Retrieved context
+            sources: Source documents
+            
+        Returns:
+            Dictionary with answer and metadata
+            
+        Raises:
+            TimeoutError: If the call waited longer than queue_timeout for a slot
+        """
+        async with self._upstream_slot():
+            try:
+                prompt = self._build_prompt(query, context)
+                response = await self.async_client.chat.completions.create(**self._completion_args(prompt))
+                
+                answer = response.choices[0].message.content
+                
+                logger.info("Successfully generated answer")
+                
+                return {
+                    'answer': answer,
+                    'sources': sources,
+                    'model': self.model,
+                    'success': True
+                }
+                
+            except Exception as e:
+                logger.error(f"Error generating answer: {str(e)}")
+                return {
+                    'answer': f"Error generating answer: {str(e)}",
+                    'sources': [],
+                    'model': self.model,
+                    'success': False
+                }
+    
+    async def astream_answer(self, query: str, context: str) -> AsyncIterator[str]:
+        """
+        Generate answer using RAG, yielding text as the model produces it
+        without blocking the event loop
+        
+        Args:
+            query: User query
+            context: Retrieved context
+            
+        Yields:
+            Answer text fragments
+            
+        Raises:
+            TimeoutError: If the call waited longer than queue_timeout for a slot
+        """
+        async with self._upstream_slot():
+            try:
+                prompt = self._build_prompt(query, context)
+                stream = await self.async_client.chat.completions.create(**self._completion_args(prompt, stream=True))
+                
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        yield text
+                
+                logger.info("Successfully streamed answer")
+                
+            except Exception as e:
+                logger.error(f"Error streaming answer: {str(e)}")
+                raise
+    
+    def get_stats(self) -> Dict:
+        """Get upstream concurrency statistics for the async path"""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'rejected': self.rejected
+        }
+    
+    def _create_completion(self, prompt: str, stream: bool = False):
+        """
+        Call the chat completions API with the RAG system prompt
+        
+        Args:
+            prompt: User prompt
+            stream: Return an iterator of chunks instead of the full completion
+            
+        Returns:
+            Completion response, or chunk iterator when streaming
+        """
+        return self.client.chat.completions.create(**self._completion_args(prompt, stream=stream))
+    
+    def _completion_args(self, prompt: str, stream: bool = False) -> Dict:
+        """
+        Build chat completion arguments with the RAG system prompt
+        
+        Args:
+            prompt: User prompt
+            stream: Request a stream of chunks
+            
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        return dict(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are a legal AI assistant specializing in analyzing legal documents. 
+                        Provide accurate, well-reasoned answers based on the provided context. 
+                        If the context doesn't contain enough information, clearly state that.
+                        Always maintain a professional tone suitable for legal professionals.
+                        Cite specific documents when making claims."""
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.3,
+            max_tokens=1024,
+            top_p=0.9,
+            stream=stream
+        )
+    
     def _build_prompt(self, query: str, context: str) -> str:
         """
         Build RAG prompt
@@ -0,0 +1,122 @@
+"""
+Micro Batcher Module
+Coalesces concurrent encode requests into batches with a bounded wait
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """Texts waiting to be encoded and the caller waiting for them"""
+    
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Run an encode function on batches gathered from many callers"""
+    
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch_size: int = 64,
+                 max_wait: float = 0.005):
+        """
+        Initialize micro batcher
+        
+        Args:
+            encode: Function encoding a list of texts into one row per text
+            max_batch_size: Texts after which a batch is encoded without waiting further
+            max_wait: Seconds the first request of a batch waits for others to join
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self.lock = threading.Lock()
+        
+        self.thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.thread.start()
+    
+    def submit(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts as part of the next batch
+        
+        Args:
+            texts: Texts to encode
+            
+        Returns:
+            Numpy array of embeddings, one row per text
+        """
+        request = _Request(list(texts))
+        self.pending.put(request)
+        request.done.wait()
+        
+        if request.error is not None:
+            raise request.error
+        return request.result
+    
+    def _collect(self) -> List[_Request]:
+        """Wait for one request, then gather others until the batch is full or the deadline passes"""
+        batch = [self.pending.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        
+        return batch
+    
+    def _run(self):
+        """Encode batches until the process exits"""
+        while True:
+            batch = self._collect()
+            texts = [text for request in batch for text in request.texts]
+            
+            try:
+                embeddings = self.encode(texts)
+                
+                offset = 0
+                for request in batch:
+                    request.result = embeddings[offset:offset + len(request.texts)]
+                    offset += len(request.texts)
+                    
+            except Exception as e:
+                logger.error(f"Error encoding batch of {len(texts)} texts: {str(e)}")
+                for request in batch:
+                    request.error = e
+            
+            with self.lock:
+                self.batches += 1
+                self.texts += len(texts)
+            
+            for request in batch:
+                request.done.set()
+    
+    def get_stats(self) -> Dict:
+        """Get batching statistics"""
+        with self.lock:
+            return {
+                'batches': self.batches,
+                'texts': self.texts,
+                'avg_batch_size': round(self.texts / self.batches, 2) if self.batches else 0.0,
+                'queued': self.pending.qsize()
+            }
\ No newline at end of file
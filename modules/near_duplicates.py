@@ -0,0 +1,92 @@
+"""
+Near-Duplicate Detection Module
+Content hashes for storing repeated chunks once, and SimHash fingerprints for
+collapsing near-identical results (boilerplate clauses, definitions, signature blocks)
+"""
+
+import hashlib
+import re
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NearDuplicateDetector:
+    """Exact content hashes, and SimHash fingerprints of word shingles compared by Hamming distance"""
+    
+    BITS = 64
+    
+    WORD_PATTERN = re.compile(r'[\w§]+')
+    SPACE_PATTERN = re.compile(r'\s+')
+    
+    def __init__(self, max_distance: int = 3, shingle_size: int = 3):
+        """
+        Initialize detector
+        
+        Args:
+            max_distance: Bits two fingerprints may differ by and still be collapsed
+            shingle_size: Words per shingle
+        """
+        if not 0 <= max_distance <= self.BITS:
+            raise ValueError(f"max_distance must be between 0 and {self.BITS}")
+        
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+    
+    @classmethod
+    def content_hash(cls, text: str) -> str:
+        """
+        Hash a text for exact matching
+        
+        Only runs of whitespace are normalized, so texts that differ in any
+        word, number or punctuation mark get different hashes. Only chunks
+        with equal hashes are stored as copies of each other.
+        
+        Args:
+            text: Chunk text
+            
+        Returns:
+            Hex digest of the normalized text
+        """
+        normalized = cls.SPACE_PATTERN.sub(' ', text).strip()
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def fingerprint(self, text: str) -> int:
+        """
+        Compute the SimHash of a text
+        
+        Case, punctuation and whitespace are ignored. Texts that differ in a
+        few words (such as an amount or a date) get nearby fingerprints, so
+        fingerprints are only used to collapse search results, never to
+        decide which text is stored.
+        
+        Args:
+            text: Chunk text
+            
+        Returns:
+            Signed 64-bit fingerprint (storable as an SQLite integer)
+        """
+        words = self.WORD_PATTERN.findall(text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = [' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))]
+        
+        hashes = np.frombuffer(
+            b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles),
+            dtype=np.uint8
+        )
+        
+        # Each bit is set if most shingle hashes have it set
+        votes = np.unpackbits(hashes).reshape(len(shingles), self.BITS).sum(axis=0)
+        bits = np.packbits(votes * 2 > len(shingles))
+        return int.from_bytes(bits.tobytes(), 'big', signed=True)
+    
+    @staticmethod
+    def distance(first: int, second: int) -> int:
+        """Number of differing bits between two fingerprints"""
+        return bin((first ^ second) & 0xFFFFFFFFFFFFFFFF).count('1')
+    
+    def is_duplicate(self, first: int, second: int) -> bool:
+        """Check whether two fingerprints are within max_distance"""
+        return self.distance(first, second) <= self.max_distance
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Query Cache Module
+Caches query embeddings in memory with an optional SQLite tier on disk
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query text to embedding"""
+    
+    def __init__(self, model_name: str, max_entries: int = 1024,
+                 disk_path: Optional[str] = None, disk_max_entries: int = 100000):
+        """
+        Initialize query embedding cache
+        
+        Args:
+            model_name: Embedding model name, part of every key
+            max_entries: Embeddings kept in memory
+            disk_path: Path to a SQLite file that persists embeddings across restarts (disabled if None)
+            disk_max_entries: Embeddings kept on disk before the least recently used are pruned
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        # Serializes the disk tier separately, so slow writes never block memory hits
+        self.disk_lock = threading.Lock()
+        # Rows allowed over disk_max_entries before a prune, so pruning runs in batches
+        self.disk_slack = max(1, disk_max_entries // 10)
+        self._disk_rows = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        # Opened per process, so a cache created before a fork is safe in each worker
+        self._conn = None
+        self._conn_pid = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or '.', exist_ok=True)
+            # Create the table up front, so a bad path fails at startup
+            self.conn
+    
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """Disk tier connection of the current process, or None if disabled"""
+        if not self.disk_path:
+            return None
+        
+        if self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used ON query_embeddings(last_used)"
+            )
+            self._conn.commit()
+            self._disk_rows = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        
+        return self._conn
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize query text so trivially different phrasings share an entry"""
+        return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).strip()
+    
+    def _key(self, text: str) -> str:
+        """Cache key for a query under the current model"""
+        return hashlib.sha256(f"{self.model_name}\0{self.normalize(text)}".encode('utf-8')).hexdigest()
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up a query embedding
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        key = self._key(text)
+        
+        with self.lock:
+            embedding = self.entries.get(key)
+            if embedding is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+        
+        if self.disk_path:
+            with self.disk_lock:
+                row = self.conn.execute(
+                    "SELECT embedding FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE query_embeddings SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self.conn.commit()
+            
+            if row is not None:
+                embedding = np.frombuffer(row[0], dtype='float32')
+                with self.lock:
+                    self._remember(key, embedding)
+                    self.disk_hits += 1
+                return embedding
+        
+        with self.lock:
+            self.misses += 1
+        return None
+    
+    def put(self, text: str, embedding: np.ndarray):
+        """
+        Store a query embedding
+        
+        Args:
+            text: Query text
+            embedding: Embedding of the query
+        """
+        key = self._key(text)
+        embedding = np.ascontiguousarray(embedding, dtype='float32')
+        # Cached arrays are shared between callers
+        embedding.setflags(write=False)
+        
+        with self.lock:
+            self._remember(key, embedding)
+        
+        if not self.disk_path:
+            return
+        
+        with self.disk_lock:
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                    (key, embedding.tobytes(), time.time())
+                )
+                # Counts replaced keys too, so the exact count is taken before pruning
+                self._disk_rows += 1
+                if self._disk_rows > self.disk_max_entries + self.disk_slack:
+                    self._prune()
+                self.conn.commit()
+            except sqlite3.Error as e:
+                # The disk tier is best effort; the memory tier still has the entry
+                logger.warning(f"Error writing query cache: {str(e)}")
+    
+    def _prune(self):
+        """Delete the least recently used disk rows over disk_max_entries (caller holds disk_lock)"""
+        self._disk_rows = self.conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        excess = self._disk_rows - self.disk_max_entries
+        if excess <= 0:
+            return
+        
+        self.conn.execute(
+            "DELETE FROM query_embeddings WHERE key IN ("
+            "SELECT key FROM query_embeddings ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._disk_rows -= excess
+    
+    def _remember(self, key: str, embedding: np.ndarray):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self.entries[key] = embedding
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all cached embeddings"""
+        with self.lock:
+            self.entries.clear()
+        
+        if self.disk_path:
+            with self.disk_lock:
+                self.conn.execute("DELETE FROM query_embeddings")
+                self.conn.commit()
+                self._disk_rows = 0
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+        
+        if self.disk_path:
+            with self.disk_lock:
+                stats['disk_entries'] = self.conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        return stats
\ No newline at end of file
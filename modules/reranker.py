@@ -0,0 +1,143 @@
+"""
+Reranker Module
+Re-scores retrieval candidates with a cross-encoder within a time budget
+"""
+
+from sentence_transformers import CrossEncoder
+import math
+import threading
+import time
+from typing import Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Re-rank retrieval candidates with a small cross-encoder on the CPU"""
+    
+    def __init__(self, model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2', batch_size: int = 16,
+                 time_budget: float = 0.4, max_length: int = 512, model=None):
+        """
+        Initialize reranker
+        
+        Args:
+            model_name: HuggingFace cross-encoder scoring (query, passage) pairs
+            batch_size: Pairs scored per forward pass; the time budget is checked between batches
+            time_budget: Seconds re-ranking may take per query (0 for no limit)
+            max_length: Maximum tokens per (query, passage) pair
+            model: Cross-encoder to use instead of loading model_name (e.g. a local stub)
+        """
+        try:
+            self.model = model or CrossEncoder(model_name, max_length=max_length, device='cpu')
+            self.model_name = model_name
+            self.batch_size = batch_size
+            self.time_budget = time_budget
+            
+            # The model's tokenizer is reconfigured on every call, so calls are serialized;
+            # concurrent calls would only compete for the same cores anyway
+            self.lock = threading.Lock()
+            
+            # Counters are updated together, so the stats never mix two queries
+            self.stats_lock = threading.Lock()
+            self.queries = 0
+            self.fallbacks = 0
+            self.pairs = 0
+            self.seconds = 0.0
+            logger.info(f"Reranker initialized with model: {model_name}")
+        except Exception as e:
+            logger.error(f"Error loading reranker model: {str(e)}")
+            raise
+    
+    def _score(self, query: str, candidates: List[Tuple[Dict, float]]) -> List[float]:
+        """Score one batch of candidates against the query"""
+        pairs = [(query, doc.get('text', '')) for doc, _ in candidates]
+        return self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False).tolist()
+    
+    def rerank(self, query: str, candidates: List[Tuple[Dict, float]]) -> List[Tuple[Dict, float]]:
+        """
+        Order candidates by cross-encoder score
+        
+        Candidates are scored in batches, in their first-stage order. A batch
+        is only started if it is expected to finish within the time budget,
+        which includes waiting for other queries' re-ranking; if the model is
+        not free before the deadline, nothing is scored. When the budget
+        runs out, the scored candidates are ordered among themselves and the
+        rest follow in their first-stage order, with their first-stage scores.
+        
+        Args:
+            query: User query
+            candidates: List of (document, score) tuples from the first stage, best first
+            
+        Returns:
+            List of (document, score) tuples, best first; re-ranked scores are
+            the cross-encoder's relevance probabilities
+        """
+        if not candidates:
+            return candidates
+        
+        started = time.perf_counter()
+        deadline = started + self.time_budget if self.time_budget > 0 else math.inf
+        scores = []
+        slowest = 0.0
+        
+        # Lock.acquire blocks without a limit on a timeout of -1
+        if self.lock.acquire(timeout=max(0.0, deadline - started) if deadline < math.inf else -1):
+            try:
+                for first in range(0, len(candidates), self.batch_size):
+                    batch_started = time.perf_counter()
+                    if batch_started + slowest > deadline:
+                        break
+                    scores.extend(self._score(query, candidates[first:first + self.batch_size]))
+                    slowest = max(slowest, time.perf_counter() - batch_started)
+                    
+            except Exception as e:
+                logger.error(f"Error re-ranking candidates, keeping first-stage order: {str(e)}")
+                scores = []
+            finally:
+                self.lock.release()
+        
+        # Sorting is stable, so ties keep their first-stage order
+        scored = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+        reranked = [(doc, float(score)) for (doc, _), score in scored] + candidates[len(scores):]
+        
+        elapsed = time.perf_counter() - started
+        with self.stats_lock:
+            self.queries += 1
+            self.pairs += len(scores)
+            self.seconds += elapsed
+            if len(scores) < len(candidates):
+                self.fallbacks += 1
+        
+        if len(scores) < len(candidates):
+            logger.info(f"Re-ranked {len(scores)} of {len(candidates)} candidates within "
+                        f"{self.time_budget * 1000:.0f} ms, the rest keep first-stage order")
+        
+        return reranked
+    
+    def warm_up(self) -> float:
+        """
+        Score a full batch once, so one-time costs are paid before the first request
+        
+        Returns:
+            Seconds spent warming up
+        """
+        started = time.time()
+        with self.lock:
+            self._score('warm-up', [({'text': 'warm-up ' * 200}, 0.0)] * self.batch_size)
+        
+        elapsed = time.time() - started
+        logger.info(f"Reranker warmed up in {elapsed:.2f}s")
+        return elapsed
+    
+    def get_stats(self) -> Dict:
+        """Get re-ranking statistics"""
+        with self.stats_lock:
+            return {
+                'model': self.model_name,
+                'time_budget_ms': round(self.time_budget * 1000),
+                'queries': self.queries,
+                'fallbacks': self.fallbacks,
+                'pairs_scored': self.pairs,
+                'avg_ms': round(self.seconds / self.queries * 1000, 1) if self.queries else 0.0
+            }
\ No newline at end of file
@@ -3,16 +3,27 @@ Retriever Module
 Handles document retrieval and context preparation
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import logging
 
+from .context_packer import ContextPacker
+from .near_duplicates import NearDuplicateDetector
+from .reranker import CrossEncoderReranker
+
 logger = logging.getLogger(__name__)
 
 
 class DocumentRetriever:
     """Retrieve relevant documents based on query"""
     
-    def __init__(self, vector_store, embedding_generator, top_k: int = 4, threshold: float = 0.5):
+    MODE_DENSE = 'dense'
+    MODE_HYBRID = 'hybrid'
+    
+    def __init__(self, vector_store, embedding_generator, top_k: int = 4, threshold: float = 0.5,
+                 mode: str = 'dense', candidates: int = 20, rrf_k: int = 60,
+                 deduplicator: Optional[NearDuplicateDetector] = None,
+                 packer: Optional[ContextPacker] = None,
+                 reranker: Optional[CrossEncoderReranker] = None, rerank_candidates: int = 50):
         """
         Initialize retriever
         
@@ -21,18 +32,36 @@ class DocumentRetriever:
             embedding_generator: Embedding generator instance
             top_k: Number of documents to retrieve
             threshold: Similarity threshold
+            mode: 'dense' (vector search) or 'hybrid' (vector and BM25 search fused)
+            candidates: Results taken from each search before fusion in hybrid mode
+            rrf_k: Reciprocal rank fusion constant
+            deduplicator: Collapses near-duplicate chunks into one result (None to keep all)
+            packer: Fits the context into the LLM's token budget (None for no limit)
+            reranker: Re-scores the first-stage candidates before the top_k are taken (None to skip)
+            rerank_candidates: Candidates passed to the reranker
         """
+        if mode not in (self.MODE_DENSE, self.MODE_HYBRID):
+            raise ValueError(f"Unsupported retrieval mode: {mode}")
+        
         self.vector_store = vector_store
         self.embedding_generator = embedding_generator
         self.top_k = top_k
         self.threshold = threshold
+        self.mode = mode
+        self.candidates = max(candidates, top_k)
+        self.rrf_k = rrf_k
+        self.deduplicator = deduplicator
+        self.packer = packer or ContextPacker()
+        self.reranker = reranker
+        self.rerank_candidates = max(rerank_candidates, top_k)
     
-    def retrieve(self, query: str) -> List[Tuple[Dict, float]]:
+    def retrieve(self, query: str, search_params: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
         """
         Retrieve relevant documents for query
         
         Args:
             query: User query
+            search_params: Optional search settings (nprobe, ef_search, filters)
             
         Returns:
             List of (document_data, similarity_score) tuples
@@ -41,11 +70,8 @@ class DocumentRetriever:
             # Generate query embedding
             query_embedding = self.embedding_generator.generate_embedding(query)
             
-            # Search vector store
-            results = self.vector_store.search(query_embedding, k=self.top_k)
-            
-            # Filter by threshold
-            filtered_results = [(doc, score) for doc, score in results if score >= self.threshold]
+            # Search vector store (and the text index in hybrid mode)
+            filtered_results = self._search([query], query_embedding.reshape(1, -1), search_params)[0]
             
             logger.info(f"Retrieved {len(filtered_results)} documents above threshold {self.threshold}")
             return filtered_results
@@ -54,38 +80,197 @@ class DocumentRetriever:
             logger.error(f"Error retrieving documents: {str(e)}")
             raise
     
-    def prepare_context(self, retrieved_docs: List[Tuple[Dict, float]]) -> Tuple[str, List[Dict]]:
+    def retrieve_batch(self, queries: List[str],
+                       search_params: Optional[Dict] = None) -> List[List[Tuple[Dict, float]]]:
+        """
+        Retrieve relevant documents for several queries with one embedding
+        call and one index search
+        
+        Args:
+            queries: User queries
+            search_params: Optional search settings (nprobe, ef_search, filters)
+            
+        Returns:
+            One list of (document_data, similarity_score) tuples per query
+        """
+        try:
+            query_embeddings = self.embedding_generator.generate_query_embeddings(queries)
+            
+            filtered_results = self._search(queries, query_embeddings, search_params)
+            
+            logger.info(f"Retrieved documents for {len(queries)} queries above threshold {self.threshold}")
+            return filtered_results
+            
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {str(e)}")
+            raise
+    
+    def _search(self, queries: List[str], query_embeddings,
+                search_params: Optional[Dict]) -> List[List[Tuple[Dict, float]]]:
+        """
+        Run the dense search for all queries, fusing in BM25 results in hybrid
+        mode and re-ranking the candidates if a reranker is set
+        
+        BM25 results are only fused into rows with a dense hit above the
+        threshold, so a query with nothing relevant still returns nothing.
+        """
+        hybrid = self.mode == self.MODE_HYBRID
+        candidates = max(self.candidates, self.rerank_candidates) if self.reranker else self.candidates
+        
+        # Collapsing duplicates and re-ranking need spare candidates to keep k results
+        results = self.vector_store.search_batch(
+            query_embeddings,
+            k=candidates if hybrid or self.deduplicator or self.reranker else self.top_k,
+            **(search_params or {})
+        )
+        
+        # Filter by threshold
+        dense = [[(doc, score) for doc, score in row if score >= self.threshold] for row in results]
+        
+        if hybrid:
+            filters = (search_params or {}).get('filters')
+            dense = [
+                self._fuse(row, self.vector_store.search_text(query, k=candidates, filters=filters)) if row else row
+                for query, row in zip(queries, dense)
+            ]
+        
+        rows = [self._collapse(row) for row in dense]
+        
+        if self.reranker is not None:
+            rows = [self.reranker.rerank(query, row[:self.rerank_candidates]) for query, row in zip(queries, rows)]
+        
+        return [row[:self.top_k] for row in rows]
+    
+    def _collapse(self, ranking: List[Tuple[Dict, float]]) -> List[Tuple[Dict, float]]:
+        """
+        Merge near-duplicate results into the best-ranked copy
+        
+        Copies stored separately (across shards, or indexed before
+        deduplication) are kept once, with the others' metadata added to
+        its duplicates. Near-identical results whose text differs (such as
+        the same clause with another amount) are added to its variants
+        instead, so they are not cited as containing the kept text.
+        
+        Args:
+            ranking: List of (document, score) tuples, best first
+            
+        Returns:
+            Ranking without near-duplicates
+        """
+        if self.deduplicator is None:
+            return ranking
+        
+        kept = []
+        fingerprints = []
+        
+        for doc, score in ranking:
+            fingerprint = doc.get('fingerprint')
+            if fingerprint is None:
+                fingerprint = self.deduplicator.fingerprint(doc.get('text', ''))
+            
+            for position, other in enumerate(fingerprints):
+                if self.deduplicator.is_duplicate(fingerprint, other):
+                    # Documents are shared between rows of a batch, so copy before merging
+                    best = dict(kept[position][0])
+                    copies = [doc['metadata']] + doc.get('duplicates', [])
+                    if doc.get('content_hash') is not None and doc.get('content_hash') == best.get('content_hash'):
+                        best['duplicates'] = best.get('duplicates', []) + copies
+                    else:
+                        best['variants'] = best.get('variants', []) + copies + doc.get('variants', [])
+                    kept[position] = (best, kept[position][1])
+                    break
+            else:
+                kept.append((doc, score))
+                fingerprints.append(fingerprint)
+        
+        return kept
+    
+    def _fuse(self, *rankings: List[Tuple[Dict, float]]) -> List[Tuple[Dict, float]]:
+        """
+        Combine rankings with reciprocal rank fusion
+        
+        Scores are normalized so a document ranked first by every search
+        scores 1.0.
+        
+        Args:
+            rankings: Lists of (document, score) tuples, best first
+            
+        Returns:
+            List of (document, fused_score) tuples, best first
+        """
+        scores = {}
+        documents = {}
+        
+        for ranking in rankings:
+            for rank, (doc, _) in enumerate(ranking, 1):
+                scores[doc['id']] = scores.get(doc['id'], 0.0) + 1.0 / (self.rrf_k + rank)
+                documents[doc['id']] = doc
+        
+        best = len(rankings) / (self.rrf_k + 1)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return [(documents[chunk_id], scores[chunk_id] / best) for chunk_id in ranked]
+    
+    @staticmethod
+    def _label(position: int, doc: Dict) -> str:
+        """Label a chunk with its location so answers can cite it"""
+        metadata = doc.get('metadata', {})
+        source = metadata.get('source', 'Unknown')
+        page = metadata.get('page')
+        page_end = metadata.get('page_end', page)
+        
+        if page is None:
+            location = source
+        elif page_end != page:
+            location = f"{source}, pages {page}-{page_end}"
+        else:
+            location = f"{source}, page {page}"
+        return f"[Document {position}: {location}]"
+    
+    def prepare_context(self, retrieved_docs: List[Tuple[Dict, float]],
+                        query: str = '') -> Tuple[str, List[Dict], Dict]:
         """
         Prepare context for LLM from retrieved documents
         
         Args:
             retrieved_docs: List of retrieved documents with scores
+            query: User query, used to keep the most relevant sentences of chunks that are trimmed
             
         Returns:
-            Tuple of (context_string, source_list)
+            Tuple of (context_string, source_list, token_usage), with a source per chunk in the context
         """
-        if not retrieved_docs:
-            return "", []
+        context, packed, usage = self.packer.pack(query, [doc for doc, _ in retrieved_docs], self._label)
         
-        context_parts = []
         sources = []
-        
-        for idx, (doc, score) in enumerate(retrieved_docs, 1):
-            text = doc.get('text', '')
+        for i in packed:
+            doc, score = retrieved_docs[i]
             metadata = doc.get('metadata', {})
+            page = metadata.get('page')
             
-            # Build context
-            context_parts.append(f"[Document {idx}]\n{text}\n")
-            
-            # Build source reference
+            # Build source reference; offsets are into the text of the first and last page
             sources.append({
                 'document': metadata.get('source', 'Unknown'),
-                'page': metadata.get('page'),
+                'page': page,
+                'page_end': metadata.get('page_end', page),
+                'char_start': metadata.get('char_start'),
+                'char_end': metadata.get('char_end'),
                 'relevance': round(score, 2),
-                'type': metadata.get('type', 'unknown')
+                'type': metadata.get('type', 'unknown'),
+                
+                # Other documents containing the same text, and near-identical text
+                'also_in': [
+                    {'document': copy.get('source', 'Unknown'), 'page': copy.get('page'),
+                     'page_end': copy.get('page_end', copy.get('page'))}
+                    for copy in doc.get('duplicates', [])
+                ],
+                'similar_in': [
+                    {'document': copy.get('source', 'Unknown'), 'page': copy.get('page'),
+                     'page_end': copy.get('page_end', copy.get('page'))}
+                    for copy in doc.get('variants', [])
+                ]
             })
         
-        context = "\n".join(context_parts)
-        logger.info(f"Prepared context with {len(retrieved_docs)} documents")
+        if retrieved_docs:
+            logger.info(f"Prepared context with {len(packed)} of {len(retrieved_docs)} documents "
+                        f"({usage['used']} tokens, {usage['saved']} saved)")
         
-        return context, sources
\ No newline at end of file
+        return context, sources, usage
\ No newline at end of file
@@ -0,0 +1,530 @@
+"""
+Sharded Store Module
+Splits the vector store into shards by source, searched in parallel
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import logging
+
+import numpy as np
+
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedVectorStore:
+    """Vector store made of independent per-source-hash VectorStore shards"""
+    
+    # Global chunk ids carry the shard number above the shard-local id
+    SHARD_ID_SHIFT = 40
+    
+    def __init__(self, embedding_dimension: int, store_path: str, num_shards: int = 4,
+                 max_loaded_shards: int = 0, idle_seconds: float = 0, search_workers: int = 4,
+                 **store_kwargs):
+        """
+        Initialize sharded vector store
+        
+        Args:
+            embedding_dimension: Dimension of embeddings
+            store_path: Directory holding one subdirectory per shard
+            num_shards: Number of shards (fixed once the store is created)
+            max_loaded_shards: Shards kept in memory at once (0 for no limit)
+            idle_seconds: Unload shards unused for this long (0 to keep them)
+            search_workers: Threads used to search shards in parallel
+            **store_kwargs: Arguments for each shard's VectorStore
+            
+        Raises:
+            ValueError: If store_path holds an unsharded store or another shard count
+        """
+        self.embedding_dimension = embedding_dimension
+        self.store_path = store_path
+        self.num_shards = num_shards
+        self.max_loaded_shards = max_loaded_shards
+        self.idle_seconds = idle_seconds
+        self.store_kwargs = store_kwargs
+        self.shards_file = os.path.join(store_path, 'shards.json')
+        
+        # Loaded shards in least recently used order, with use counts and dirty flags
+        self.shards: OrderedDict = OrderedDict()
+        self.last_used: Dict[int, float] = {}
+        self.in_use: Dict[int, int] = {}
+        self.dirty: Set[int] = set()
+        self.lock = threading.RLock()
+        self.shard_locks = [threading.Lock() for _ in range(num_shards)]
+        self.executor = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix='shard-search')
+        
+        # Vector counts and sources of every shard, so unloaded shards need not be opened
+        self.summary: Dict[int, Dict] = {}
+        self.version = 0
+        
+        if os.path.exists(self.shards_file):
+            self._load_summary()
+        elif any(os.path.exists(os.path.join(store_path, name))
+                 for name in ('faiss_index.bin', 'vectors.wal', 'chunks.db', 'metadata.pkl')):
+            # Its files would be ignored while the manifest still lists them as indexed
+            raise ValueError(
+                f"Store at {self.store_path} is not sharded, configured for {self.num_shards} shards; "
+                f"set VECTOR_STORE_SHARDS=1, or remove the directory to re-index into shards"
+            )
+        
+        logger.info(f"Sharded vector store initialized with {num_shards} shards and {self.ntotal} vectors")
+    
+    def _load_summary(self):
+        """Load shard summaries written by save()"""
+        with open(self.shards_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        if data['num_shards'] != self.num_shards:
+            raise ValueError(
+                f"Store at {self.store_path} has {data['num_shards']} shards, configured for {self.num_shards}"
+            )
+        
+        self.summary = {int(shard): entry for shard, entry in data['shards'].items()}
+    
+    def shard_for(self, source: str) -> int:
+        """Shard number holding a source document"""
+        return zlib.crc32(source.encode('utf-8')) % self.num_shards
+    
+    def _shard_path(self, shard: int) -> str:
+        """Directory of a shard"""
+        return os.path.join(self.store_path, f"shard-{shard:03d}")
+    
+    def _global_id(self, shard: int, chunk_id: int) -> int:
+        """Store-wide id of a shard-local chunk id"""
+        return (shard << self.SHARD_ID_SHIFT) | chunk_id
+    
+    def _split_id(self, global_id: int) -> Tuple[int, int]:
+        """Shard number and shard-local chunk id of a store-wide id"""
+        return global_id >> self.SHARD_ID_SHIFT, global_id & ((1 << self.SHARD_ID_SHIFT) - 1)
+    
+    @contextmanager
+    def _use(self, shard: int) -> Iterator[VectorStore]:
+        """
+        Load a shard if needed and keep it from being evicted while in use
+        
+        Args:
+            shard: Shard number
+            
+        Yields:
+            The shard's VectorStore
+        """
+        with self.shard_locks[shard]:
+            # Look up and pin in one step, so an eviction cannot close it in between
+            with self.lock:
+                store = self.shards.get(shard)
+                if store is not None:
+                    self.shards.move_to_end(shard)
+                    self.in_use[shard] = self.in_use.get(shard, 0) + 1
+                    self.last_used[shard] = time.time()
+            
+            if store is None:
+                # Load outside the store lock so other shards stay usable
+                store = VectorStore(self.embedding_dimension, self._shard_path(shard), **self.store_kwargs)
+                logger.info(f"Loaded shard {shard}")
+                
+                with self.lock:
+                    self.shards[shard] = store
+                    self.in_use[shard] = self.in_use.get(shard, 0) + 1
+                    self.last_used[shard] = time.time()
+        
+        try:
+            yield store
+        finally:
+            with self.lock:
+                self.in_use[shard] -= 1
+                self.last_used[shard] = time.time()
+            self._evict()
+    
+    def _evict(self):
+        """Unload idle or least recently used shards that are saved and not in use"""
+        with self.lock:
+            now = time.time()
+            evictable = [
+                shard for shard in self.shards
+                if not self.in_use.get(shard) and shard not in self.dirty
+            ]
+            
+            for shard in evictable:
+                over_limit = self.max_loaded_shards and len(self.shards) > self.max_loaded_shards
+                idle = self.idle_seconds and now - self.last_used.get(shard, now) > self.idle_seconds
+                if not (over_limit or idle):
+                    continue
+                
+                self.shards.pop(shard).close()
+                self.last_used.pop(shard, None)
+                logger.info(f"Unloaded shard {shard}")
+    
+    def _summarize(self, shard: int, store: VectorStore):
+        """Record a loaded shard's vector count and sources"""
+        self.summary[shard] = {'vectors': store.ntotal, 'sources': sorted(store.get_sources())}
+    
+    def _active_shards(self, filters: Optional[Dict] = None) -> List[int]:
+        """Shards that may hold matching vectors"""
+        shards = range(self.num_shards)
+        
+        # Source filters route to the shards of those sources only
+        sources = (filters or {}).get('source')
+        if sources is not None:
+            sources = [sources] if isinstance(sources, str) else sources
+            shards = sorted({self.shard_for(source) for source in sources})
+        
+        with self.lock:
+            return [shard for shard in shards if shard in self.shards or self.summary.get(shard, {}).get('vectors')]
+    
+    @property
+    def ntotal(self) -> int:
+        """Number of searchable vectors"""
+        with self.lock:
+            return sum(
+                self.shards[shard].ntotal if shard in self.shards else self.summary.get(shard, {}).get('vectors', 0)
+                for shard in range(self.num_shards)
+            )
+    
+    def memory_bytes(self) -> int:
+        """Estimated memory held by the loaded shards' indexes"""
+        with self.lock:
+            return sum(store.memory_bytes() for store in self.shards.values())
+    
+    def add_documents(self, embeddings: np.ndarray, metadata: List[Dict]) -> List[int]:
+        """
+        Add documents to the shards of their sources
+        
+        Args:
+            embeddings: Numpy array of embeddings
+            metadata: List of metadata dictionaries
+            
+        Returns:
+            Store-wide chunk ids assigned to the documents
+        """
+        try:
+            positions: Dict[int, List[int]] = {}
+            for position, doc in enumerate(metadata):
+                source = doc.get('metadata', {}).get('source', '')
+                positions.setdefault(self.shard_for(source), []).append(position)
+            
+            ids = [0] * len(metadata)
+            
+            for shard, shard_positions in positions.items():
+                with self._use(shard) as store:
+                    with self.lock:
+                        self.dirty.add(shard)
+                    
+                    shard_ids = store.add_documents(
+                        embeddings[shard_positions],
+                        [metadata[position] for position in shard_positions]
+                    )
+                
+                for position, chunk_id in zip(shard_positions, shard_ids):
+                    ids[position] = self._global_id(shard, chunk_id)
+            
+            self.version += 1
+            return ids
+            
+        except Exception as e:
+            logger.error(f"Error adding documents: {str(e)}")
+            raise
+    
+    def find_duplicates(self, documents: List[Dict]) -> List[Optional[int]]:
+        """
+        Find stored copies of documents in the shards of their sources
+        
+        Copies are only matched within a shard, so removing a source only
+        touches its own shard. Duplicates across shards are collapsed at
+        query time by the retriever.
+        
+        Args:
+            documents: Dictionaries with text, metadata and content hash
+            
+        Returns:
+            Store-wide chunk id of a stored chunk with the same content, or None, per document
+        """
+        positions: Dict[int, List[int]] = {}
+        for position, doc in enumerate(documents):
+            positions.setdefault(self.shard_for(doc.get('metadata', {}).get('source', '')), []).append(position)
+        
+        matches = [None] * len(documents)
+        
+        for shard, shard_positions in positions.items():
+            with self.lock:
+                known = shard in self.shards or shard in self.summary
+            if not known:
+                continue
+            
+            with self._use(shard) as store:
+                shard_matches = store.find_duplicates([documents[position] for position in shard_positions])
+            
+            for position, chunk_id in zip(shard_positions, shard_matches):
+                if chunk_id is not None:
+                    matches[position] = self._global_id(shard, chunk_id)
+        
+        return matches
+    
+    def add_duplicates(self, ids: List[int], documents: List[Dict]):
+        """
+        Record documents as copies of stored chunks in their shards
+        
+        Args:
+            ids: Store-wide chunk id of the stored copy per document (from find_duplicates)
+            documents: Dictionaries with text and metadata
+        """
+        by_shard: Dict[int, Tuple[List[int], List[Dict]]] = {}
+        for global_id, doc in zip(ids, documents):
+            shard, chunk_id = self._split_id(global_id)
+            shard_ids, shard_documents = by_shard.setdefault(shard, ([], []))
+            shard_ids.append(chunk_id)
+            shard_documents.append(doc)
+        
+        for shard, (shard_ids, shard_documents) in by_shard.items():
+            with self._use(shard) as store:
+                with self.lock:
+                    self.dirty.add(shard)
+                store.add_duplicates(shard_ids, shard_documents)
+        
+        self.version += 1
+    
+    def search(self, query_embedding: np.ndarray, k: int = 4, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None, filters: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """
+        Search for similar documents
+        
+        Args:
+            query_embedding: Query embedding vector
+            k: Number of results to return
+            nprobe: IVF partitions to visit (overrides the default)
+            ef_search: HNSW search depth (overrides the default)
+            filters: Metadata filters restricting the searched chunks
+            
+        Returns:
+            List of (document, similarity) tuples
+        """
+        return self.search_batch(
+            query_embedding.reshape(1, -1), k=k, nprobe=nprobe, ef_search=ef_search, filters=filters
+        )[0]
+    
+    def _fan_out(self, shards: List[int], search) -> List[Tuple[int, List]]:
+        """Run a search on each shard in parallel, returning (shard, result) pairs"""
+        def run(shard):
+            with self._use(shard) as store:
+                return shard, search(store)
+        
+        return list(self.executor.map(run, shards))
+    
+    def _merge(self, per_shard: List[Tuple[int, List[List[Tuple[Dict, float]]]]],
+               rows: int, k: int) -> List[List[Tuple[Dict, float]]]:
+        """Merge per-shard result rows into the global top-k, with store-wide ids"""
+        merged = []
+        for row in range(rows):
+            candidates = [
+                ({**doc, 'id': self._global_id(shard, doc['id'])}, score)
+                for shard, results in per_shard
+                for doc, score in results[row]
+            ]
+            candidates.sort(key=lambda result: result[1], reverse=True)
+            merged.append(candidates[:k])
+        return merged
+    
+    def search_batch(self, query_embeddings: np.ndarray, k: int = 4, nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None, filters: Optional[Dict] = None) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search all shards in parallel and merge their top-k
+        
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            k: Number of results to return per query
+            nprobe: IVF partitions to visit (overrides the default)
+            ef_search: HNSW search depth (overrides the default)
+            filters: Metadata filters restricting the searched chunks
+            
+        Returns:
+            One list of (document, similarity) tuples per query
+        """
+        try:
+            per_shard = self._fan_out(
+                self._active_shards(filters),
+                lambda store: store.search_batch(query_embeddings, k=k, nprobe=nprobe, ef_search=ef_search, filters=filters)
+            )
+            return self._merge(per_shard, len(query_embeddings), k)
+            
+        except Exception as e:
+            logger.error(f"Error searching sharded store: {str(e)}")
+            raise
+    
+    def search_text(self, query: str, k: int = 20, filters: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """
+        Search chunk text with each shard's BM25 index
+        
+        BM25 statistics are per shard, so scores are comparable only
+        approximately; with sources spread by hash the difference is small.
+        
+        Args:
+            query: Free-text query
+            k: Number of results to return
+            filters: Metadata filters restricting the searched chunks
+            
+        Returns:
+            List of (document, BM25 score) tuples, best first
+        """
+        try:
+            per_shard = self._fan_out(
+                self._active_shards(filters),
+                lambda store: [store.search_text(query, k=k, filters=filters)]
+            )
+            return self._merge(per_shard, 1, k)[0]
+            
+        except Exception as e:
+            logger.error(f"Error searching sharded store text: {str(e)}")
+            raise
+    
+    def delete_ids(self, ids: List[int]) -> int:
+        """
+        Delete vectors and chunks by store-wide chunk id
+        
+        Args:
+            ids: Store-wide chunk ids to delete
+            
+        Returns:
+            Number of vectors deleted
+        """
+        by_shard: Dict[int, List[int]] = {}
+        for global_id in ids:
+            shard, chunk_id = self._split_id(int(global_id))
+            by_shard.setdefault(shard, []).append(chunk_id)
+        
+        removed = 0
+        for shard, chunk_ids in by_shard.items():
+            with self._use(shard) as store:
+                with self.lock:
+                    self.dirty.add(shard)
+                removed += store.delete_ids(chunk_ids)
+        
+        self.version += 1
+        return removed
+    
+    def remove_source(self, source: str) -> int:
+        """
+        Remove all vectors belonging to a source document
+        
+        Args:
+            source: Source file name
+            
+        Returns:
+            Number of vectors removed
+        """
+        shard = self.shard_for(source)
+        with self.lock:
+            known = shard in self.shards or source in self.summary.get(shard, {}).get('sources', [])
+        
+        if not known:
+            return 0
+        
+        with self._use(shard) as store:
+            with self.lock:
+                self.dirty.add(shard)
+            version = store.version
+            removed = store.remove_source(source)
+            changed = store.version != version
+        
+        if changed:
+            self.version += 1
+        return removed
+    
+    def upsert_source(self, source: str, embeddings: np.ndarray, metadata: List[Dict]) -> Tuple[int, List[int]]:
+        """
+        Replace all vectors of a source document
+        
+        Args:
+            source: Source file name
+            embeddings: Numpy array of embeddings for the new version
+            metadata: List of metadata dictionaries for the new version
+            
+        Returns:
+            Tuple of (number of vectors removed, chunk ids added)
+        """
+        removed = self.remove_source(source)
+        ids = self.add_documents(embeddings, metadata) if len(metadata) else []
+        return removed, ids
+    
+    def get_sources(self) -> Set[str]:
+        """Get names of all source documents in the store"""
+        sources = set()
+        with self.lock:
+            for shard in range(self.num_shards):
+                if shard in self.shards:
+                    sources |= self.shards[shard].get_sources()
+                else:
+                    sources |= set(self.summary.get(shard, {}).get('sources', []))
+        return sources
+    
+    def save(self):
+        """Save shards changed since the last save, leaving the others untouched"""
+        try:
+            os.makedirs(self.store_path, exist_ok=True)
+            
+            with self.lock:
+                dirty = sorted(self.dirty)
+            
+            for shard in dirty:
+                with self._use(shard) as store:
+                    store.save()
+                    with self.lock:
+                        self._summarize(shard, store)
+                        self.dirty.discard(shard)
+            
+            with self.lock:
+                tmp_file = f"{self.shards_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({'num_shards': self.num_shards, 'shards': self.summary}, f)
+                os.replace(tmp_file, self.shards_file)
+            
+            logger.info(f"Saved {len(dirty)} of {self.num_shards} shards to {self.store_path}")
+            
+        except Exception as e:
+            logger.error(f"Error saving sharded store: {str(e)}")
+            raise
+    
+    def clear(self):
+        """Clear all shards"""
+        for shard in range(self.num_shards):
+            with self._use(shard) as store:
+                with self.lock:
+                    self.dirty.add(shard)
+                store.clear()
+        
+        self.version += 1
+        logger.info("Sharded vector store cleared")
+    
+    def close(self):
+        """Stop the search threads and close every loaded shard"""
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            shards = list(self.shards.values())
+            self.shards.clear()
+        for store in shards:
+            store.close()
+    
+    def get_stats(self) -> Dict:
+        """Get vector store statistics"""
+        with self.lock:
+            loaded = list(self.shards.values())
+        
+        stats = {
+            'total_vectors': self.ntotal,
+            'dimension': self.embedding_dimension,
+            'total_documents': len(self.get_sources()),
+            'shards': self.num_shards,
+            'loaded_shards': len(loaded)
+        }
+        
+        if loaded:
+            stats['index_type'] = loaded[0].index_type
+            stats['metric'] = loaded[0].metric
+        return stats
\ No newline at end of file
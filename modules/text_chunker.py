@@ -0,0 +1,325 @@
+"""
+Text Chunker Module
+Splits text into token-bounded chunks at legal section, paragraph, sentence and clause boundaries
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TextChunker:
+    """Single-pass chunker that sizes chunks with the embedding model's tokenizer"""
+    
+    # Boundary strengths, weakest first. Chunks end at the strongest boundary they can.
+    CLAUSE = 0
+    SENTENCE = 1
+    PARAGRAPH = 2
+    SECTION = 3
+    
+    # One scan finds every boundary, and each match ends where the next unit starts.
+    # A heading only starts a section after a line that does not end mid-sentence.
+    BOUNDARY_PATTERN = re.compile(
+        r'(?=\s)(?:'  # Every boundary starts at whitespace, which keeps the scan cheap
+        r'(?P<section>(?<![a-z,\s])\s*\n[ \t]*(?=(?:§\s*|(?:SECTION|Section|ARTICLE|Article|CHAPTER|Chapter|'
+        r'SCHEDULE|Schedule|EXHIBIT|Exhibit|PART|Part)\s+)[\dIVXLC]+\b))'
+        r'|(?P<paragraph>\n[ \t]*\n\s*|\n[ \t]*(?=\(?(?:\d{1,3}(?:\.\d{1,3})*|[a-z]{1,3}|[A-Z])[.)]\s))'
+        r'|(?P<sentence>(?:(?<=[.!?])|(?<=[.!?]["\'”’)\]]))\s+(?=["\'“‘(\[]?[A-Z0-9§]))'
+        r'|(?P<clause>(?<=[;:—–])\s+))'
+    )
+    
+    LEVELS = {'section': SECTION, 'paragraph': PARAGRAPH, 'sentence': SENTENCE, 'clause': CLAUSE}
+    
+    # Joins consecutive pages; a single line break is not a boundary, so sentences run on
+    PAGE_SEPARATOR = '\n'
+    
+    # Words whose trailing period does not end a sentence ("U.S.", "Inc.", "No. 5", "v. Smith")
+    ABBREVIATIONS = frozenset({
+        'art', 'arts', 'cf', 'ch', 'cl', 'co', 'corp', 'dept', 'dr', 'e.g', 'esq', 'etc', 'i.e', 'inc',
+        'jr', 'ltd', 'mr', 'mrs', 'ms', 'no', 'nos', 'para', 'paras', 'pp', 'pt', 'reg', 'regs', 'sec',
+        'secs', 'sr', 'st', 'subsec', 'u.k', 'u.s', 'u.s.c', 'v', 'viz', 'vol', 'vs'
+    })
+    
+    def __init__(self, tokenizer, max_tokens: int = 256, overlap_tokens: int = 32, min_fill: float = 0.5):
+        """
+        Initialize chunker
+        
+        Args:
+            tokenizer: HuggingFace fast tokenizer of the embedding model
+            max_tokens: Maximum tokens per chunk, including the model's special tokens
+                (the model's maximum sequence length, so no chunk text is truncated)
+            overlap_tokens: Tokens of trailing whole clauses repeated at the start of the next chunk
+                (lowered, with a warning, to less than half of the budget left after the special tokens)
+            min_fill: Fraction of the budget a chunk must hold before it ends at a
+                section heading, or ends early at a boundary stronger than the one
+                where the budget ran out
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.budget = max_tokens - tokenizer.num_special_tokens_to_add()
+        self.overlap_tokens = overlap_tokens
+        self.min_fill = min_fill
+        
+        if self.budget <= 0:
+            raise ValueError(f"max_tokens must exceed the model's {max_tokens - self.budget} special tokens")
+        if overlap_tokens < 0:
+            raise ValueError("overlap_tokens must not be negative")
+        
+        # Each chunk must advance by more than it repeats
+        max_overlap = (self.budget - 1) // 2
+        if overlap_tokens > max_overlap:
+            logger.warning(
+                f"overlap_tokens={overlap_tokens} must be less than half of the {self.budget}-token budget "
+                f"(max_tokens={max_tokens} minus {max_tokens - self.budget} special tokens); using {max_overlap}"
+            )
+            self.overlap_tokens = max_overlap
+    
+    @classmethod
+    def _is_abbreviation(cls, text: str, position: int) -> bool:
+        """Check whether the period ending at position closes an abbreviation or an initial"""
+        start = position - 1
+        while start > 0 and position - start < 12 and not text[start - 1].isspace():
+            start -= 1
+        word = text[start:position - 1].lstrip('"\'“‘([').lower()
+        return word in cls.ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+    
+    @classmethod
+    def sentence_spans(cls, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into sentences, paragraphs and list items (no tokenizer needed)
+        
+        Args:
+            text: Text to split
+            
+        Returns:
+            List of (start offset, end offset) tuples, without surrounding whitespace
+        """
+        starts = [0]
+        for match in cls.BOUNDARY_PATTERN.finditer(text):
+            if match.lastgroup == 'clause':
+                continue
+            if match.lastgroup == 'sentence' and text[match.start() - 1] == '.' and cls._is_abbreviation(text, match.start()):
+                continue
+            starts.append(match.end())
+        starts.append(len(text))
+        
+        spans = (cls.trim(text, start, end) for start, end in zip(starts, starts[1:]))
+        return [(start, end) for start, end in spans if start < end]
+    
+    def _units(self, text: str) -> Tuple[List[Tuple[int, int]], List[int], List[int], List[int]]:
+        """
+        Split text into units between boundaries, counting tokens of the whole text once
+        
+        Returns:
+            Tuple of (token offsets, unit start offsets, strength of the boundary
+            before each unit, index of each unit's first token). The start and
+            token lists end with a sentinel for the end of the text.
+        """
+        offsets = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False
+        )['offset_mapping']
+        
+        token_starts = [start for start, _ in offsets]
+        starts, levels, tokens = [0], [self.SECTION], [0]
+        
+        for match in self.BOUNDARY_PATTERN.finditer(text):
+            level = self.LEVELS[match.lastgroup]
+            if level == self.SENTENCE and text[match.start() - 1] == '.' and self._is_abbreviation(text, match.start()):
+                continue
+            
+            end = match.end()
+            
+            # Boundaries only move forward, so the search starts at the previous unit
+            token = bisect_left(token_starts, end, tokens[-1])
+            
+            # Units without tokens (leading whitespace) merge into the next one
+            if token == tokens[-1]:
+                levels[-1] = max(levels[-1], level)
+                continue
+            
+            starts.append(end)
+            levels.append(level)
+            tokens.append(token)
+        
+        starts.append(len(text))
+        tokens.append(len(offsets))
+        return offsets, starts, levels, tokens
+    
+    @staticmethod
+    def trim(text: str, start: int, end: int) -> Tuple[int, int]:
+        """Narrow a span to exclude surrounding whitespace"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+    
+    def spans(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Split text into chunks of at most max_tokens
+        
+        Units are packed greedily until the next one would not fit, or a
+        section starts once the chunk is min_fill full. If the budget runs out
+        at a clause or sentence boundary, the chunk ends instead at the
+        strongest boundary in its last part. Units longer than the budget are
+        split by token windows. Every chunk starts past the previous one, so
+        chunking is linear in the length of the text.
+        
+        Args:
+            text: Text to chunk
+            
+        Yields:
+            Tuples of (start offset, end offset, token count)
+        """
+        offsets, starts, levels, tokens = self._units(text)
+        count = len(levels)
+        fresh = 0  # First unit not yet in any chunk
+        i = 0
+        
+        while i < count:
+            if tokens[i + 1] - tokens[i] > self.budget:
+                step = self.budget - self.overlap_tokens
+                for first in range(tokens[i], tokens[i + 1], step):
+                    last = min(first + self.budget, tokens[i + 1])
+                    yield (offsets[first][0], offsets[last - 1][1], last - first)
+                    if last == tokens[i + 1]:
+                        break
+                i = fresh = i + 1
+                continue
+            
+            # Short sections are packed together, longer ones end at their heading
+            floor = tokens[i] + self.min_fill * self.budget
+            j = i + 1
+            while (j < count and tokens[j + 1] - tokens[i] <= self.budget
+                   and (levels[j] < self.SECTION or tokens[j] < floor)):
+                j += 1
+            
+            if j < count and levels[j] < self.PARAGRAPH:
+                best = j
+                for k in range(j - 1, max(i, fresh), -1):
+                    if tokens[k] < floor:
+                        break
+                    if levels[k] > levels[best]:
+                        best = k
+                j = best
+            
+            start, end = self.trim(text, starts[i], starts[j])
+            if start < end:
+                yield (start, end, tokens[j] - tokens[i])
+            
+            fresh = j
+            if j == count or levels[j] == self.SECTION:
+                i = j
+                continue
+            
+            # Repeat trailing whole units, as long as the next unit still fits after them
+            k = j
+            while (k - 1 > i and tokens[j] - tokens[k - 1] <= self.overlap_tokens
+                   and tokens[j + 1] - tokens[k - 1] <= self.budget):
+                k -= 1
+            i = k
+    
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks of at most max_tokens
+        
+        Args:
+            text: Text to chunk
+            
+        Returns:
+            List of text chunks
+        """
+        return [text[start:end] for start, end, _ in self.spans(text)]
+    
+    @staticmethod
+    def _continues(previous: Dict, metadata: Dict) -> bool:
+        """Check whether a page follows the previous one in the same source document"""
+        return (
+            previous.get('source') == metadata.get('source')
+            and previous.get('page') is not None
+            and metadata.get('page') is not None
+            and metadata['page'] > previous['page']
+        )
+    
+    @staticmethod
+    def _chunk(text: str, pages: List[Tuple[int, int, Dict]], start: int, end: int) -> Dict:
+        """
+        Build a chunk from a span of joined page text
+        
+        Args:
+            text: Joined text of consecutive pages
+            pages: (offset in text, offset in the page at that point, metadata) per page
+            start: Start offset of the chunk in text
+            end: End offset of the chunk in text
+            
+        Returns:
+            Dictionary with the chunk text and metadata
+        """
+        page_offsets = [offset for offset, _, _ in pages]
+        first_offset, first_base, first = pages[bisect_right(page_offsets, start) - 1]
+        last_offset, last_base, last = pages[bisect_right(page_offsets, end - 1) - 1]
+        
+        # Offsets are into the first and last page's own text, for citations
+        metadata = dict(first, char_start=first_base + start - first_offset, char_end=last_base + end - last_offset)
+        if first.get('page') is not None:
+            metadata['page_end'] = last['page']
+        
+        return {'text': text[start:end], 'metadata': metadata}
+    
+    def iter_chunks(self, documents: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Chunk a stream of documents or pages lazily
+        
+        Consecutive pages of a document are chunked as one text, so chunks
+        run across page breaks. After each page, the chunks before the last
+        are emitted and only the text of the last, possibly unfinished chunk
+        is kept for the next page.
+        
+        Args:
+            documents: Dictionaries with text and metadata, pages in order
+            
+        Yields:
+            Dictionaries with the chunk text and the metadata of its first page,
+            plus char_start (offset in the first page) and char_end (offset in
+            the last page), and page_end for paged documents
+        """
+        text = ''
+        pages = []
+        
+        for doc in documents:
+            if pages and not self._continues(pages[-1][2], doc['metadata']):
+                for start, end, _ in self.spans(text):
+                    yield self._chunk(text, pages, start, end)
+                text, pages = '', []
+            
+            if text:
+                text += self.PAGE_SEPARATOR
+            pages.append((len(text), 0, doc['metadata']))
+            text += doc['text']
+            
+            spans = list(self.spans(text))
+            if not spans:
+                continue
+            
+            for start, end, _ in spans[:-1]:
+                yield self._chunk(text, pages, start, end)
+            
+            # Keep the last chunk's text, and the pages it starts on, to chunk again with the next page
+            cut = spans[-1][0]
+            page_offsets = [offset for offset, _, _ in pages]
+            first = bisect_right(page_offsets, cut) - 1
+            offset, base, metadata = pages[first]
+            pages = [(0, base + cut - offset, metadata)] + [
+                (offset - cut, base, metadata) for offset, base, metadata in pages[first + 1:]
+            ]
+            text = text[cut:]
+        
+        if pages:
+            for start, end, _ in self.spans(text):
+                yield self._chunk(text, pages, start, end)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Vector Log Module
+Write-ahead log of vector additions and deletions since the last index snapshot
+"""
+
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorLog:
+    """Append-only, checksummed log of vector store changes"""
+    
+    OP_ADD = 1
+    OP_DELETE = 2
+    OP_CLEAR = 3
+    
+    # Checksum of the rest of the record, operation, number of ids
+    HEADER = struct.Struct('<IBI')
+    
+    def __init__(self, path: str, dimension: int):
+        """
+        Initialize vector log
+        
+        Args:
+            path: Path to the log file
+            dimension: Dimension of logged vectors
+        """
+        self.path = path
+        self.dimension = dimension
+        self.lock = threading.Lock()
+        self.file = None
+        self.records = 0
+    
+    def _open(self):
+        """Open the log for appending"""
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.file = open(self.path, 'ab')
+    
+    def _append(self, op: int, ids: np.ndarray, vectors: Optional[np.ndarray] = None):
+        """Append one record (buffered until sync)"""
+        payload = np.ascontiguousarray(ids, dtype='int64').tobytes()
+        if vectors is not None:
+            payload += np.ascontiguousarray(vectors, dtype='float32').tobytes()
+        
+        body = struct.pack('<BI', op, len(ids)) + payload
+        
+        with self.lock:
+            self._open()
+            self.file.write(struct.pack('<I', zlib.crc32(body)) + body)
+            self.records += 1
+    
+    def append_add(self, ids: np.ndarray, vectors: np.ndarray):
+        """Log vectors added under chunk ids"""
+        self._append(self.OP_ADD, ids, vectors)
+    
+    def append_delete(self, ids: np.ndarray):
+        """Log chunk ids deleted"""
+        self._append(self.OP_DELETE, ids)
+    
+    def append_clear(self):
+        """Log that the store was cleared"""
+        self._append(self.OP_CLEAR, np.zeros(0, dtype='int64'))
+    
+    def sync(self):
+        """Flush appended records to stable storage"""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+    
+    @property
+    def size(self) -> int:
+        """Bytes in the log, including unflushed records"""
+        with self.lock:
+            if self.file is not None:
+                return self.file.tell()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+    
+    def replay(self) -> Iterator[Tuple[int, np.ndarray, Optional[np.ndarray]]]:
+        """
+        Read logged records in order
+        
+        A torn or corrupt record at the end (from a crash during an append)
+        ends the replay, and the log is truncated to the last good record.
+        
+        Yields:
+            Tuples of (operation, ids, vectors or None)
+        """
+        if not os.path.exists(self.path):
+            return
+        
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        
+        offset = 0
+        self.records = 0
+        while offset + self.HEADER.size <= len(data):
+            checksum, op, count = self.HEADER.unpack_from(data, offset)
+            length = count * 8 + (count * self.dimension * 4 if op == self.OP_ADD else 0)
+            end = offset + self.HEADER.size + length
+            
+            if end > len(data) or zlib.crc32(data[offset + 4:end]) != checksum:
+                break
+            
+            start = offset + self.HEADER.size
+            ids = np.frombuffer(data, dtype='int64', count=count, offset=start)
+            vectors = None
+            if op == self.OP_ADD:
+                vectors = np.frombuffer(data, dtype='float32', count=count * self.dimension,
+                                        offset=start + count * 8).reshape(count, self.dimension)
+            
+            self.records += 1
+            offset = end
+            yield op, ids, vectors
+        
+        if offset < len(data):
+            logger.warning(f"Discarding {len(data) - offset} bytes of incomplete log records in {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+                os.fsync(f.fileno())
+    
+    def reset(self):
+        """Empty the log once its records are in a snapshot"""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            
+            with open(self.path, 'wb') as f:
+                os.fsync(f.fileno())
+            self.records = 0
+    
+    def close(self):
+        """Flush and close the log"""
+        self.sync()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
\ No newline at end of file
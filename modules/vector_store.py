@@ -7,113 +7,587 @@ import faiss
 import numpy as np
 import pickle
 import os
-from typing import List, Dict, Tuple
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Optional, Set, Tuple
 import logging
 
+from .chunk_store import ChunkStore
+from .index_factory import IndexFactory
+from .vector_log import VectorLog
+
 logger = logging.getLogger(__name__)
 
 
+class _ReadWriteLock:
+    """Lock held by any number of readers or by one writer; a waiting writer goes before new readers"""
+    
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writing = False
+        self.writers_waiting = 0
+    
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock shared with other readers"""
+        with self.condition:
+            while self.writing or self.writers_waiting:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+    
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively"""
+        with self.condition:
+            self.writers_waiting += 1
+            while self.writing or self.readers:
+                self.condition.wait()
+            self.writers_waiting -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
 class VectorStore:
     """FAISS-based vector store for document embeddings"""
     
-    def __init__(self, embedding_dimension: int, store_path: str):
+    METRIC_L2 = 'l2'
+    METRIC_COSINE = 'cosine'
+    
+    def __init__(self, embedding_dimension: int, store_path: str,
+                 index_factory: Optional[IndexFactory] = None,
+                 nprobe: int = 16, ef_search: int = 64, metric: str = 'l2',
+                 compaction_threshold: float = 0.2, brute_force_limit: int = 1000,
+                 checkpoint_bytes: int = 64 * 1024 * 1024, checkpoint_interval: float = 0):
         """
         Initialize vector store
         
         Args:
             embedding_dimension: Dimension of embeddings
             store_path: Path to save/load vector store
+            index_factory: Factory for the FAISS index type (flat by default)
+            nprobe: Default IVF partitions visited per query
+            ef_search: Default HNSW search depth per query
+            metric: 'l2' or 'cosine' (normalized vectors, inner-product index)
+            compaction_threshold: Fraction of deleted vectors that triggers compaction
+            brute_force_limit: Filtered searches over at most this many chunks are scored exactly
+            checkpoint_bytes: Log size at which save() rewrites the index snapshot
+            checkpoint_interval: Seconds between background checkpoints (0 to disable)
+            
+        Raises:
+            ValueError: If the metric is unsupported or store_path holds a sharded store
         """
+        if metric not in (self.METRIC_L2, self.METRIC_COSINE):
+            raise ValueError(f"Unsupported similarity metric: {metric}")
+        
+        # Written by ShardedVectorStore; its shards would be ignored while the manifest
+        # still lists their files as indexed
+        if os.path.exists(os.path.join(store_path, 'shards.json')):
+            raise ValueError(
+                f"Store at {store_path} is sharded, configured without shards; "
+                f"set VECTOR_STORE_SHARDS to its shard count, or remove the directory to re-index without shards"
+            )
+        
         self.embedding_dimension = embedding_dimension
         self.store_path = store_path
         self.index_file = os.path.join(store_path, 'faiss_index.bin')
-        self.metadata_file = os.path.join(store_path, 'metadata.pkl')
+        self.tombstones_file = os.path.join(store_path, 'tombstones.npy')
+        self.log_file = os.path.join(store_path, 'vectors.wal')
+        self.chunk_file = os.path.join(store_path, 'chunks.db')
+        self.legacy_ids_file = os.path.join(store_path, 'chunk_ids.npy')
+        self.legacy_metadata_file = os.path.join(store_path, 'metadata.pkl')
+        self.index_factory = index_factory or IndexFactory()
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.metric = metric
+        self.metric_type = faiss.METRIC_INNER_PRODUCT if metric == self.METRIC_COSINE else faiss.METRIC_L2
+        self.compaction_threshold = compaction_threshold
+        self.brute_force_limit = brute_force_limit
+        self.checkpoint_bytes = checkpoint_bytes
+        
+        # Chunk text and metadata live on disk, addressed by chunk id
+        self.chunk_store = ChunkStore(self.chunk_file)
+        
+        # Vector changes since the last index snapshot, replayed on load
+        self.log = VectorLog(self.log_file, embedding_dimension)
+        self.write_lock = threading.RLock()
+        
+        # FAISS indexes are not safe to search while vectors are added or removed, so
+        # searches share this lock and writers (already serialized by write_lock) take it
+        # exclusively only around the index change itself
+        self.index_lock = _ReadWriteLock()
+        
+        # Ids deleted from the chunk store but still in an index that cannot remove them
+        self.tombstones: Set[int] = set()
+        self._tombstone_selector = None
+        
+        # Incremented whenever the indexed content changes, so caches can detect stale entries
+        self.version = 0
         
         # Initialize or load index
         if self.index_exists():
             self.load()
         else:
-            self.index = faiss.IndexFlatL2(embedding_dimension)
-            self.metadata = []
+            self.index = self._new_index()
+        
+        # Holds only a weak reference, so an unused store can still be garbage collected
+        self._stop_checkpoints = threading.Event()
+        if checkpoint_interval > 0:
+            threading.Thread(
+                target=self._checkpoint_loop,
+                args=(weakref.ref(self), self._stop_checkpoints, checkpoint_interval),
+                name='vector-checkpoint',
+                daemon=True
+            ).start()
         
         logger.info(f"Vector store initialized with {self.index.ntotal} vectors")
     
+    def _new_index(self, training_vectors: Optional[np.ndarray] = None) -> faiss.Index:
+        """Build an empty id-mapped index of the configured type"""
+        index = self.index_factory.build(
+            self.embedding_dimension,
+            metric=self.metric_type,
+            training_vectors=training_vectors
+        )
+        self.index_factory.configure(index)
+        return IndexFactory.with_ids(index)
+    
+    @property
+    def ntotal(self) -> int:
+        """Number of searchable vectors"""
+        return self.index.ntotal - len(self.tombstones)
+    
+    @property
+    def index_type(self) -> str:
+        """Type of the active FAISS index"""
+        return IndexFactory.index_type_of(self.index)
+    
+    def _prepare_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """Convert vectors to contiguous float32, normalized for cosine similarity"""
+        vectors = np.ascontiguousarray(vectors, dtype='float32').copy()
+        if self.metric == self.METRIC_COSINE:
+            faiss.normalize_L2(vectors)
+        return vectors
+    
+    def _needs_rebuild(self) -> bool:
+        """Whether the active index differs from the configured type or metric"""
+        if self.index.metric_type != self.metric_type or not IndexFactory.is_id_mapped(self.index):
+            return True
+        
+        if self.index_type == self.index_factory.index_type:
+            return False
+        
+        # Indexes that need training stay flat until enough vectors exist
+        return not (
+            self.index_factory.needs_training
+            and self.index_type == IndexFactory.FLAT
+            and self.index.ntotal < self.index_factory.min_training_vectors
+        )
+    
+    def rebuild_index(self, ids: Optional[np.ndarray] = None, vectors: Optional[np.ndarray] = None):
+        """
+        Rebuild the index as the configured type, training it if needed
+        
+        Used to migrate an existing index to a new type and to compact
+        away deleted vectors. Vectors read from an ivf_pq index are decoded
+        approximations, so such a rebuild loses precision.
+        
+        Args:
+            ids: Chunk ids of the vectors (read from the index if None)
+            vectors: Vectors to index (read from the index if None)
+        """
+        try:
+            source_type = self.index_type
+            if vectors is None:
+                ids, vectors = IndexFactory.reconstruct_all(self.index)
+                if source_type == IndexFactory.IVF_PQ:
+                    logger.warning(
+                        "Rebuilding from approximate vectors decoded from the ivf_pq index; "
+                        "re-index the documents to restore full precision"
+                    )
+            
+            if self.tombstones:
+                live = ~np.isin(ids, np.fromiter(self.tombstones, dtype='int64'))
+                ids, vectors = ids[live], vectors[live]
+            
+            # Normalizes vectors when migrating an L2 store to cosine
+            vectors = self._prepare_vectors(vectors)
+            
+            index = self._new_index(training_vectors=vectors)
+            if len(vectors):
+                index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype='int64'))
+            with self.index_lock.write():
+                self.index = index
+                self._set_tombstones(set())
+            
+            logger.info(f"Rebuilt {source_type} index as {self.index_type} with {self.index.ntotal} vectors")
+            
+        except Exception as e:
+            logger.error(f"Error rebuilding index: {str(e)}")
+            raise
+    
     def index_exists(self) -> bool:
-        """Check if index files exist"""
-        return os.path.exists(self.index_file) and os.path.exists(self.metadata_file)
+        """Check if an index snapshot or log exists"""
+        return os.path.exists(self.index_file) or os.path.exists(self.log_file)
     
-    def add_documents(self, embeddings: np.ndarray, metadata: List[Dict]):
+    def add_documents(self, embeddings: np.ndarray, metadata: List[Dict]) -> List[int]:
         """
         Add documents to vector store
         
         Args:
             embeddings: Numpy array of embeddings
             metadata: List of metadata dictionaries
+            
+        Returns:
+            Chunk ids assigned to the documents
         """
         try:
-            # Ensure embeddings are float32
-            embeddings = embeddings.astype('float32')
-            
-            # Add to FAISS index
-            self.index.add(embeddings)
+            # Ensure embeddings are float32 (and unit length for cosine)
+            embeddings = self._prepare_vectors(embeddings)
             
-            # Store metadata
-            self.metadata.extend(metadata)
+            with self.write_lock:
+                # Store text and metadata, then log and index vectors under their chunk ids
+                ids = self.chunk_store.add(metadata)
+                self.log.append_add(np.array(ids, dtype='int64'), embeddings)
+                with self.index_lock.write():
+                    self.index.add_with_ids(embeddings, np.array(ids, dtype='int64'))
+                self.version += 1
+                
+                # Train the configured index once enough vectors exist
+                if self._needs_rebuild():
+                    self.rebuild_index()
             
             logger.info(f"Added {len(metadata)} documents. Total: {self.index.ntotal}")
+            return ids
             
         except Exception as e:
             logger.error(f"Error adding documents: {str(e)}")
             raise
     
-    def search(self, query_embedding: np.ndarray, k: int = 4) -> List[Tuple[Dict, float]]:
+    def find_duplicates(self, documents: List[Dict]) -> List[Optional[int]]:
+        """
+        Find stored copies of documents before they are embedded
+        
+        Args:
+            documents: Dictionaries with text, metadata and content hash
+            
+        Returns:
+            Chunk id of a stored chunk with the same content, or None, per document
+        """
+        return self.chunk_store.find_duplicates([doc['content_hash'] for doc in documents])
+    
+    def add_duplicates(self, ids: List[int], documents: List[Dict]):
+        """
+        Record documents as copies of stored chunks instead of storing their vectors
+        
+        Args:
+            ids: Chunk id of the stored copy per document
+            documents: Dictionaries with text and metadata
+        """
+        with self.write_lock:
+            self.chunk_store.add_references(ids, documents)
+            self.version += 1
+        
+        logger.info(f"Recorded {len(documents)} duplicate chunks")
+    
+    def _set_tombstones(self, tombstones: Set[int]):
+        """Replace the tombstone set and the selector excluding it from searches"""
+        self.tombstones = tombstones
+        
+        if tombstones:
+            ids = np.fromiter(tombstones, dtype='int64')
+            batch = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+            # Keep the inner selector alive alongside the one that references it
+            self._tombstone_selector = (batch, faiss.IDSelectorNot(batch))
+        else:
+            self._tombstone_selector = None
+    
+    def search(self, query_embedding: np.ndarray, k: int = 4, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None, filters: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
         """
         Search for similar documents
         
         Args:
             query_embedding: Query embedding vector
             k: Number of results to return
+            nprobe: IVF partitions to visit (overrides the default)
+            ef_search: HNSW search depth (overrides the default)
+            filters: Metadata filters restricting the searched chunks (see ChunkStore.FILTER_KEYS)
             
         Returns:
-            List of (metadata, distance) tuples
+            List of (document, similarity) tuples, documents holding id, text and metadata
+        """
+        return self.search_batch(
+            query_embedding.reshape(1, -1), k=k, nprobe=nprobe, ef_search=ef_search, filters=filters
+        )[0]
+    
+    def search_batch(self, query_embeddings: np.ndarray, k: int = 4, nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None, filters: Optional[Dict] = None) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search for similar documents for several queries in one index call
+        
+        Filters are resolved to a set of chunk ids first. Small sets are
+        scored exactly against their stored vectors; larger sets are passed
+        to FAISS as an id selector, so only matching vectors are scored.
+        
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            k: Number of results to return per query
+            nprobe: IVF partitions to visit (overrides the default)
+            ef_search: HNSW search depth (overrides the default)
+            filters: Metadata filters restricting the searched chunks (see ChunkStore.FILTER_KEYS)
+            
+        Returns:
+            One list of (document, similarity) tuples per query
         """
         try:
-            if self.index.ntotal == 0:
-                logger.warning("Vector store is empty")
-                return []
+            # Ensure queries are 2D float32 (and unit length for cosine)
+            query_embeddings = self._prepare_vectors(query_embeddings)
+            
+            ids = None
+            if filters:
+                # Deleted chunks are gone from the chunk store, so the id set excludes tombstones
+                ids = np.array(self.chunk_store.filter_ids(filters), dtype='int64')
+                
+                if not len(ids):
+                    return [[] for _ in range(len(query_embeddings))]
+            
+            # Writers swap or change the index under the write side
+            with self.index_lock.read():
+                if self.index.ntotal == 0:
+                    logger.warning("Vector store is empty")
+                    return [[] for _ in range(len(query_embeddings))]
+                
+                if ids is not None and len(ids) <= self.brute_force_limit:
+                    distances, labels = self._exact_search(query_embeddings, ids, k)
+                else:
+                    # Search, skipping deleted vectors
+                    tombstones = self._tombstone_selector
+                    selector = tombstones[1] if tombstones else None
+                    limit = self.index.ntotal
+                    
+                    if ids is not None:
+                        selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+                        limit = len(ids)
+                    
+                    params = IndexFactory.search_parameters(
+                        self.index,
+                        nprobe=nprobe or self.nprobe,
+                        ef_search=ef_search or self.ef_search,
+                        selector=selector
+                    )
+                    distances, labels = self.index.search(query_embeddings, min(k, limit), params=params)
             
-            # Ensure query is 2D float32
-            query_embedding = query_embedding.astype('float32').reshape(1, -1)
+            return self._collect_results(distances, labels)
             
-            # Search
-            distances, indices = self.index.search(query_embedding, min(k, self.index.ntotal))
+        except Exception as e:
+            logger.error(f"Error searching vector store: {str(e)}")
+            raise
+    
+    def _exact_search(self, query_embeddings: np.ndarray, ids: np.ndarray,
+                      k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score queries against the stored vectors of a small id set
+        
+        Args:
+            query_embeddings: Prepared query matrix
+            ids: Chunk ids to search
+            k: Number of results per query
             
-            # Prepare results
-            results = []
-            for idx, distance in zip(indices[0], distances[0]):
-                if idx < len(self.metadata):
+        Returns:
+            Tuple of (distances, labels) as returned by a FAISS search
+        """
+        vectors = self.index.reconstruct_batch(ids)
+        distances, positions = faiss.knn(query_embeddings, vectors, min(k, len(ids)), metric=self.metric_type)
+        return distances, ids[positions]
+    
+    def _collect_results(self, distances: np.ndarray, labels: np.ndarray) -> List[List[Tuple[Dict, float]]]:
+        """Turn FAISS search output into (document, similarity) lists"""
+        # Approximate and filtered searches pad missing hits with -1
+        hits = [
+            [(int(chunk_id), distance) for chunk_id, distance in zip(row_labels, row_distances) if chunk_id >= 0]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+        
+        # Fetch text once for the union of all hits
+        documents = self.chunk_store.get({chunk_id for row in hits for chunk_id, _ in row})
+        
+        # Prepare results
+        results = []
+        for row in hits:
+            row_results = []
+            for chunk_id, distance in row:
+                if chunk_id not in documents:
+                    continue
+                if self.metric == self.METRIC_COSINE:
+                    # Inner product of unit vectors is the cosine similarity
+                    similarity = float(distance)
+                else:
                     # Convert L2 distance to similarity score (0-1)
-                    similarity = 1 / (1 + distance)
-                    results.append((self.metadata[idx], similarity))
+                    similarity = float(1 / (1 + distance))
+                row_results.append((documents[chunk_id], similarity))
+            results.append(row_results)
+        
+        logger.info(f"Found {sum(len(row) for row in results)} similar documents for {len(results)} queries")
+        return results
+    
+    def search_text(self, query: str, k: int = 20, filters: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """
+        Search chunk text with the BM25 full-text index
+        
+        Args:
+            query: Free-text query
+            k: Number of results to return
+            filters: Metadata filters restricting the searched chunks (see ChunkStore.FILTER_KEYS)
             
-            logger.info(f"Found {len(results)} similar documents")
-            return results
+        Returns:
+            List of (document, BM25 score) tuples, best first
+        """
+        try:
+            hits = self.chunk_store.search_text(query, k=k, filters=filters)
+            documents = self.chunk_store.get(chunk_id for chunk_id, _ in hits)
+            return [(documents[chunk_id], score) for chunk_id, score in hits if chunk_id in documents]
             
         except Exception as e:
-            logger.error(f"Error searching vector store: {str(e)}")
+            logger.error(f"Error searching chunk text: {str(e)}")
             raise
     
-    def save(self):
-        """Save index and metadata to disk"""
+    def delete_ids(self, ids: List[int]) -> int:
+        """
+        Delete vectors and chunks by chunk id
+        
+        Flat and IVF indexes remove vectors in place. HNSW graphs cannot, so
+        their vectors are tombstoned and skipped until the next compaction.
+        
+        Args:
+            ids: Chunk ids to delete
+            
+        Returns:
+            Number of vectors deleted
+        """
         try:
-            os.makedirs(self.store_path, exist_ok=True)
+            ids = np.unique(np.asarray(ids, dtype='int64'))
+            if not len(ids):
+                return 0
+            
+            with self.write_lock:
+                self.log.append_delete(ids)
+                removed = self._remove_vectors(ids)
+                
+                self.chunk_store.delete(ids.tolist())
+                self.version += 1
+                
+                if self.needs_compaction():
+                    self.compact()
             
-            # Save FAISS index
-            faiss.write_index(self.index, self.index_file)
+            return removed
             
-            # Save metadata
-            with open(self.metadata_file, 'wb') as f:
-                pickle.dump(self.metadata, f)
+        except Exception as e:
+            logger.error(f"Error deleting vectors: {str(e)}")
+            raise
+    
+    def _remove_vectors(self, ids: np.ndarray) -> int:
+        """Remove vectors from the index, or tombstone them if it cannot remove"""
+        if IndexFactory.supports_removal(self.index):
+            with self.index_lock.write():
+                return int(self.index.remove_ids(ids))
+        
+        new = set(ids.tolist()) - self.tombstones
+        self._set_tombstones(self.tombstones | new)
+        return len(new)
+    
+    def remove_source(self, source: str) -> int:
+        """
+        Remove all vectors belonging to a source document
+        
+        Args:
+            source: Source file name
+            
+        Returns:
+            Number of vectors removed
+        """
+        with self.write_lock:
+            # Chunks other documents also contain are kept, under one of those documents
+            ids = self.chunk_store.release_source(source)
+            self.version += 1
+            removed = self.delete_ids(ids)
+        
+        if removed:
+            logger.info(f"Removed {removed} vectors for {source}. Total: {self.ntotal}")
+        return removed
+    
+    def upsert_source(self, source: str, embeddings: np.ndarray, metadata: List[Dict]) -> Tuple[int, List[int]]:
+        """
+        Replace all vectors of a source document
+        
+        Args:
+            source: Source file name
+            embeddings: Numpy array of embeddings for the new version
+            metadata: List of metadata dictionaries for the new version
+            
+        Returns:
+            Tuple of (number of vectors removed, chunk ids added)
+        """
+        removed = self.remove_source(source)
+        ids = self.add_documents(embeddings, metadata) if len(metadata) else []
+        return removed, ids
+    
+    def needs_compaction(self) -> bool:
+        """Whether deleted vectors exceed the compaction threshold"""
+        return bool(self.tombstones) and \
+            len(self.tombstones) >= self.compaction_threshold * self.index.ntotal
+    
+    def compact(self):
+        """Drop tombstoned vectors from the index and reclaim chunk store space"""
+        try:
+            if self.tombstones:
+                count = len(self.tombstones)
+                self.rebuild_index()
+                logger.info(f"Compacted {count} deleted vectors")
+            
+            # Vacuum commits chunk deletions, so make their log records durable first
+            self.log.sync()
+            self.chunk_store.vacuum()
+            
+        except Exception as e:
+            logger.error(f"Error compacting vector store: {str(e)}")
+            raise
+    
+    def get_sources(self) -> Set[str]:
+        """Get names of all source documents in the store"""
+        return self.chunk_store.sources()
+    
+    def save(self):
+        """
+        Make changes since the last save durable
+        
+        Logged vector changes are flushed and chunk text committed, so the
+        cost is proportional to what changed. The index snapshot is only
+        rewritten once the log exceeds checkpoint_bytes.
+        """
+        try:
+            with self.write_lock:
+                os.makedirs(self.store_path, exist_ok=True)
+                
+                # Log first: replay skips logged vectors whose chunks were not committed
+                self.log.sync()
+                self.chunk_store.commit()
+                
+                if not os.path.exists(self.index_file) or self.log.size >= self.checkpoint_bytes:
+                    self.checkpoint()
             
             logger.info(f"Vector store saved to {self.store_path}")
             
@@ -121,15 +595,96 @@ class VectorStore:
             logger.error(f"Error saving vector store: {str(e)}")
             raise
     
+    def checkpoint(self):
+        """Write an index snapshot atomically and empty the log"""
+        try:
+            with self.write_lock:
+                os.makedirs(self.store_path, exist_ok=True)
+                self.chunk_store.commit()
+                
+                self._replace_file(self.index_file, lambda path: faiss.write_index(self.index, path))
+                
+                def write_tombstones(path):
+                    with open(path, 'wb') as f:
+                        np.save(f, np.fromiter(self.tombstones, dtype='int64'))
+                
+                self._replace_file(self.tombstones_file, write_tombstones)
+                self._sync_directory()
+                
+                # Replay is idempotent, so a crash before this point only replays the log again
+                self.log.reset()
+            
+            logger.info(f"Vector store checkpointed to {self.store_path}")
+            
+        except Exception as e:
+            logger.error(f"Error checkpointing vector store: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _replace_file(path: str, write: Callable[[str], None]):
+        """Write a file beside path, flush it to disk and rename it over path"""
+        tmp_file = f"{path}.tmp"
+        write(tmp_file)
+        
+        with open(tmp_file, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    
+    def _sync_directory(self):
+        """Flush renames in the store directory to disk (where supported)"""
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(self.store_path, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    @staticmethod
+    def _checkpoint_loop(store_ref: weakref.ref, stop: threading.Event, interval: float):
+        """Checkpoint a store with logged changes every interval seconds until it is closed"""
+        while not stop.wait(interval):
+            store = store_ref()
+            if store is None:
+                return
+            
+            try:
+                if store.log.records:
+                    store.checkpoint()
+            except Exception as e:
+                logger.error(f"Background checkpoint failed: {str(e)}")
+            
+            del store
+    
     def load(self):
-        """Load index and metadata from disk"""
+        """Load the index snapshot and replay the log written since"""
         try:
             # Load FAISS index
-            self.index = faiss.read_index(self.index_file)
+            if os.path.exists(self.index_file):
+                self.index = faiss.read_index(self.index_file)
+                self.index_factory.configure(self.index)
+            else:
+                self.index = self._new_index()
+            
+            if os.path.exists(self.tombstones_file):
+                self._set_tombstones(set(np.load(self.tombstones_file).tolist()))
             
-            # Load metadata
-            with open(self.metadata_file, 'rb') as f:
-                self.metadata = pickle.load(f)
+            if not IndexFactory.is_id_mapped(self.index):
+                self._migrate_positional_index()
+            
+            replayed = self._replay_log()
+            
+            if self._needs_rebuild():
+                # Migrate an index saved with a different type or metric
+                logger.info(
+                    f"Migrating {self.index_type} index to {self.index_factory.index_type} "
+                    f"with {self.metric} similarity"
+                )
+                self.rebuild_index()
+                self.checkpoint()
+            elif replayed:
+                if self.needs_compaction():
+                    self.compact()
+                self.checkpoint()
             
             logger.info(f"Vector store loaded from {self.store_path}")
             
@@ -137,16 +692,99 @@ class VectorStore:
             logger.error(f"Error loading vector store: {str(e)}")
             raise
     
+    def _replay_log(self) -> int:
+        """
+        Apply logged changes on top of the loaded snapshot
+        
+        Replay is idempotent: vectors already in the snapshot are skipped,
+        as are vectors whose chunks were never committed.
+        
+        Returns:
+            Number of records replayed
+        """
+        present = None
+        replayed = 0
+        
+        for op, ids, vectors in self.log.replay():
+            if present is None:
+                present = set(IndexFactory.get_ids(self.index).tolist())
+            
+            if op == VectorLog.OP_CLEAR:
+                self.index = self._new_index()
+                self._set_tombstones(set())
+                present = set()
+            elif op == VectorLog.OP_ADD:
+                committed = self.chunk_store.existing_ids(ids.tolist())
+                keep = np.array([i not in present and i in committed for i in ids.tolist()], dtype=bool)
+                if keep.any():
+                    self.index.add_with_ids(np.ascontiguousarray(vectors[keep]), np.ascontiguousarray(ids[keep]))
+                    present.update(ids[keep].tolist())
+            elif op == VectorLog.OP_DELETE:
+                ids = np.array([i for i in ids.tolist() if i in present], dtype='int64')
+                if len(ids):
+                    self._remove_vectors(ids)
+                    if IndexFactory.supports_removal(self.index):
+                        present.difference_update(ids.tolist())
+            
+            replayed += 1
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} log records into {self.store_path}")
+        return replayed
+    
+    def _migrate_positional_index(self):
+        """Rebuild an index addressed by position as one addressed by chunk id"""
+        if os.path.exists(self.legacy_ids_file):
+            chunk_ids = np.load(self.legacy_ids_file)
+        else:
+            # Import chunks from a pickled metadata list into the chunk store
+            logger.info(f"Migrating {self.legacy_metadata_file} to {self.chunk_file}")
+            
+            with open(self.legacy_metadata_file, 'rb') as f:
+                metadata = pickle.load(f)
+            
+            self.chunk_store.clear()
+            chunk_ids = np.array(self.chunk_store.add(metadata), dtype='int64')
+        
+        logger.info(f"Migrating {self.index_type} index to id-mapped {self.index_factory.index_type}")
+        _, vectors = IndexFactory.reconstruct_all(self.index)
+        self.rebuild_index(ids=chunk_ids, vectors=vectors)
+        self.checkpoint()
+        
+        if os.path.exists(self.legacy_ids_file):
+            os.remove(self.legacy_ids_file)
+    
     def clear(self):
         """Clear the vector store"""
-        self.index = faiss.IndexFlatL2(self.embedding_dimension)
-        self.metadata = []
+        with self.write_lock:
+            self.log.append_clear()
+            index = self._new_index()
+            with self.index_lock.write():
+                self.index = index
+                self._set_tombstones(set())
+            self.chunk_store.clear()
+            self.version += 1
         logger.info("Vector store cleared")
     
+    def memory_bytes(self) -> int:
+        """Estimated memory held by the index (chunk text stays on disk)"""
+        return IndexFactory.memory_bytes(self.index)
+    
+    def close(self):
+        """Stop background checkpoints and release the log and chunk store"""
+        self._stop_checkpoints.set()
+        self.log.close()
+        self.chunk_store.close()
+    
     def get_stats(self) -> Dict:
         """Get vector store statistics"""
         return {
-            'total_vectors': self.index.ntotal,
+            'total_vectors': self.ntotal,
+            'deleted_vectors': len(self.tombstones),
+            'duplicate_chunks': self.chunk_store.count_references(),
+            'log_records': self.log.records,
             'dimension': self.embedding_dimension,
-            'total_documents': len(set(m.get('metadata', {}).get('source') for m in self.metadata))
+            'index_type': self.index_type,
+            'metric': self.metric,
+            'total_documents': len(self.chunk_store.sources())
         }
\ No newline at end of file
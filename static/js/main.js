@@ -218,7 +218,7 @@ class LegalRAGApp {
                 throw new Error('Failed to upload documents');
             }
 
-            // Index documents
+            // Queue indexing job
             this.loadingText.textContent = 'Indexing documents...';
             const indexResponse = await fetch('/api/index', {
                 method: 'POST'
@@ -228,13 +228,31 @@ class LegalRAGApp {
                 throw new Error('Failed to index documents');
             }
 
-            const result = await indexResponse.json();
+            const { job_id } = await indexResponse.json();
+            const job = await this.waitForJob(job_id);
+
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Indexing job failed');
+            }
+
+            const result = job.result;
+            const skipped = result.skipped_files && result.skipped_files.length
+                ? ` (${result.skipped_files.length} unchanged document(s) skipped)`
+                : '';
 
             this.hideLoading();
-            this.showAlert(
-                `Successfully indexed ${result.files.length} document(s) into ${result.total_chunks} chunks!`,
-                'success'
-            );
+
+            if (result.failed_files && result.failed_files.length) {
+                this.showAlert(
+                    `Indexed ${result.files.length} document(s), but failed to process: ${result.failed_files.join(', ')}`,
+                    'error'
+                );
+            } else {
+                this.showAlert(
+                    `Successfully indexed ${result.files.length} document(s) into ${result.total_chunks} chunks${skipped}!`,
+                    'success'
+                );
+            }
 
             this.isIndexed = true;
             this.loadStats();
@@ -246,6 +264,31 @@ class LegalRAGApp {
         }
     }
 
+    async waitForJob(jobId) {
+        // Poll the job until it finishes, showing per-file progress
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+
+            if (!response.ok) {
+                throw new Error('Failed to get indexing status');
+            }
+
+            const job = await response.json();
+
+            if (job.status === 'completed' || job.status === 'failed') {
+                return job;
+            }
+
+            if (job.progress) {
+                const { files_done, files_total, chunks_per_sec } = job.progress;
+                this.loadingText.textContent =
+                    `Indexing documents... ${files_done}/${files_total} files (${chunks_per_sec} chunks/sec)`;
+            }
+
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     async handleQuery() {
         const query = this.queryInput.value.trim();
 
@@ -262,7 +305,7 @@ class LegalRAGApp {
         try {
             this.showLoading('Searching documents...');
 
-            const response = await fetch('/api/query', {
+            const response = await fetch('/api/query/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -271,13 +314,26 @@ class LegalRAGApp {
             });
 
             if (!response.ok) {
-                throw new Error('Failed to query documents');
+                const error = await response.json().catch(() => ({}));
+                throw new Error(error.error || 'Failed to query documents');
             }
 
-            const result = await response.json();
-
-            this.hideLoading();
-            this.displayAnswer(result);
+            // Sources arrive first, then the answer streams in token by token
+            let answer = '';
+            let answerText = null;
+
+            await this.readEvents(response, (event, data) => {
+                if (event === 'sources') {
+                    this.hideLoading();
+                    this.displayAnswer({ answer: '', sources: data.sources, query: data.query });
+                    answerText = this.responseArea.querySelector('.answer-text');
+                } else if (event === 'token') {
+                    answer += data.text;
+                    answerText.innerHTML = this.formatAnswer(answer);
+                } else if (event === 'error') {
+                    throw new Error(data.error);
+                }
+            });
 
         } catch (error) {
             this.hideLoading();
@@ -286,6 +342,39 @@ class LegalRAGApp {
         }
     }
 
+    async readEvents(response, onEvent) {
+        // Parse a Server-Sent Events body (EventSource cannot POST)
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const frames = buffer.split('\n\n');
+            buffer = frames.pop();
+
+            for (const frame of frames) {
+                let event = 'message';
+                let data = '';
+
+                for (const line of frame.split('\n')) {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                }
+
+                if (data) {
+                    onEvent(event, JSON.parse(data));
+                }
+            }
+        }
+    }
+
     displayAnswer(result) {
         const { answer, sources, query } = result;
 
@@ -307,7 +396,7 @@ class LegalRAGApp {
                             </svg>
                             <div class="source-details">
                                 <h4>${source.document}</h4>
-                                <p>${source.page ? `Page ${source.page}` : 'Full document'}</p>
+                                <p>${source.page ? (source.page_end && source.page_end !== source.page ? `Pages ${source.page}-${source.page_end}` : `Page ${source.page}`) : 'Full document'}</p>
                             </div>
                         </div>
                         <span class="source-relevance">${(source.relevance * 100).toFixed(0)}% match</span>
@@ -0,0 +1,53 @@
+"""
+Tests for the semantic answer cache
+"""
+
+import unittest
+
+import numpy as np
+
+from modules.answer_cache import AnswerCache
+
+
+class AnswerCacheTest(unittest.TestCase):
+    """Answers are reused only for similar questions over the same context and store"""
+    
+    def setUp(self):
+        self.cache = AnswerCache(similarity_threshold=0.95, max_entries=8)
+        self.query = np.array([1.0, 0.0, 0.0])
+        self.answer = {'answer': 'cached answer', 'success': True}
+        self.cache.put(self.query, [1, 2], 'model', 'v1', 0, self.answer, latency=1.5)
+    
+    def test_hit_for_similar_question_and_same_context(self):
+        similar = np.array([1.0, 0.1, 0.0])
+        
+        self.assertIs(self.cache.get(similar, [1, 2], 'model', 'v1', 0), self.answer)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 0))
+        self.assertEqual(stats['saved_seconds'], 1.5)
+    
+    def test_miss_for_different_question_or_context(self):
+        self.assertIsNone(self.cache.get(np.array([0.0, 1.0, 0.0]), [1, 2], 'model', 'v1', 0))
+        self.assertIsNone(self.cache.get(self.query, [2, 1], 'model', 'v1', 0))
+        self.assertIsNone(self.cache.get(self.query, [1, 2], 'other-model', 'v1', 0))
+        self.assertIsNone(self.cache.get(self.query, [1, 2], 'model', 'v2', 0))
+        self.assertEqual(self.cache.get_stats()['misses'], 4)
+    
+    def test_store_version_bump_drops_answers(self):
+        self.assertIsNone(self.cache.get(self.query, [1, 2], 'model', 'v1', 1))
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+        
+        # Answers from the old version are not restored by going back to it
+        self.assertIsNone(self.cache.get(self.query, [1, 2], 'model', 'v1', 0))
+    
+    def test_least_recently_used_answers_are_evicted(self):
+        for chunk_id in range(3, 11):
+            self.cache.put(self.query, [chunk_id], 'model', 'v1', 0, self.answer, latency=0.1)
+        
+        self.assertEqual(self.cache.get_stats()['entries'], 8)
+        self.assertIsNone(self.cache.get(self.query, [1, 2], 'model', 'v1', 0))
+        self.assertIs(self.cache.get(self.query, [10], 'model', 'v1', 0), self.answer)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
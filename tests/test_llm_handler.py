@@ -0,0 +1,103 @@
+"""
+Tests for the async LLM path's bounded upstream concurrency
+"""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from modules.llm_handler import LLMHandler
+
+
+class FakeCompletions:
+    """Async chat completions client whose calls block until released"""
+    
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='answer'))])
+
+
+class UpstreamSlotTest(unittest.IsolatedAsyncioTestCase):
+    """Slots are released on every path, so concurrency never shrinks"""
+    
+    def setUp(self):
+        self.completions = FakeCompletions()
+        self.handler = LLMHandler(
+            api_key='test',
+            client=object(),
+            async_client=SimpleNamespace(chat=SimpleNamespace(completions=self.completions)),
+            max_concurrency=1,
+            queue_timeout=0.05
+        )
+    
+    async def ask(self):
+        return await self.handler.agenerate_answer('question', 'context', [])
+    
+    async def settle(self):
+        """Let pending callbacks run"""
+        for _ in range(3):
+            await asyncio.sleep(0)
+    
+    async def test_waiter_times_out_while_slot_is_held(self):
+        first = asyncio.ensure_future(self.ask())
+        await self.settle()
+        
+        with self.assertRaises(TimeoutError):
+            await self.ask()
+        
+        self.completions.release.set()
+        self.assertTrue((await first)['success'])
+        await self.settle()
+        
+        self.assertEqual(self.handler.get_stats(), {'max_concurrency': 1, 'in_flight': 0, 'waiting': 0, 'rejected': 1})
+        self.assertFalse(self.handler._semaphore.locked())
+    
+    async def test_cancelled_waiter_releases_nothing_it_did_not_get(self):
+        first = asyncio.ensure_future(self.ask())
+        await self.settle()
+        
+        waiter = asyncio.ensure_future(self.ask())
+        await self.settle()
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        
+        self.completions.release.set()
+        await first
+        await self.settle()
+        
+        self.assertEqual(self.handler.waiting, 0)
+        self.assertEqual(self.handler.in_flight, 0)
+        self.assertFalse(self.handler._semaphore.locked())
+    
+    async def test_waiter_cancelled_after_slot_granted_hands_it_back(self):
+        semaphore = self.handler._semaphore = asyncio.Semaphore(1)
+        await semaphore.acquire()
+        
+        waiter = asyncio.ensure_future(self.ask())
+        await self.settle()
+        
+        # One step lets the acquire finish while the waiter has not resumed yet
+        semaphore.release()
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await self.settle()
+        
+        self.assertEqual(self.completions.calls, 0)
+        self.assertEqual(self.handler.in_flight, 0)
+        self.assertFalse(semaphore.locked())
+        
+        # The slot is usable again
+        self.completions.release.set()
+        self.assertTrue((await self.ask())['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file